@@ -0,0 +1,98 @@
+"""
+Benchmark loading a few underlyings over a month from the history archive vs the saved daily CSV
+
+Each reader runs in its own process so its peak RSS can be read from getrusage.
+Run from the repository root:  python -m benchmarks.bench_archive
+"""
+
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+NAMES = 100
+STRIKES = 20
+EXPIRIES = pd.date_range("2025-11-01", periods=12, freq="M")
+LIFETIME_DAYS = 60
+QUERY_UNDERLYINGS = ["SYM000", "SYM010", "SYM020", "SYM030", "SYM040"]
+QUERY_START, QUERY_END = "2026-09-15", "2026-10-15"
+
+def make_history():
+    rng = np.random.default_rng(11)
+    frames = []
+    token = 1000
+    for expiry in EXPIRIES:
+        dates = pd.bdate_range(expiry - pd.Timedelta(days=LIFETIME_DAYS), expiry)
+        contracts = pd.MultiIndex.from_product([[f"SYM{i:03d}" for i in range(NAMES)], np.arange(STRIKES) * 10.0 + 100,
+                                                ["CE", "PE"]], names=["name", "strike", "option_type"]).to_frame(index=False)
+        contracts["instrument_token"] = np.arange(len(contracts)) + token
+        contracts["expiry"] = expiry.strftime("%Y-%m-%d")
+        token += len(contracts)
+
+        candles = contracts.loc[contracts.index.repeat(len(dates))].reset_index(drop=True)
+        candles["date"] = np.tile(dates.strftime("%Y-%m-%d"), len(contracts))
+        candles["close"] = rng.uniform(1, 100, len(candles)).round(2)
+        candles["open"] = (candles["close"] * rng.uniform(0.9, 1.1, len(candles))).round(2)
+        candles["high"] = candles[["open", "close"]].max(axis=1)
+        candles["low"] = candles[["open", "close"]].min(axis=1)
+        candles["volume"] = rng.integers(0, 10_000, len(candles)).astype(float)
+        candles["oi"] = rng.integers(0, 50_000, len(candles)).astype(float)
+        frames.append(candles)
+    return pd.concat(frames, ignore_index=True)
+
+def read_csv(workdir):
+    from options_analysis.data.artifacts import read_ohlc_artifact
+
+    history_df = read_ohlc_artifact(os.path.join(workdir, "daily.csv"))
+    return history_df[history_df["name"].isin(QUERY_UNDERLYINGS)
+                      & (history_df["date"] >= QUERY_START) & (history_df["date"] <= QUERY_END)]
+
+def read_archive(workdir):
+    from options_analysis.data.archive import read_archive
+
+    return read_archive(QUERY_UNDERLYINGS, start=QUERY_START, end=QUERY_END, root=os.path.join(workdir, "archive"))
+
+def run_reader(reader, workdir):
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    history_df = (read_csv if reader == "csv" else read_archive)(workdir)
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{elapsed:.3f} {peak_kb - baseline_kb} {len(history_df)}")
+
+def prepare(workdir):
+    from options_analysis.data.archive import write_archive
+
+    history_df = make_history()
+    history_df.to_csv(os.path.join(workdir, "daily.csv"), index=False)
+    started = time.perf_counter()
+    write_archive(history_df, run_date="2026-10-16", root=os.path.join(workdir, "archive"))
+    print(f"{len(history_df)} candles, archive written in {time.perf_counter() - started:.1f}s")
+
+def main():
+    with tempfile.TemporaryDirectory() as workdir:
+        # Built in a child process too, a child's ru_maxrss starts from its parent's RSS
+        subprocess.run([sys.executable, "-m", "benchmarks.bench_archive", "prepare", workdir], check=True)
+
+        rows = {}
+        for reader in ("csv", "archive"):
+            output = subprocess.run([sys.executable, "-m", "benchmarks.bench_archive", reader, workdir],
+                                    capture_output=True, text=True, check=True).stdout.split()
+            elapsed, peak_delta_kb, rows[reader] = output
+            print(f"{reader:<8} {float(elapsed):7.2f} s  peak RSS +{int(peak_delta_kb) / 1024:7.1f} MiB  {rows[reader]} rows")
+
+
+        assert rows["csv"] == rows["archive"], "readers returned different row counts"
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "prepare":
+        prepare(sys.argv[2])
+    elif len(sys.argv) > 2:
+        run_reader(sys.argv[1], sys.argv[2])
+    else:
+        main()
@@ -0,0 +1,82 @@
+"""
+Benchmark the weekly pattern analysis on per-symbol sub-frames vs the columnar CandleStore
+
+Each variant runs in its own process so its peak RSS can be read from getrusage.
+Run from the repository root:  python -m benchmarks.bench_candle_store
+"""
+
+import hashlib
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+NAMES = 200
+STRIKES = 100
+EXPIRIES = ["2026-10-27", "2026-11-24"]
+WEEKLY_DATES = ["2026-10-05", "2026-10-09", "2026-10-12", "2026-10-16"]
+
+def make_weekly_ohlc():
+    rng = np.random.default_rng(7)
+    contracts = pd.MultiIndex.from_product([[f"SYM{i:03d}" for i in range(NAMES)], EXPIRIES,
+                                            np.arange(STRIKES) * 10.0 + 100], names=["name", "expiry", "strike"])
+    contracts = contracts.to_frame(index=False)
+    contracts["instrument_token"] = np.arange(len(contracts)) * 7 + 1000
+    candles = contracts.loc[contracts.index.repeat(len(WEEKLY_DATES))].reset_index(drop=True)
+    candles["date"] = np.tile(WEEKLY_DATES, len(contracts))
+    candles["open"] = rng.uniform(5, 50, len(candles)).round(2)
+    candles["close"] = (candles["open"] * rng.uniform(0.8, 1.3, len(candles))).round(2)
+    candles["high"] = candles[["open", "close"]].max(axis=1) * 1.02
+    candles["low"] = candles[["open", "close"]].min(axis=1) * 0.98
+    candles["option_type"] = "CE"
+    return candles
+
+def legacy_messages(weekly_ohlc_df):
+    """The per-symbol, per-(expiry, strike) loop analyze_bullish_patterns used to run"""
+    from tests.legacy_patterns import legacy_kite_green_bullish as find_green_bullish_candles
+
+    messages = []
+    for symbol in weekly_ohlc_df['name'].unique():
+        symbol_df = weekly_ohlc_df[weekly_ohlc_df['name'] == symbol]
+        for _, final_df in symbol_df.groupby(['expiry', 'strike'], sort=False):
+            message = find_green_bullish_candles(final_df)
+            if message is not None:
+                messages.append(message)
+    return messages
+
+def store_messages(weekly_ohlc_df):
+    from options_analysis.data.candle_store import CandleStore
+    from options_analysis.utils.data_utils import find_green_bullish_contracts
+
+    return find_green_bullish_contracts(CandleStore(weekly_ohlc_df))
+
+def run_variant(variant):
+    weekly_ohlc_df = make_weekly_ohlc()
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    messages = (legacy_messages if variant == "legacy" else store_messages)(weekly_ohlc_df)
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    digest = hashlib.sha1("\n".join(messages).encode()).hexdigest()
+    print(f"{elapsed:.3f} {baseline_kb} {peak_kb} {len(messages)} {digest}")
+
+def main():
+    results = {}
+    for variant in ("legacy", "store"):
+        output = subprocess.run([sys.executable, "-m", "benchmarks.bench_candle_store", variant],
+                                capture_output=True, text=True, check=True).stdout.split()
+        elapsed, baseline_kb, peak_kb, matches, digest = output
+        results[variant] = digest
+        print(f"{variant:<8} {float(elapsed):8.3f} s  peak RSS {int(peak_kb) / 1024:7.1f} MiB "
+              f"(+{(int(peak_kb) - int(baseline_kb)) / 1024:.1f} MiB over the loaded frame)  {matches} matches")
+
+    assert results["legacy"] == results["store"], "legacy loop and CandleStore disagree"
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        run_variant(sys.argv[1])
+    else:
+        main()
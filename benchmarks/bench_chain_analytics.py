@@ -0,0 +1,68 @@
+"""
+Benchmark max pain per underlying/expiry: a per-chain pandas loop vs the batched broadcast in chain_analytics
+
+Run from the repository root:  python -m benchmarks.bench_chain_analytics
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+STOCKS = 214
+INDICES = 3
+EXPIRIES = ["2026-10-27", "2026-11-24", "2026-12-29"]
+
+def make_latest_candles():
+    """One latest candle per contract, stock chains of 20-80 strikes and index chains of 200"""
+    rng = np.random.default_rng(11)
+    frames = []
+    for i in range(STOCKS + INDICES):
+        name = f"SYM{i:03d}" if i < STOCKS else f"INDEX{i - STOCKS}"
+        ltp = rng.uniform(100, 5000) if i < STOCKS else rng.uniform(20000, 50000)
+        for expiry in EXPIRIES:
+            count = int(rng.integers(20, 80)) if i < STOCKS else 200
+            strikes = np.round(ltp * (1 + (np.arange(count) - count // 2) / 50), 1)
+            chain = pd.DataFrame({"strike": np.tile(strikes, 2), "option_type": np.repeat(["CE", "PE"], count)})
+            # Some strikes only list one side
+            chain = chain[rng.random(len(chain)) > 0.1]
+            frames.append(chain.assign(name=name, expiry=expiry, underlying_price=ltp))
+
+    candles = pd.concat(frames, ignore_index=True)
+    candles["instrument_token"] = np.arange(len(candles)) + 1000
+    candles["date"] = "2026-10-16"
+    candles["close"] = rng.uniform(1, 200, len(candles)).round(2)
+    candles["oi"] = rng.integers(0, 100000, len(candles)).astype(float)
+    return candles
+
+def loop_max_pain(candles):
+    """Max pain chain by chain, one settlement strike at a time"""
+    result = {}
+    for key, chain in candles.groupby(["name", "expiry"]):
+        strikes = np.sort(chain["strike"].unique())
+        ce_oi = chain[chain["option_type"] == "CE"].groupby("strike")["oi"].sum().reindex(strikes, fill_value=0)
+        pe_oi = chain[chain["option_type"] == "PE"].groupby("strike")["oi"].sum().reindex(strikes, fill_value=0)
+        payouts = [(ce_oi.to_numpy() * np.maximum(settle - strikes, 0)
+                    + pe_oi.to_numpy() * np.maximum(strikes - settle, 0)).sum() for settle in strikes]
+        result[key] = strikes[int(np.argmin(payouts))]
+    return pd.Series(result)
+
+def main():
+    from options_analysis.analysis.chain import chain_analytics
+
+    candles = make_latest_candles()
+    print(f"{candles.groupby(['name', 'expiry']).ngroups} chains, {len(candles)} contracts")
+
+    started = time.perf_counter()
+    expected = loop_max_pain(candles)
+    print(f"loop      {time.perf_counter() - started:8.3f} s  (max pain only)")
+
+    started = time.perf_counter()
+    chains = chain_analytics(candles)
+    print(f"broadcast {time.perf_counter() - started:8.3f} s  (max pain, OI strikes and straddles)")
+
+    actual = chains.set_index(["name", "expiry"])["max_pain"].reindex(expected.index)
+    assert np.array_equal(actual.to_numpy(), expected.to_numpy()), "loop and broadcast max pain disagree"
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Benchmark parsing Zerodha's holiday calendar with html.parser vs lxml, and loading the parsed cache
+
+Run from the repository root:  python -m benchmarks.bench_holiday_parse
+"""
+
+import os
+import tempfile
+import time
+
+from options_analysis.utils import holidays
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "zerodha_holiday_calendar.html")
+YEAR = 2026
+RUNS = 50
+
+def timed(label, fn):
+    fn()
+    started = time.perf_counter()
+    for _ in range(RUNS):
+        result = fn()
+    elapsed = (time.perf_counter() - started) / RUNS
+    print(f"{label:<28} {elapsed * 1000:8.2f} ms  ({len(result)} holidays)")
+    return result
+
+def main():
+    with open(FIXTURE, encoding="utf-8") as fixture:
+        html = fixture.read()
+
+    bs4_df = timed("bs4 html.parser", lambda: holidays.parse_zerodha_holidays(html, YEAR, parser="html.parser"))
+    lxml_df = timed("lxml", lambda: holidays.parse_zerodha_holidays(html, YEAR, parser="lxml"))
+    assert bs4_df.equals(lxml_df), "parsers disagree"
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        holidays.HOLIDAY_CACHE_DIR = cache_dir
+        holidays._download_zerodha_holidays = lambda year: holidays.parse_zerodha_holidays(html, year)
+        holidays.get_zerodha_holidays(YEAR)
+
+        def cached_csv():
+            holidays._tables.clear()
+            return holidays.get_zerodha_holidays(YEAR)
+
+        timed("cached CSV", cached_csv)
+        timed("in-process memo", lambda: holidays.get_zerodha_holidays(YEAR))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark the pooled/cached HTTP client against bare requests.get on a local stub server
+
+Run from the repository root:  python -m benchmarks.bench_http_client
+"""
+
+import hashlib
+import json
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from options_analysis.utils.http_client import fetch_text
+
+CALLS = 200
+PAYLOAD = json.dumps({"CM": [{"tradingDate": "26-Jan-2026", "description": "Republic Day"}] * 500}).encode()
+ETAG = '"' + hashlib.sha1(PAYLOAD).hexdigest() + '"'
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(PAYLOAD)
+
+    def log_message(self, *args):
+        pass
+
+def timed(label, fn):
+    started = time.perf_counter()
+    for _ in range(CALLS):
+        fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<32} {elapsed * 1000 / CALLS:8.3f} ms/call")
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/api/holiday-master"
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        timed("requests.get (new connection)", lambda: requests.get(url).text)
+        timed("pooled session", lambda: fetch_text(url))
+        timed("pooled + 304 revalidation", lambda: fetch_text(url, ttl=1e-9, cache_dir=cache_dir))
+        timed("pooled + disk cache hit", lambda: fetch_text(url, ttl=3600, cache_dir=cache_dir))
+
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Speed of the shared pattern/calendar core against the per-row implementations it replaced
+
+Equivalence, including flat candles, string and missing prices and holiday weeks,
+is covered by tests/test_pattern_core.py, this only times the two on a scan-sized input.
+
+Run from the repository root:  python -m benchmarks.bench_pattern_core
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+SYMBOLS = 60
+STRIKES = 80
+EXPIRY = "30-Oct-2026"
+# Newest first, like nselib returns them, with non-anchor sessions in between
+SESSIONS = ["16-Oct-2026", "15-Oct-2026", "14-Oct-2026", "13-Oct-2026", "12-Oct-2026",
+            "09-Oct-2026", "08-Oct-2026", "07-Oct-2026", "06-Oct-2026", "05-Oct-2026"]
+ANCHORS = ["05-Oct-2026", "09-Oct-2026", "12-Oct-2026", "16-Oct-2026"]
+
+def make_nse_frame(symbol, rng):
+    """One symbol's CE rows as root main.py's get_options_data_from_nse returns them"""
+    strikes = np.arange(STRIKES) * 10.0 + 1000
+    rows = pd.DataFrame({"TIMESTAMP": np.tile(SESSIONS, STRIKES), "strike": np.repeat(strikes, len(SESSIONS))})
+    opens = rng.uniform(100, 999, len(rows))
+    closes = (opens * rng.uniform(0.85, 1.15, len(rows))).clip(100, 999.99)
+    flat = rng.random(len(rows)) < 0.05
+    rows["open"] = np.where(flat, 0.0, opens)
+    rows["high"] = np.where(flat, 0.0, np.maximum(opens, closes) + 1).clip(max=999.99)
+    rows["low"] = np.where(flat, 0.0, np.minimum(opens, closes) - 1)
+    rows["close"] = closes
+    for column in ("strike", "open", "high", "low", "close"):
+        rows[column] = rows[column].map("{:.2f}".format)
+    rows["SYMBOL"] = symbol
+    rows["EXPIRY_DT"] = EXPIRY
+    return rows[["TIMESTAMP", "SYMBOL", "strike", "EXPIRY_DT", "open", "high", "low", "close"]]
+
+def timed(function):
+    started = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - started
+
+def main():
+    from options_analysis.analysis.patterns import scan_green_bullish
+    from options_analysis.data.adapters import from_nse
+    from options_analysis.data.candle_store import CandleStore
+    from options_analysis.utils.data_utils import find_green_bullish_contracts, nse_bullish_messages
+    from options_analysis.utils.trading_calendar import TradingCalendar
+    from tests.legacy_patterns import legacy_nse_messages, legacy_kite_messages, legacy_holiday_check
+
+    rng = np.random.default_rng(3)
+    nse_frames = [make_nse_frame(f"SYM{i:03d}", rng) for i in range(SYMBOLS)]
+
+    _, legacy_elapsed = timed(lambda: [legacy_nse_messages(frame, ANCHORS) for frame in nse_frames])
+    core, core_elapsed = timed(lambda: [nse_bullish_messages(scan_green_bullish(from_nse(frame, option_type="CE"),
+                                                                                ANCHORS)) for frame in nse_frames])
+    print(f"NSE  {SYMBOLS * STRIKES} contracts, {sum(m.count(chr(10)) for m in core)} matches: "
+          f"per-row {legacy_elapsed:7.3f} s, engine {core_elapsed:7.3f} s")
+
+    kite_df = from_nse(pd.concat(nse_frames, ignore_index=True), option_type="CE")
+    kite_df = kite_df[kite_df["date"].isin(pd.to_datetime(ANCHORS).strftime("%Y-%m-%d"))]
+    kite_df = kite_df.sort_values(["instrument_token", "date"], kind="stable", ignore_index=True)
+    _, legacy_elapsed = timed(lambda: legacy_kite_messages(kite_df))
+    core, core_elapsed = timed(lambda: find_green_bullish_contracts(CandleStore(kite_df)))
+    print(f"Kite {kite_df['instrument_token'].nunique()} contracts, {len(core)} matches: "
+          f"per-row {legacy_elapsed:7.3f} s, engine {core_elapsed:7.3f} s")
+
+    holidays = pd.DataFrame({"Date": pd.bdate_range("2026-01-01", "2026-12-31")[::17].strftime("%Y-%m-%d")})
+    days = pd.date_range("2026-01-01", "2026-12-31")
+    _, legacy_elapsed = timed(lambda: [legacy_holiday_check(day, holidays) for day in days])
+    calendar = TradingCalendar(2026, 2026, set(pd.to_datetime(holidays["Date"]).dt.date))
+    _, core_elapsed = timed(lambda: calendar.is_holiday(days.values.astype("datetime64[D]")))
+    print(f"Holiday checks of {len(days)} days: per-date {legacy_elapsed * 1000:7.1f} ms, "
+          f"vectorized {core_elapsed * 1000:7.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,15 @@
 import json
 from datetime import datetime
 
-from nselib import derivatives
 import pandas as pd
 
 from stocklist import symbols
 
 import logging
 
+from options_analysis.analysis.patterns import scan_green_bullish
+from options_analysis.data.adapters import from_nse
+from options_analysis.utils.data_utils import nse_bullish_messages
 from utility import write_to_log, get_working_days, get_last_thursday_and_last_day_of_month, get_nse_holidays, get_zerodha_holidays
 
 pd.set_option('future.no_silent_downcasting', True)
@@ -26,6 +28,7 @@ pd.set_option('display.max_columns', 75)
 """"""""""""""""""""""""""""""""""""""""""""""""""""""""""""""""""
 def get_options_data_from_nse(symbol : str, instrument:str, option_type: str = None,
                              period: str = None, expiry_date: str = None):
+    from nselib import derivatives
 
     ### Get stock options OHLC prices of all the Strike prices and expiry dates
     stock_df = pd.DataFrame(derivatives.option_price_volume_data(symbol = symbol, instrument = instrument, option_type = option_type, period = period))
@@ -47,71 +50,6 @@ def get_options_data_from_nse(symbol : str, instrument:str, option_type: str = N
     return stock_df
 
 
-def find_green_bullish_candles(final_df):
-
-    bullish_message = None
-    if len(final_df) == 4:
-        openFlag = False
-        closeFlag = False
-
-        row = final_df.iloc[0]
-        if (row['open'] == '0.00') and (row['high'] == '0.00') and (row['low'] == '0.00'):
-            final_df.at[final_df.index[0], 'open'] = row['close']
-
-        row = final_df.iloc[1]
-        if (row['open'] == '0.00') and (row['high'] == '0.00') and (row['low'] == '0.00'):
-            final_df.at[final_df.index[1], 'open'] = row['close']
-
-        row = final_df.iloc[2]
-        if (row['open'] == '0.00') and (row['high'] == '0.00') and (row['low'] == '0.00'):
-            final_df.at[final_df.index[2], 'open'] = row['close']
-
-        row = final_df.iloc[3]
-        if (row['open'] == '0.00') and (row['high'] == '0.00') and (row['low'] == '0.00'):
-            final_df.at[final_df.index[3], 'open'] = row['close']
-
-        # print(
-        #     f"first_week_open_date - {final_df.iloc[3]['open']}, first_week_close_date - {final_df.iloc[2]['close']}")
-        # print(
-        #     f"last_week_open_date - {final_df.iloc[1]['open']}, last_week_close_date - {final_df.iloc[0]['close']}")
-
-        if ((float(final_df.iloc[2]['close']) > float(final_df.iloc[3]['open'])) and
-                (float(final_df.iloc[0]['close']) > float(final_df.iloc[1]['open']))):
-
-            # Compare first week open day's price with last week open day
-            if final_df.iloc[1]['open'] <= final_df.iloc[3]['open']:
-                # print("last_week_open_date open is lower than the first_week_open_date.")
-                openFlag = True
-            else:
-                final_df.iloc[1]['open'] >= final_df.iloc[3]['open']
-                # print("last_week_open_date open is higher than the first_week_open_date.")
-
-            # Compare first week open day's price with last week open day
-            if final_df.iloc[0]['close'] >= final_df.iloc[2]['close']:
-                # print("last_week_close_date close is higher than first_week_close_date.")
-                closeFlag = True
-            else:
-                final_df.iloc[0]['close'] <= final_df.iloc[2]['close']
-                # print("last_week_close_date is lower than the first_week_close_date")
-
-            # print(openFlag, closeFlag)
-            if (openFlag & closeFlag):
-                print(final_df)
-                bullish_message = f"***** GREEN bullish ****** {final_df.iloc[0]['SYMBOL']}, {final_df.iloc[0]['strike']}, {final_df.iloc[0]['EXPIRY_DT']} ***** "
-                # write_to_log(bullish_message)
-        #     else:
-        #         bullish_message = f"NOT bullish, {final_df.iloc[0]['strike']}, {final_df.iloc[0]['EXPIRY_DT']}"
-        # else:
-        #     bullish_message = f"NOT bullish, {final_df.iloc[0]['strike']}, {final_df.iloc[0]['EXPIRY_DT']}"
-    # else:
-    #     if not final_df.empty:
-    #         bullish_message = f"Insufficient data for {final_df.iloc[0]['strike']}, {final_df.iloc[0]['EXPIRY_DT']}"
-    #     else:
-    #         bullish_message = f"Insufficient data"
-
-    # print(bullish_message)
-    return bullish_message
-
 def process_logic(symbol, expiry, first_week_open_date, first_week_close_date, last_week_open_date, last_week_close_date ):
     # ### Get options data from NSE
 
@@ -121,36 +59,13 @@ def process_logic(symbol, expiry, first_week_open_date, first_week_close_date, l
         logging.error(f"Failed to fetch OHLC data for {symbol} with expiry {expiry}: {e}")
         return 0
 
-    # last_traded_price = get_stock_price(symbol)
-    # above_cmp_strike_prices_df = filtered_stock_df[(filtered_stock_df['strike'].astype(float) > float(last_traded_price))]
-    # filtered_stock_df = filtered_stock_df[(filtered_stock_df['strike'].astype(float) > 570.00)]
-
-    # filtered_stock_df = filtered_stock_df[filtered_stock_df['strike'] == '480.00']
-    first_week_open_date = first_week_open_date.strftime("%d-%b-%Y")
-    first_week_close_date = first_week_close_date.strftime("%d-%b-%Y")
-    last_week_open_date = last_week_open_date.strftime("%d-%b-%Y")
-    last_week_close_date = last_week_close_date.strftime("%d-%b-%Y")
-
-    # print(first_week_open_date)
-
-    # filtered_stock_df = filtered_stock_df[filtered_stock_df['TIMESTAMP'].isin(pd.to_datetime(
-    #     [first_week_open_date, first_week_close_date, last_week_open_date, last_week_close_date]))]
-
-    filtered_stock_df = filtered_stock_df[filtered_stock_df['TIMESTAMP'].isin([first_week_open_date, first_week_close_date, last_week_open_date, last_week_close_date])]
-
-    unique_strike_prices  = filtered_stock_df['strike'].unique()
-    # unique_strike_prices = ['290.00']
-
-    message = ""
-
-    for strike_price in unique_strike_prices:
-        final_df = filtered_stock_df[filtered_stock_df['strike'] == strike_price]
-        # message.append(f"Line {strike_price}")
-        message = find_green_bullish_candles(final_df)
-        if message is not None:
-            message += f"Line {strike_price}\n"
+    # NSE rows come newest first with string prices, the adapter turns them into the candle frame
+    # the options_analysis scan uses, so both run the same green bullish engine on every strike at once
+    candles = from_nse(filtered_stock_df, option_type='CE')
+    contracts = scan_green_bullish(candles, [first_week_open_date, first_week_close_date,
+                                             last_week_open_date, last_week_close_date])
 
-    return message
+    return nse_bullish_messages(contracts) or None
 
 
 
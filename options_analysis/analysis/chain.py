@@ -0,0 +1,147 @@
+"""
+Chain-level aggregates per underlying and expiry: max pain, OI-weighted strikes and ATM straddle
+"""
+
+import numpy as np
+import pandas as pd
+
+from options_analysis.config.settings import CHAIN_BATCH_CELLS
+
+CHAIN_KEYS = ["name", "expiry"]
+
+def latest_candles(ohlc_df):
+    """Each contract's latest candle, placeholder rows of tokens without candles dropped"""
+    candles = ohlc_df.dropna(subset=["date"])
+    return candles.sort_values(["instrument_token", "date"]).drop_duplicates("instrument_token", keep="last")
+
+def chain_matrix(latest_df):
+    """Chains as rows of padded (chains x max strikes) arrays
+
+    Returns the chains frame (name, expiry, underlying_price, strikes) and a dict of
+    strike, call/put OI and call/put close arrays. Each chain's strikes are sorted and
+    left-aligned, padding is NaN for strikes and closes and 0 for OI.
+    """
+    sides = latest_df.pivot_table(index=CHAIN_KEYS + ["strike"], columns="option_type", values=["oi", "close"],
+                                  aggfunc="last")
+    sides = sides.reindex(columns=pd.MultiIndex.from_product([["oi", "close"], ["CE", "PE"]]))
+    sides.columns = [f"{option_type.lower()}_{value}" for value, option_type in sides.columns]
+    sides = sides.reset_index()
+
+    chain_ids = sides.groupby(CHAIN_KEYS, sort=False).ngroup().to_numpy()
+    positions = sides.groupby(CHAIN_KEYS, sort=False).cumcount().to_numpy()
+    counts = np.bincount(chain_ids)
+    shape = (len(counts), counts.max() if len(counts) else 0)
+
+    def padded(values, fill):
+        matrix = np.full(shape, fill, dtype=float)
+        matrix[chain_ids, positions] = values
+        return matrix
+
+    arrays = {
+        "strike": padded(sides["strike"].to_numpy(dtype=float), np.nan),
+        "ce_oi": padded(np.nan_to_num(sides["ce_oi"].to_numpy(dtype=float)), 0),
+        "pe_oi": padded(np.nan_to_num(sides["pe_oi"].to_numpy(dtype=float)), 0),
+        "ce_close": padded(sides["ce_close"].to_numpy(dtype=float), np.nan),
+        "pe_close": padded(sides["pe_close"].to_numpy(dtype=float), np.nan),
+    }
+
+    first_rows = np.unique(chain_ids, return_index=True)[1]
+    chains = sides.iloc[first_rows][CHAIN_KEYS].reset_index(drop=True)
+    if "underlying_price" in latest_df.columns:
+        prices = latest_df.groupby(CHAIN_KEYS)["underlying_price"].last()
+        chains["underlying_price"] = prices.reindex(pd.MultiIndex.from_frame(chains)).to_numpy()
+    else:
+        chains["underlying_price"] = np.nan
+    chains["strikes"] = counts
+    return chains, arrays
+
+def max_pain(strike, ce_oi, pe_oi, batch_cells=CHAIN_BATCH_CELLS):
+    """Max pain strike of every chain of padded strike/OI arrays
+
+    For every candidate settlement strike j of a chain the option writers pay
+    sum_i ce_oi[i] * max(K[j] - K[i], 0) + pe_oi[i] * max(K[i] - K[j], 0); max pain is
+    the j paying least. Chains are sorted by strike count and batched so each batch
+    broadcasts one (batch x width x width) payoff matrix only as wide as it needs.
+    """
+    counts = (~np.isnan(strike)).sum(axis=1)
+    result = np.full(len(counts), np.nan)
+    order = np.argsort(counts, kind="stable")
+
+    start = 0
+    while start < len(order):
+        width = max(int(counts[order[start]]), 1)
+        end = start + 1
+        # Widen the batch while its payoff matrix stays under the cell budget
+        while end < len(order) and (end - start + 1) * max(int(counts[order[end]]), 1) ** 2 <= batch_cells:
+            width = max(int(counts[order[end]]), 1)
+            end += 1
+        rows = order[start:end]
+        start = end
+
+        strikes = strike[rows, :width]
+        diff = strikes[:, :, None] - strikes[:, None, :]
+        # fmax turns the NaN of padded strikes into a zero payoff
+        payout = (np.fmax(diff, 0) * ce_oi[rows, None, :width] + np.fmax(-diff, 0) * pe_oi[rows, None, :width])
+        payout = payout.sum(axis=2)
+        payout[np.isnan(strikes)] = np.inf
+
+        best = payout.argmin(axis=1)
+        has_oi = (ce_oi[rows, :width] + pe_oi[rows, :width]).sum(axis=1) > 0
+        result[rows] = np.where(has_oi, strikes[np.arange(len(rows)), best], np.nan)
+    return result
+
+def _weighted_strike(strike, weights):
+    total = weights.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(total > 0, (np.nan_to_num(strike) * weights).sum(axis=1) / total, np.nan)
+
+def _strike_at(strike, index, valid):
+    return np.where(valid, strike[np.arange(len(strike)), index], np.nan)
+
+def chain_analytics(ohlc_df, batch_cells=CHAIN_BATCH_CELLS):
+    """Max pain, OI-weighted strike distribution and ATM straddle of every underlying/expiry chain
+
+    Works on each contract's latest candle, so the chain is the scanned universe
+    (its strike window) rather than every listed strike.
+    """
+    latest_df = latest_candles(ohlc_df)
+    if latest_df.empty:
+        return pd.DataFrame(columns=CHAIN_KEYS)
+
+    chains, arrays = chain_matrix(latest_df)
+    strike, ce_oi, pe_oi = arrays["strike"], arrays["ce_oi"], arrays["pe_oi"]
+    total_oi = ce_oi + pe_oi
+    rows = np.arange(len(chains))
+
+    chains["call_oi"] = ce_oi.sum(axis=1)
+    chains["put_oi"] = pe_oi.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        chains["pcr"] = np.where(chains["call_oi"] > 0, chains["put_oi"] / chains["call_oi"], np.nan)
+
+    chains["max_pain"] = max_pain(strike, ce_oi, pe_oi, batch_cells)
+    with np.errstate(invalid="ignore"):
+        chains["max_pain_distance_pct"] = (chains["max_pain"] / chains["underlying_price"] - 1) * 100
+
+    # Where the OI sits: OI-weighted mean strike per side and the spread of all OI around the chain's mean
+    chains["call_oi_strike"] = _weighted_strike(strike, ce_oi)
+    chains["put_oi_strike"] = _weighted_strike(strike, pe_oi)
+    oi_strike = _weighted_strike(strike, total_oi)
+    squared = (np.nan_to_num(strike) - oi_strike[:, None]) ** 2
+    chains["oi_strike_std"] = np.sqrt(_weighted_strike(squared, total_oi))
+    chains["max_call_oi_strike"] = _strike_at(strike, ce_oi.argmax(axis=1), ce_oi.max(axis=1) > 0)
+    chains["max_put_oi_strike"] = _strike_at(strike, pe_oi.argmax(axis=1), pe_oi.max(axis=1) > 0)
+
+    # ATM straddle from each side's strike nearest the underlying. When the universe only holds
+    # OTM strikes the two differ and this is the tightest strangle around the price.
+    underlying = chains["underlying_price"].to_numpy()[:, None]
+    for side in ("ce", "pe"):
+        close = arrays[f"{side}_close"]
+        distance = np.abs(strike - underlying)
+        distance = np.where(np.isnan(close) | np.isnan(distance), np.inf, distance)
+        nearest = distance.argmin(axis=1)
+        listed = np.isfinite(distance[rows, nearest])
+        chains[f"atm_{side}_strike"] = _strike_at(strike, nearest, listed)
+        chains[f"atm_{side}"] = np.where(listed, close[rows, nearest], np.nan)
+    chains["straddle"] = chains["atm_ce"] + chains["atm_pe"]
+    chains["straddle_pct"] = chains["straddle"] / chains["underlying_price"] * 100
+    return chains
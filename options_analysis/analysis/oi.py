@@ -0,0 +1,89 @@
+"""
+Vectorized open interest analytics over the whole option chain
+"""
+
+import numpy as np
+import pandas as pd
+
+from options_analysis.config.settings import OI_CHANGE_SESSIONS
+from options_analysis.data.candle_store import CandleStore
+
+# Price up/down combined with OI up/down, the usual F&O positioning classes
+BUILDUPS = np.array(["long buildup", "short buildup", "short covering", "long unwinding", "neutral"])
+OI_COLUMNS = ["instrument_token", "oi", "oi_change", "oi_change_pct", "price_change", "buildup", "pcr"]
+
+def classify_buildup(price_change, oi_change):
+    """Buildup class of each contract from its price and OI change"""
+    price_change = np.asarray(price_change, dtype=float)
+    oi_change = np.asarray(oi_change, dtype=float)
+    codes = np.select([(price_change > 0) & (oi_change > 0), (price_change < 0) & (oi_change > 0),
+                       (price_change > 0) & (oi_change < 0), (price_change < 0) & (oi_change < 0)],
+                      [0, 1, 2, 3], default=4)
+    return BUILDUPS[codes]
+
+def put_call_ratio(names, expiries, option_types, oi):
+    """Put OI over call OI of each row's underlying/expiry chain, summed over the scanned strikes
+
+    NaN for chains without both calls and puts, as when only one option type was fetched.
+    """
+    chain = pd.MultiIndex.from_arrays([np.asarray(names, dtype=str), np.asarray(expiries, dtype=str)])
+    codes, chains = pd.factorize(chain)
+    is_put = np.asarray(option_types) == "PE"
+    oi = np.nan_to_num(np.asarray(oi, dtype=float))
+    put_oi = np.bincount(codes, weights=np.where(is_put, oi, 0), minlength=len(chains))
+    call_oi = np.bincount(codes, weights=np.where(is_put, 0, oi), minlength=len(chains))
+    puts = np.bincount(codes, weights=is_put, minlength=len(chains))
+    calls = np.bincount(codes, weights=~is_put, minlength=len(chains))
+    pcr = np.divide(put_oi, call_oi, out=np.full(len(chains), np.nan), where=(call_oi > 0) & (puts > 0) & (calls > 0))
+    return pcr[codes]
+
+def oi_analytics(ohlc_df, sessions=OI_CHANGE_SESSIONS):
+    """OI change, buildup class and put-call OI ratio of every contract's underlying/expiry chain
+
+    Each contract's latest candle is compared with the one `sessions` candles before
+    it (or its first candle when it has fewer), gathered for all contracts at once
+    from a CandleStore. Placeholder rows of tokens without candles are ignored.
+    """
+    if "oi" not in ohlc_df.columns:
+        return pd.DataFrame(columns=OI_COLUMNS)
+    candles = ohlc_df.dropna(subset=["date", "oi"])
+    if candles.empty:
+        return pd.DataFrame(columns=OI_COLUMNS)
+
+    store = CandleStore(candles)
+    last = store.offsets[1:] - 1
+    base = np.maximum(store.offsets[:-1], last - sessions)
+    oi, close = store.columns["oi"], store.columns["close"]
+
+    oi_change = oi[last] - oi[base]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        oi_change_pct = np.where(oi[base] > 0, oi_change / oi[base] * 100, np.nan)
+    price_change = close[last] - close[base]
+
+    analytics = pd.DataFrame({"instrument_token": store.tokens, "oi": oi[last], "oi_change": oi_change,
+                              "oi_change_pct": oi_change_pct, "price_change": price_change,
+                              "buildup": classify_buildup(price_change, oi_change)})
+    if {"option_type", "expiry"} <= set(store.contracts.columns):
+        analytics["pcr"] = put_call_ratio(store.contracts["name"], store.contracts["expiry"],
+                                          store.contracts["option_type"], oi[last])
+    else:
+        analytics["pcr"] = np.nan
+    return analytics
+
+def rank_by_oi(contracts, analytics, confirmed_only=False):
+    """Order matched contracts by OI confirmation, long buildups first and larger OI increases ahead
+
+    A bullish candle pattern is confirmed when the contract's own OI rose with its
+    price. Contracts keep their incoming order among equals. confirmed_only drops
+    the unconfirmed ones.
+    """
+    ranked = contracts.merge(analytics[OI_COLUMNS], on="instrument_token", how="left")
+    ranked["oi_confirmed"] = ranked["buildup"].eq("long buildup")
+    if confirmed_only:
+        ranked = ranked[ranked["oi_confirmed"]]
+    return sort_by_oi(ranked)
+
+def sort_by_oi(results):
+    """Confirmed contracts first, then by OI increase, keeping the incoming order among equals"""
+    return results.sort_values(["oi_confirmed", "oi_change_pct"], ascending=False, na_position="last",
+                               kind="stable", ignore_index=True)
@@ -0,0 +1,51 @@
+"""
+Vectorized candle pattern rules shared by the scanner, the replay and the NSE script (root main.py)
+"""
+
+import numpy as np
+import pandas as pd
+
+from options_analysis.data.candle_store import CandleStore
+
+def fill_flat_opens(open_, high, low, close):
+    """Rows with zero open/high/low (no trades) take their close as the open"""
+    open_ = np.asarray(open_, dtype=float)
+    flat = (open_ == 0) & (np.asarray(high, dtype=float) == 0) & (np.asarray(low, dtype=float) == 0)
+    return np.where(flat, np.asarray(close, dtype=float), open_)
+
+def green_bullish_mask(first_open, first_close, last_open, last_close):
+    """Vectorized find_green_bullish_candles over arrays of the four weekly anchor prices
+
+    first_* come from the older week's open/close sessions and last_* from the newer
+    week's. Both weeks must be green, the newer one opening no higher and closing no
+    lower than the older one. Missing prices (NaN) never match.
+    """
+    first_open, first_close, last_open, last_close = (np.asarray(a, dtype=float)
+                                                      for a in (first_open, first_close, last_open, last_close))
+    with np.errstate(invalid="ignore"):
+        return ((last_close > last_open) & (first_close > first_open)
+                & (last_open <= first_open) & (last_close >= first_close))
+
+def green_bullish_contracts(store):
+    """Contracts of a CandleStore matching the green bullish pattern on their four weekly anchor candles
+
+    Contracts need exactly four anchor candles. Rows come out in the order the old
+    per-symbol, per-(expiry, strike) loops reported them: underlyings, then contracts,
+    by first appearance in the input.
+    """
+    if not len(store):
+        return store.contracts.iloc[:0]
+
+    def anchor_open(k):
+        return fill_flat_opens(*(store.nth(column, k) for column in ("open", "high", "low", "close")))
+
+    matched = (store.counts() == 4) & green_bullish_mask(anchor_open(0), store.nth("close", 1),
+                                                         anchor_open(2), store.nth("close", 3))
+
+    contracts = store.contracts.assign(name_seen=store.contracts.groupby("name")["first_seen"].transform("min"))
+    return contracts[matched].sort_values(["name_seen", "first_seen"]).drop(columns="name_seen")
+
+def scan_green_bullish(candles, anchor_dates):
+    """green_bullish_contracts of a normalized candle frame (see data.adapters) on the given anchor sessions"""
+    anchors = {pd.to_datetime(anchor).strftime("%Y-%m-%d") for anchor in anchor_dates}
+    return green_bullish_contracts(CandleStore(candles[candles["date"].isin(anchors)]))
@@ -0,0 +1,206 @@
+"""
+Scored bullish signals: per-match metrics, streaming top-K selection and JSON/CSV output
+"""
+
+import heapq
+import json
+import logging
+import math
+import os
+import numpy as np
+import pandas as pd
+from collections import defaultdict
+from datetime import datetime
+
+from options_analysis.config.settings import (SIGNAL_TOP_K, SIGNAL_TOP_PER_UNDERLYING, SIGNAL_SCORE_WEIGHTS,
+                                              RISK_FREE_RATE)
+from options_analysis.analysis.patterns import fill_flat_opens
+
+# Abramowitz & Stegun 7.1.26, absolute error below 1.5e-7
+_ERF_P = 0.3275911
+_ERF_A = (0.254829592, -0.284496736, 1.421413741, -1.453152027, 1.061405429)
+
+def norm_cdf(x):
+    """Standard normal CDF of an array"""
+    z = np.abs(np.asarray(x, dtype=float)) / math.sqrt(2)
+    t = 1 / (1 + _ERF_P * z)
+    poly = t * (_ERF_A[0] + t * (_ERF_A[1] + t * (_ERF_A[2] + t * (_ERF_A[3] + t * _ERF_A[4]))))
+    erf = 1 - poly * np.exp(-z * z)
+    return 0.5 * (1 + np.sign(x) * erf)
+
+def black_scholes(spot, strike, years, rate, vol, is_call):
+    """European option prices of arrays of contracts"""
+    sqrt_t = np.sqrt(years)
+    d1 = (np.log(spot / strike) + (rate + vol * vol / 2) * years) / (vol * sqrt_t)
+    d2 = d1 - vol * sqrt_t
+    discounted = strike * np.exp(-rate * years)
+    call = spot * norm_cdf(d1) - discounted * norm_cdf(d2)
+    return np.where(is_call, call, call - spot + discounted)
+
+def implied_volatility(price, spot, strike, years, is_call, rate=RISK_FREE_RATE, iterations=60, max_vol=5.0):
+    """Annualized implied volatility by bisection over all contracts at once
+
+    NaN outside the no-arbitrage bounds and where no volatility up to max_vol reaches the price.
+    """
+    price, spot, strike, years = (np.asarray(a, dtype=float) for a in (price, spot, strike, years))
+    is_call = np.asarray(is_call, dtype=bool)
+    discounted = strike * np.exp(-rate * years)
+    lower = np.where(is_call, np.maximum(spot - discounted, 0), np.maximum(discounted - spot, 0))
+    upper = np.where(is_call, spot, discounted)
+    with np.errstate(invalid="ignore"):
+        valid = (price > lower) & (price < upper) & (years > 0) & (spot > 0) & (strike > 0)
+
+    low = np.full(price.shape, 1e-4)
+    high = np.full(price.shape, max_vol)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for _ in range(iterations):
+            mid = (low + high) / 2
+            too_high = black_scholes(spot, strike, years, rate, mid, is_call) > price
+            high = np.where(too_high, mid, high)
+            low = np.where(too_high, low, mid)
+    iv = (low + high) / 2
+    return np.where(valid & (iv < max_vol * 0.999), iv, np.nan)
+
+def _day(values):
+    """Dates of any parseable form as YYYY-MM-DD strings"""
+    return pd.to_datetime(pd.Series(values, dtype=object)).dt.strftime("%Y-%m-%d").to_numpy()
+
+def underlying_closes(ohlc_df, rate=RISK_FREE_RATE):
+    """Underlying close of every underlying/expiry chain on each date, backed out of put-call parity
+
+    Uses the strike whose call and put closes are nearest each other on that date (the
+    at-the-money pair). Indexed by (name, expiry, date), dates as YYYY-MM-DD strings;
+    chains without both sides on a date have no entry.
+    """
+    keys = ["name", "expiry", "strike", "date"]
+    if ohlc_df.empty or not {"option_type", "close", *keys} <= set(ohlc_df.columns):
+        return pd.Series(dtype=float, index=pd.MultiIndex.from_arrays([[], [], []], names=["name", "expiry", "date"]))
+
+    candles = ohlc_df[ohlc_df["close"] > 0][keys + ["option_type", "close"]]
+    candles = candles.assign(expiry=_day(candles["expiry"]), date=_day(candles["date"]))
+    pairs = candles[candles["option_type"] == "CE"].drop(columns="option_type").merge(
+        candles[candles["option_type"] == "PE"].drop(columns="option_type"), on=keys, suffixes=("_ce", "_pe"))
+    years = np.maximum((pd.to_datetime(pairs["expiry"]) - pd.to_datetime(pairs["date"])).dt.days / 365, 1 / 365)
+    pairs["underlying_close"] = pairs["close_ce"] - pairs["close_pe"] + pairs["strike"] * np.exp(-rate * years)
+    pairs["gap"] = (pairs["close_ce"] - pairs["close_pe"]).abs()
+    atm = pairs.sort_values("gap", kind="stable").drop_duplicates(["name", "expiry", "date"])
+    return atm.set_index(["name", "expiry", "date"])["underlying_close"].sort_index()
+
+def signal_metrics(store, contracts, underlying_closes=None, rate=RISK_FREE_RATE):
+    """Anchor prices and metrics of matched contracts from their four weekly anchor candles
+
+    contracts is indexed by store position (as green_bullish_contracts returns it).
+    pct_move runs from the older week's open to the newer week's close, volume sums
+    the anchor candles and IV is backed out of the last anchor close against the
+    underlying's close on that same date (underlying_closes' layout). Without that
+    close IV stays NaN, which drops its term from the score.
+    """
+    positions = contracts.index.to_numpy()
+
+    def anchor_open(k):
+        return fill_flat_opens(*(store.nth(column, k)[positions] for column in ("open", "high", "low", "close")))
+
+    first_open = anchor_open(0)
+    close = store.nth("close", 3)[positions]
+    as_of = pd.to_datetime(pd.Series(store.columns["date"][store.offsets[:-1][positions] + 3], index=contracts.index,
+                                     dtype=object))
+
+    metrics = pd.DataFrame(index=contracts.index)
+    metrics["as_of"] = as_of.dt.strftime("%Y-%m-%d")
+    metrics["first_open"] = first_open
+    metrics["first_close"] = store.nth("close", 1)[positions]
+    metrics["last_open"] = anchor_open(2)
+    metrics["last_close"] = close
+    with np.errstate(divide="ignore", invalid="ignore"):
+        metrics["pct_move"] = np.where(first_open > 0, (close / first_open - 1) * 100, np.nan)
+    if "volume" in store.columns:
+        metrics["volume"] = sum(store.nth("volume", k)[positions] for k in range(4))
+        metrics["log_volume"] = np.log10(1 + metrics["volume"])
+
+    if underlying_closes is not None:
+        key = pd.MultiIndex.from_arrays([contracts["name"].to_numpy(), _day(contracts["expiry"]),
+                                         metrics["as_of"].to_numpy()])
+        spot = underlying_closes.reindex(key).to_numpy(dtype=float)
+        years = (pd.to_datetime(contracts["expiry"]) - as_of).dt.days.to_numpy() / 365
+        iv = implied_volatility(close, spot, contracts["strike"].to_numpy(dtype=float), np.maximum(years, 1 / 365),
+                                contracts["option_type"].eq("CE").to_numpy(), rate)
+        metrics["iv"] = iv * 100
+    return metrics
+
+def score_signals(signals, weights=SIGNAL_SCORE_WEIGHTS):
+    """Weighted sum of the metric columns present, missing metrics count as 0"""
+    score = np.zeros(len(signals))
+    for metric, weight in weights.items():
+        if metric in signals.columns:
+            score += weight * np.nan_to_num(signals[metric].to_numpy(dtype=float))
+    return signals.assign(score=score)
+
+class TopK:
+    """The k best items pushed so far, held in a size-k min-heap"""
+
+    def __init__(self, k):
+        self.k = k
+        self.heap = []
+        self.pushed = 0
+
+    def push(self, score, item):
+        score = -math.inf if score is None or math.isnan(score) else score
+        # Earlier items win ties, like a stable sort would keep them
+        entry = (score, -self.pushed, item)
+        self.pushed += 1
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif entry[:2] > self.heap[0][:2]:
+            heapq.heapreplace(self.heap, entry)
+
+    def items(self):
+        """Kept items, best first"""
+        return [item for _, _, item in sorted(self.heap, key=lambda entry: entry[:2], reverse=True)]
+
+def top_signals(records, k=SIGNAL_TOP_K, per_underlying=SIGNAL_TOP_PER_UNDERLYING):
+    """Stream scored signal records into the global and per-underlying top lists"""
+    best = TopK(k)
+    by_underlying = defaultdict(lambda: TopK(per_underlying))
+    for record in records:
+        best.push(record["score"], record)
+        by_underlying[record["name"]].push(record["score"], record)
+    return best.items(), {name: top.items() for name, top in sorted(by_underlying.items())}
+
+def _records(signals):
+    """JSON friendly records, NaN as None"""
+    return [{key: (None if isinstance(value, float) and math.isnan(value) else value) for key, value in row.items()}
+            for row in signals.to_dict("records")]
+
+def write_signals(best, by_underlying, filename, option_type=None):
+    """Write the top lists as <filename>.json and a flat <filename>.csv of every underlying's top rows"""
+    base = os.path.splitext(filename)[0]
+    payload = {"generated": datetime.now().isoformat(timespec="seconds"), "option_type": option_type,
+               "top": best, "by_underlying": by_underlying}
+    with open(f"{base}.json", "w") as json_file:
+        json.dump(payload, json_file, indent=2, default=str)
+
+    global_rank = {record["instrument_token"]: rank for rank, record in enumerate(best, start=1)}
+    rows = [dict(record, rank=rank, global_rank=global_rank.get(record["instrument_token"]))
+            for records in by_underlying.values() for rank, record in enumerate(records, start=1)]
+    pd.DataFrame(rows).to_csv(f"{base}.csv", index=False)
+    logging.info(f"Top {len(best)} signals and {len(rows)} per-underlying picks saved to {base}.json/.csv")
+
+def pattern_results(store, contracts, underlying_closes=None, oi_df=None, oi_confirmed=False):
+    """One row per matched contract with its anchor prices, metrics, OI flags and score
+
+    Rows are in output order: the legacy match order, or ranked by OI confirmation
+    when OI analytics are given (oi_confirmed keeps only long buildups).
+    """
+    from options_analysis.analysis.oi import rank_by_oi
+
+    results = contracts.join(signal_metrics(store, contracts, underlying_closes)).drop(columns="first_seen")
+    if oi_df is not None:
+        results = rank_by_oi(results, oi_df, confirmed_only=oi_confirmed)
+    return score_signals(results.reset_index(drop=True))
+
+def write_top_signals(results, filename, k=SIGNAL_TOP_K, per_underlying=SIGNAL_TOP_PER_UNDERLYING):
+    """Write the best results overall and per underlying next to the text output"""
+    option_type = "-".join(sorted(results["option_type"].dropna().unique())) if "option_type" in results else ""
+    best, by_underlying = top_signals(_records(results), k, per_underlying)
+    write_signals(best, by_underlying, filename, option_type or None)
+    return best, by_underlying
@@ -0,0 +1,132 @@
+"""
+As-of replay: run the weekly pattern scan over stored candle history for a range of past dates
+"""
+
+import logging
+import numpy as np
+import pandas as pd
+
+from options_analysis.config.settings import REPLAY_BATCH_CELLS, REPLAY_HORIZON_SESSIONS
+from options_analysis.analysis.patterns import fill_flat_opens, green_bullish_mask
+from options_analysis.utils.trading_calendar import calendar_for
+
+CONTRACT_COLUMNS = ["instrument_token", "name", "strike", "expiry", "option_type"]
+
+class CandleGrid:
+    """Daily candles keyed by (contract, trading session) for gather-style lookups
+
+    Only the sessions a contract has candles for are stored, sorted by
+    contract row * sessions + session column, so lookups are one searchsorted
+    and memory grows with the candles rather than contracts x sessions.
+    """
+
+    def __init__(self, history_df, sessions):
+        history_df = history_df.dropna(subset=["date"])
+        history_df = history_df.drop_duplicates(subset=["instrument_token", "date"], keep="last")
+
+        self.contracts = (history_df[CONTRACT_COLUMNS].drop_duplicates(subset=["instrument_token"], keep="last")
+                          .reset_index(drop=True))
+        self.sessions = sessions
+
+        rows = pd.Index(self.contracts["instrument_token"]).get_indexer(history_df["instrument_token"])
+        dates = pd.to_datetime(history_df["date"]).values.astype("datetime64[D]")
+        cols = np.searchsorted(sessions, dates)
+        on_session = (cols < len(sessions)) & (sessions[cols.clip(max=len(sessions) - 1)] == dates)
+
+        keys = rows[on_session].astype(np.int64) * len(sessions) + cols[on_session]
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.open = fill_flat_opens(history_df["open"], history_df["high"],
+                                    history_df["low"], history_df["close"])[on_session][order]
+        self.close = history_df["close"].to_numpy(dtype=float)[on_session][order]
+
+        # Session column of each contract's first candle, len(sessions) for contracts without any
+        self.first_col = np.full(len(self.contracts), len(sessions))
+        np.minimum.at(self.first_col, rows[on_session], cols[on_session])
+
+    def column(self, dates):
+        """Session column of each date, -1 where the date is not a session"""
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        cols = np.searchsorted(self.sessions, dates)
+        hit = (cols < len(self.sessions)) & (self.sessions[cols.clip(max=len(self.sessions) - 1)] == dates)
+        return np.where(hit, cols, -1)
+
+    def take(self, values, rows, cols):
+        """values at broadcast contract rows and session columns, NaN where there is no candle"""
+        rows, cols = np.broadcast_arrays(np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64))
+        if not len(self.keys):
+            return np.full(rows.shape, np.nan)
+        keys = rows * len(self.sessions) + cols
+        idx = np.searchsorted(self.keys, keys).clip(max=len(self.keys) - 1)
+        hit = (cols >= 0) & (cols < len(self.sessions)) & (self.keys[idx] == keys)
+        return np.where(hit, values[idx], np.nan)
+
+def replay_sessions(start, end):
+    """Trading sessions between two dates, the as-of days of a replay"""
+    bounds = np.array([start, end], dtype="datetime64[D]")
+    sessions = calendar_for(bounds).sessions
+    return sessions[(sessions >= bounds[0]) & (sessions <= bounds[1])]
+
+def replay_scan(history_df, as_of_dates, horizon=REPLAY_HORIZON_SESSIONS, batch_cells=REPLAY_BATCH_CELLS):
+    """Run the green bullish scan as of every date in batched passes
+
+    Anchor dates for all as-of days come from one vectorized calendar call and the
+    candles are gathered from a CandleGrid, so nothing is re-fetched or re-filtered
+    per day. As-of days are taken in batches of at most batch_cells contract x day
+    cells, each over only the contracts listed and unexpired during the batch. Each
+    signal is scored by the option's return from the close on its as-of day to the
+    close `horizon` sessions later.
+
+    Returns (signals_df, summary_df), summary_df holding the hit rate per as-of day.
+    """
+    as_of = np.asarray(as_of_dates, dtype="datetime64[D]")
+    calendar = calendar_for(np.concatenate([as_of, as_of + np.timedelta64(horizon * 2 + 7, "D")]))
+    grid = CandleGrid(history_df, calendar.sessions)
+
+    anchors = [grid.column(anchor) for anchor in calendar.anchor_dates(as_of)]
+    entry_cols = np.searchsorted(grid.sessions, as_of, side="right") - 1
+    expiry = pd.to_datetime(grid.contracts["expiry"]).values.astype("datetime64[D]")
+
+    batch_size = max(1, batch_cells // max(len(grid.contracts), 1))
+    as_of_idx, contract_idx = [], []
+    for start in range(0, len(as_of), batch_size):
+        days = slice(start, start + batch_size)
+        first_open, first_close, last_open, last_close = (cols[None, days] for cols in anchors)
+        # Only contracts with a candle by the last anchor and still trading on the as-of day can be signalled
+        rows = np.flatnonzero((expiry >= as_of[days].min()) & (grid.first_col <= last_close.max()))
+        matched = green_bullish_mask(
+            grid.take(grid.open, rows[:, None], first_open), grid.take(grid.close, rows[:, None], first_close),
+            grid.take(grid.open, rows[:, None], last_open), grid.take(grid.close, rows[:, None], last_close))
+        matched &= expiry[rows, None] >= as_of[None, days]
+
+        day_idx, row_idx = np.nonzero(matched.T)
+        as_of_idx.append(day_idx + start)
+        contract_idx.append(rows[row_idx])
+    as_of_idx = np.concatenate(as_of_idx or [np.array([], dtype=int)])
+    contract_idx = np.concatenate(contract_idx or [np.array([], dtype=int)])
+
+    signals_df = grid.contracts.iloc[contract_idx].reset_index(drop=True)
+    signals_df.insert(0, "as_of", pd.to_datetime(as_of[as_of_idx]).strftime("%Y-%m-%d"))
+    signals_df["entry_close"] = grid.take(grid.close, contract_idx, entry_cols[as_of_idx])
+    signals_df["exit_close"] = grid.take(grid.close, contract_idx, entry_cols[as_of_idx] + horizon)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        signals_df["forward_return"] = signals_df["exit_close"] / signals_df["entry_close"] - 1
+    signals_df["hit"] = signals_df["forward_return"] > 0
+
+    summary_df = summarize_replay(signals_df)
+    logging.info(f"Replayed {len(as_of)} as-of days over {len(grid.contracts)} contracts: "
+                 f"{len(signals_df)} signals, hit rate {_hit_rate(signals_df):.1%}")
+    return signals_df, summary_df
+
+def summarize_replay(signals_df):
+    """Signals, scored signals, hits and hit rate per as-of day"""
+    scored = signals_df["forward_return"].notna()
+    summary_df = (signals_df.assign(scored=scored, hit=signals_df["hit"] & scored)
+                  .groupby("as_of").agg(signals=("instrument_token", "size"), scored=("scored", "sum"),
+                                        hits=("hit", "sum")).reset_index())
+    summary_df["hit_rate"] = summary_df["hits"] / summary_df["scored"].where(summary_df["scored"] > 0)
+    return summary_df
+
+def _hit_rate(signals_df):
+    scored = signals_df["forward_return"].notna()
+    return (signals_df["hit"] & scored).sum() / scored.sum() if scored.any() else 0.0
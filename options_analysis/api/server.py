@@ -0,0 +1,237 @@
+"""
+Local HTTP/JSON query API over the latest scan: signals, chain analytics and cached candles
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlencode, urlsplit
+import numpy as np
+import pandas as pd
+
+from options_analysis.config.settings import (API_HOST, API_PORT, API_PAGE_SIZE, API_MAX_PAGE_SIZE,
+                                              API_CACHE_ENTRIES, API_CACHE_MAX_AGE)
+
+class BadRequest(ValueError):
+    pass
+
+class NotFound(KeyError):
+    pass
+
+class ResponseCache:
+    """LRU of encoded response bodies, keyed by snapshot version so a new scan never serves stale pages"""
+
+    def __init__(self, entries=API_CACHE_ENTRIES):
+        self.entries = entries
+        self.hits = 0
+        self.misses = 0
+        self._bodies = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._bodies.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._bodies.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body):
+        with self._lock:
+            self._bodies[key] = body
+            self._bodies.move_to_end(key)
+            while len(self._bodies) > self.entries:
+                self._bodies.popitem(last=False)
+
+def _param(query, name, default=None):
+    values = query.get(name)
+    return values[-1] if values else default
+
+def _int_param(query, name, default, minimum=0, maximum=None):
+    value = _param(query, name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise BadRequest(f"{name} must be an integer")
+    if value < minimum:
+        raise BadRequest(f"{name} must be at least {minimum}")
+    return min(value, maximum) if maximum is not None else value
+
+def _bool_param(query, name):
+    value = _param(query, name)
+    if value is None:
+        return None
+    return value.lower() in ("1", "true", "yes")
+
+def page(frame, query, path):
+    """One limit/offset page of a frame plus the total and the next page's link"""
+    limit = _int_param(query, "limit", API_PAGE_SIZE, minimum=1, maximum=API_MAX_PAGE_SIZE)
+    offset = _int_param(query, "offset", 0)
+    items = frame.iloc[offset:offset + limit]
+
+    next_link = None
+    if offset + limit < len(frame):
+        params = {name: values[-1] for name, values in query.items()}
+        params.update(offset=offset + limit, limit=limit)
+        next_link = path + "?" + urlencode(sorted(params.items()))
+    return {"total": len(frame), "offset": offset, "limit": limit, "next": next_link,
+            # to_json writes NaN as null and numpy scalars without a per-row Python conversion
+            "items": json.loads(items.to_json(orient="records", date_format="iso")) if len(items) else []}
+
+def _rows(frame, by_name, names):
+    """Rows of the given underlyings through the per-name position index"""
+    if not names:
+        return frame
+    positions = [by_name[name] for name in names if name in by_name]
+    return frame.iloc[np.sort(np.concatenate(positions))] if positions else frame.iloc[:0]
+
+def _names(query):
+    names = _param(query, "name")
+    return [name.strip().upper() for name in names.split(",") if name.strip()] if names else None
+
+def get_health(snapshot, query, path):
+    return {"version": snapshot.version, "updated": datetime.fromtimestamp(snapshot.updated).isoformat(timespec="seconds"),
+            "signals": len(snapshot.results), "chains": len(snapshot.chains), "contracts": len(snapshot.candles)}
+
+def get_signals(snapshot, query, path):
+    """Scored pattern results, best first unless sort says otherwise"""
+    signals = _rows(snapshot.results, snapshot.results_by_name, _names(query))
+    option_type = _param(query, "option_type")
+    if option_type:
+        signals = signals[signals["option_type"] == option_type.upper()]
+    oi_confirmed = _bool_param(query, "oi_confirmed")
+    if oi_confirmed is not None and "oi_confirmed" in signals.columns:
+        signals = signals[signals["oi_confirmed"].fillna(False).astype(bool) == oi_confirmed]
+
+    sort = _param(query, "sort")
+    if sort:
+        column = sort.lstrip("-")
+        if column not in signals.columns:
+            raise BadRequest(f"Unknown sort column {column}")
+        signals = signals.sort_values(column, ascending=not sort.startswith("-"), kind="stable")
+    return page(signals, query, path)
+
+def get_chains(snapshot, query, path):
+    """Chain analytics per underlying and expiry"""
+    chains = _rows(snapshot.chains, snapshot.chains_by_name, _names(query))
+    expiry = _param(query, "expiry")
+    if expiry:
+        chains = chains[chains["expiry"] == pd.to_datetime(expiry).strftime("%Y-%m-%d")]
+    return page(chains, query, path)
+
+def get_chain(snapshot, query, path, name):
+    """One underlying's filtered contracts with their latest candle, by expiry and strike"""
+    name = name.upper()
+    if name not in snapshot.latest_by_name and name not in snapshot.chains_by_name:
+        raise NotFound(f"No chain for {name}")
+    contracts = _rows(snapshot.latest, snapshot.latest_by_name, [name])
+    expiry = _param(query, "expiry")
+    if expiry:
+        contracts = contracts[contracts["expiry"] == pd.to_datetime(expiry).strftime("%Y-%m-%d")]
+    option_type = _param(query, "option_type")
+    if option_type:
+        contracts = contracts[contracts["option_type"] == option_type.upper()]
+    contracts = contracts.sort_values(["expiry", "strike", "option_type"], kind="stable")
+
+    body = page(contracts, query, path)
+    body["analytics"] = json.loads(_rows(snapshot.chains, snapshot.chains_by_name, [name])
+                                   .to_json(orient="records"))
+    return body
+
+def get_candles(snapshot, query, path, token):
+    """A contract's cached candles, optionally between start and end"""
+    try:
+        view = snapshot.candles.view_token(int(token))
+    except (KeyError, ValueError):
+        raise NotFound(f"No candles for instrument {token}")
+    candles = pd.DataFrame(view.columns)
+    start, end = _param(query, "start"), _param(query, "end")
+    # Dates are ISO strings, so string comparison is date order, "~" sorts after an intraday time
+    if start:
+        candles = candles[candles["date"] >= start]
+    if end:
+        candles = candles[candles["date"] <= end + "~"]
+    body = page(candles, query, path)
+    body["contract"] = json.loads(view.contract.drop("first_seen").to_json(date_format="iso"))
+    return body
+
+ROUTES = {"/health": get_health, "/signals": get_signals, "/chains": get_chains}
+PREFIX_ROUTES = {"/chains/": get_chain, "/candles/": get_candles}
+
+def route(path):
+    if path in ROUTES:
+        return ROUTES[path], ()
+    for prefix, handler in PREFIX_ROUTES.items():
+        if path.startswith(prefix) and len(path) > len(prefix):
+            return handler, (unquote(path[len(prefix):]),)
+    raise NotFound(f"Unknown path {path}")
+
+def make_handler(data, cache):
+    class QueryHandler(BaseHTTPRequestHandler):
+        server_version = "OptionsAnalysisAPI"
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            path = url.path.rstrip("/") or "/"
+            query = parse_qs(url.query)
+            snapshot = data.current()
+            key = (snapshot.version, path, tuple(sorted((k, tuple(v)) for k, v in query.items())))
+
+            status, body = 200, cache.get(key)
+            if body is None:
+                try:
+                    handler, args = route(path)
+                    body = json.dumps(handler(snapshot, query, path, *args), default=str).encode()
+                    cache.put(key, body)
+                except BadRequest as e:
+                    status, body = 400, json.dumps({"error": str(e)}).encode()
+                except NotFound as e:
+                    status, body = 404, json.dumps({"error": e.args[0]}).encode()
+                except Exception as e:
+                    logging.error(f"API request {self.path} failed: {e}")
+                    status, body = 500, json.dumps({"error": "internal error"}).encode()
+
+            etag = f'"{snapshot.version}-{hashlib.md5(body).hexdigest()[:16]}"'
+            if status == 200 and self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if status == 200:
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", f"max-age={API_CACHE_MAX_AGE}")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logging.debug(f"API {self.address_string()} {format % args}")
+
+    return QueryHandler
+
+def serve(data, host=API_HOST, port=API_PORT, background=False):
+    """Serve a ScanData over HTTP, in a daemon thread when background is set"""
+    server = ThreadingHTTPServer((host, port), make_handler(data, ResponseCache()))
+    server.daemon_threads = True
+    logging.info(f"Query API listening on http://{host}:{server.server_port}")
+    if background:
+        threading.Thread(target=server.serve_forever, name="query-api", daemon=True).start()
+        return server
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Query API stopped")
+    finally:
+        server.server_close()
+    return server
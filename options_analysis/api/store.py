@@ -0,0 +1,114 @@
+"""
+In-memory snapshot of the latest scan served by the query API
+"""
+
+import glob
+import logging
+import os
+import threading
+import time
+import pandas as pd
+
+from options_analysis.config.settings import API_RELOAD_SECONDS
+from options_analysis.data.candle_store import CandleStore
+
+RESULT_DATE_COLUMNS = ["run_date", "expiry", "as_of"]
+CANDLE_COLUMNS = ["instrument_token", "date", "open", "high", "low", "close", "volume", "oi",
+                  "expiry", "name", "strike", "option_type", "underlying_price"]
+
+def _latest(directory, pattern):
+    paths = glob.glob(os.path.join(directory, pattern))
+    return max(paths, key=os.path.getmtime) if paths else None
+
+class Snapshot:
+    """One immutable set of results, chains and candles with its lookup indexes"""
+
+    def __init__(self, results=None, chains=None, candles=None, version=0):
+        self.version = version
+        self.updated = time.time()
+
+        self.results = (results if results is not None else pd.DataFrame()).reset_index(drop=True)
+        for column in RESULT_DATE_COLUMNS:
+            if column in self.results.columns:
+                self.results[column] = pd.to_datetime(self.results[column]).dt.strftime("%Y-%m-%d")
+        if "score" in self.results.columns:
+            self.results = self.results.sort_values("score", ascending=False, kind="stable", ignore_index=True)
+
+        self.chains = (chains if chains is not None else pd.DataFrame()).reset_index(drop=True)
+        if "expiry" in self.chains.columns:
+            self.chains["expiry"] = pd.to_datetime(self.chains["expiry"]).dt.strftime("%Y-%m-%d")
+
+        candles = candles if candles is not None else pd.DataFrame(columns=["instrument_token", "date"])
+        candles = candles.dropna(subset=["date"])
+        self.candles = CandleStore(candles)
+        self.latest = candles.sort_values(["instrument_token", "date"]).drop_duplicates("instrument_token", keep="last")
+        if "expiry" in self.latest.columns:
+            self.latest = self.latest.assign(expiry=pd.to_datetime(self.latest["expiry"]).dt.strftime("%Y-%m-%d"))
+
+        # Row positions per underlying, so filtered queries never scan the whole table
+        self.results_by_name = self._positions(self.results)
+        self.chains_by_name = self._positions(self.chains)
+        self.latest_by_name = self._positions(self.latest.reset_index(drop=True))
+        self.latest = self.latest.reset_index(drop=True)
+
+    @staticmethod
+    def _positions(frame):
+        if "name" not in frame.columns or frame.empty:
+            return {}
+        return {name: rows for name, rows in frame.groupby("name", sort=False).indices.items()}
+
+class ScanData:
+    """The latest Snapshot, swapped atomically when a scan finishes or its files change on disk"""
+
+    def __init__(self, directory=None, reload_seconds=API_RELOAD_SECONDS):
+        self.directory = directory
+        self.reload_seconds = reload_seconds
+        self.snapshot = Snapshot()
+        self._lock = threading.Lock()
+        # Separate from _lock, which reload takes through update
+        self._reload_lock = threading.Lock()
+        self._checked = 0
+        self._sources = None
+
+    def update(self, results=None, chains=None, candles=None):
+        """Publish a new scan, readers holding the previous snapshot keep using it"""
+        with self._lock:
+            self.snapshot = Snapshot(results, chains, candles, self.snapshot.version + 1)
+        logging.info(f"API data updated to version {self.snapshot.version}: {len(self.snapshot.results)} signals, "
+                     f"{len(self.snapshot.chains)} chains, {len(self.snapshot.candles)} contracts")
+
+    def current(self):
+        """Latest snapshot, reloading the scan artifacts of a standalone server when they changed"""
+        if self.directory is not None and time.monotonic() - self._checked >= self.reload_seconds:
+            # Requests arrive on server threads, only one of them checks and reloads
+            with self._reload_lock:
+                if time.monotonic() - self._checked >= self.reload_seconds:
+                    self._checked = time.monotonic()
+                    self.reload()
+        return self.snapshot
+
+    def _artifacts(self):
+        results = [path for path in (os.path.join(self.directory, f"{option_type}_Analysis.parquet")
+                                     for option_type in ("CE", "PE")) if os.path.exists(path)]
+        chains = _latest(self.directory, "zerodha_NFO_chain_analytics_*.csv")
+        candles = _latest(self.directory, "zerodha_NFO_filtered_*_daily_OHLC_*.csv")
+        return results, chains, candles
+
+    def reload(self):
+        """Load the newest scan artifacts of the directory if any of them changed"""
+        results, chains, candles = self._artifacts()
+        paths = [path for path in results + [chains, candles] if path]
+        sources = [(path, os.path.getmtime(path)) for path in paths]
+        if sources == self._sources:
+            return False
+
+        import pyarrow.parquet as pq
+        from options_analysis.data.artifacts import read_ohlc_artifact
+
+        results_df = pd.concat([pq.read_table(path).to_pandas() for path in results], ignore_index=True) \
+            if results else None
+        chains_df = pd.read_csv(chains) if chains else None
+        candles_df = read_ohlc_artifact(candles, columns=CANDLE_COLUMNS) if candles else None
+        self.update(results_df, chains_df, candles_df)
+        self._sources = sources
+        return True
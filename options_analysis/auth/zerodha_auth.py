@@ -7,15 +7,7 @@ import time
 import urllib.parse as urlparse
 import os
 
-import pyotp
-from dotenv import load_dotenv, find_dotenv
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.wait import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from kiteconnect import KiteConnect
+from dotenv import load_dotenv, find_dotenv, dotenv_values
 
 from options_analysis.config.settings import get_chrome_options
 
@@ -24,15 +16,16 @@ load_dotenv(find_dotenv())
 
 
 class ZerodhaAuthenticator:
-    def __init__(self):
-        # Read credentials at runtime from environment variables
-        self.ZERODHA_KEY = os.getenv("ZERODHA_KEY")
-        self.ZERODHA_SECRET = os.getenv("ZERODHA_SECRET")
-        self.ZERODHA_USER = os.getenv("ZERODHA_USER")
-        self.ZERODHA_PASSWORD = os.getenv("ZERODHA_PASSWORD")
-        self.ZERODHA_TOTP_SECRET = os.getenv("ZERODHA_TOTP_SECRET")
-
-        logging.info("Loading credentials from environment variables...")
+    def __init__(self, env_file=None):
+        # Read credentials at runtime from environment variables, or from a worker's own env file
+        env = {**os.environ, **dotenv_values(env_file)} if env_file else os.environ
+        self.ZERODHA_KEY = env.get("ZERODHA_KEY")
+        self.ZERODHA_SECRET = env.get("ZERODHA_SECRET")
+        self.ZERODHA_USER = env.get("ZERODHA_USER")
+        self.ZERODHA_PASSWORD = env.get("ZERODHA_PASSWORD")
+        self.ZERODHA_TOTP_SECRET = env.get("ZERODHA_TOTP_SECRET")
+
+        logging.info(f"Loading credentials from {env_file or 'environment variables'}...")
         logging.info(f"ZERODHA_KEY: {'SET' if self.ZERODHA_KEY else 'NOT SET'}")
         logging.info(f"ZERODHA_SECRET: {'SET' if self.ZERODHA_SECRET else 'NOT SET'}")
         logging.info(f"ZERODHA_USER: {'SET' if self.ZERODHA_USER else 'NOT SET'}")
@@ -51,6 +44,7 @@ class ZerodhaAuthenticator:
 
         logging.info("✅ Credentials loaded successfully")
 
+        from kiteconnect import KiteConnect
         self.kite = KiteConnect(api_key=self.ZERODHA_KEY)
         self.access_token = None
 
@@ -71,6 +65,10 @@ class ZerodhaAuthenticator:
     def _initialize_webdriver(self):
         """Initialize and return Chrome WebDriver"""
         logging.info("Initializing Chrome WebDriver...")
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from webdriver_manager.chrome import ChromeDriverManager
+
         try:
             driver = webdriver.Chrome(
                 service=Service(ChromeDriverManager().install()),
@@ -84,6 +82,11 @@ class ZerodhaAuthenticator:
     
     def _perform_login(self, driver):
         """Perform login and return request token"""
+        import pyotp
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.wait import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
         try:
             logging.info(self.kite.login_url())
             driver.get(self.kite.login_url())
@@ -0,0 +1,230 @@
+"""
+Batch candlestick charts of flagged contracts, rendered in worker processes with an index page
+"""
+
+import html
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from options_analysis.config.settings import CHART_DIR, CHART_FORMATS, CHART_MAX_POINTS, CHART_WORKERS
+
+SVG_WIDTH = 960
+SVG_HEIGHT = 480
+SVG_MARGIN = 50
+# Share of the plot height given to the volume bars under the candles
+SVG_VOLUME_SHARE = 0.2
+
+def downsample_ohlc(columns, max_points=CHART_MAX_POINTS):
+    """Merge consecutive candles into at most max_points OHLC buckets
+
+    A bucket opens at its first candle's open and date, closes at its last candle's
+    close and spans their full high/low range, so the chart keeps every extreme.
+    """
+    count = len(columns["date"])
+    if count <= max_points:
+        return columns
+    starts = np.arange(0, count, -(-count // max_points))
+    ends = np.append(starts[1:], count) - 1
+
+    merged = {"date": columns["date"][starts], "open": columns["open"][starts], "close": columns["close"][ends],
+              "high": np.fmax.reduceat(columns["high"], starts), "low": np.fmin.reduceat(columns["low"], starts)}
+    if "volume" in columns:
+        merged["volume"] = np.add.reduceat(np.nan_to_num(columns["volume"]), starts)
+    if "oi" in columns:
+        merged["oi"] = columns["oi"][ends]
+    return merged
+
+def candlestick_figure(dates, opens, highs, lows, closes, marker_dates=(), marker_closes=(),
+                       title="Bullish Engulfing Pattern Detection", marker_name="Bullish Engulfing"):
+    """Plotly candlestick figure with the pattern candles marked, shared with utility.create_chart"""
+    import plotly.graph_objects as go
+
+    fig = go.Figure(data=[
+        go.Candlestick(x=dates, open=opens, high=highs, low=lows, close=closes,
+                       increasing_line_color="green", decreasing_line_color="red", name="Price")
+    ])
+    fig.add_trace(go.Scatter(x=marker_dates, y=marker_closes, mode="markers",
+                             marker=dict(size=12, color="blue", symbol="triangle-up"), name=marker_name))
+    fig.update_layout(title=title, xaxis_title="Date", yaxis_title="Price", xaxis_rangeslider_visible=False)
+    return fig
+
+def svg_chart(columns, marker_dates, title):
+    """Self-contained HTML page with an inline SVG candlestick chart, used when plotly is not installed"""
+    count = len(columns["date"])
+    plot_width = SVG_WIDTH - 2 * SVG_MARGIN
+    plot_height = SVG_HEIGHT - 2 * SVG_MARGIN
+    price_height = plot_height * (1 - SVG_VOLUME_SHARE)
+
+    low, high = np.nanmin(columns["low"]), np.nanmax(columns["high"])
+    span = (high - low) or 1.0
+    step = plot_width / max(count, 1)
+    x = SVG_MARGIN + step * (np.arange(count) + 0.5)
+
+    def y(price):
+        return SVG_MARGIN + (high - price) / span * price_height
+
+    shapes = []
+    for i in range(count):
+        color = "green" if columns["close"][i] >= columns["open"][i] else "red"
+        top, bottom = y(max(columns["open"][i], columns["close"][i])), y(min(columns["open"][i], columns["close"][i]))
+        shapes.append(f'<line x1="{x[i]:.1f}" y1="{y(columns["high"][i]):.1f}" x2="{x[i]:.1f}" '
+                      f'y2="{y(columns["low"][i]):.1f}" stroke="{color}"/>'
+                      f'<rect x="{x[i] - step * 0.35:.1f}" y="{top:.1f}" width="{step * 0.7:.1f}" '
+                      f'height="{max(bottom - top, 1):.1f}" fill="{color}"><title>{html.escape(str(columns["date"][i]))} '
+                      f'O {columns["open"][i]:.2f} H {columns["high"][i]:.2f} L {columns["low"][i]:.2f} '
+                      f'C {columns["close"][i]:.2f}</title></rect>')
+
+    if "volume" in columns and np.nanmax(columns["volume"], initial=0) > 0:
+        volume_scale = plot_height * SVG_VOLUME_SHARE / np.nanmax(columns["volume"])
+        for i in range(count):
+            bar = np.nan_to_num(columns["volume"][i]) * volume_scale
+            shapes.append(f'<rect x="{x[i] - step * 0.35:.1f}" y="{SVG_MARGIN + plot_height - bar:.1f}" '
+                          f'width="{step * 0.7:.1f}" height="{bar:.1f}" fill="#bbb"/>')
+
+    # A marker on a merged bucket points at the bucket holding its date
+    for marker in np.searchsorted(columns["date"], np.asarray(marker_dates, dtype=str), side="right") - 1:
+        if 0 <= marker < count:
+            shapes.append(f'<path d="M{x[marker]:.1f},{y(columns["low"][marker]) + 6:.1f} l-6,12 h12 z" fill="blue"/>')
+
+    labels = [f'<text x="{SVG_MARGIN - 5}" y="{y(price) + 4:.1f}" text-anchor="end" font-size="11">{price:.2f}</text>'
+              for price in (high, (high + low) / 2, low)]
+    labels += [f'<text x="{x[i]:.1f}" y="{SVG_HEIGHT - SVG_MARGIN + 15}" text-anchor="middle" font-size="11">'
+               f'{html.escape(str(columns["date"][i])[:10])}</text>' for i in sorted({0, count // 2, count - 1}) if count]
+
+    return (f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(title)}</title></head><body>"
+            f"<h3>{html.escape(title)}</h3><svg xmlns='http://www.w3.org/2000/svg' width='{SVG_WIDTH}' "
+            f"height='{SVG_HEIGHT}'>{''.join(shapes)}{''.join(labels)}</svg></body></html>")
+
+def render_chart(job):
+    """Render one contract's chart in every requested format, returns its timing for the manifest"""
+    started = time.perf_counter()
+    columns = downsample_ohlc(job["columns"], job["max_points"])
+    # Markers sit on the signal candles' own close, not on their merged bucket's
+    rows = np.searchsorted(job["columns"]["date"], np.asarray(job["marker_dates"], dtype=str))
+    rows = rows[rows < len(job["columns"]["date"])]
+    marker_dates, marker_closes = job["columns"]["date"][rows], job["columns"]["close"][rows]
+    base = os.path.join(job["out_dir"], job["file_stem"])
+
+    if job["renderer"] == "plotly":
+        fig = candlestick_figure(columns["date"], columns["open"], columns["high"], columns["low"], columns["close"],
+                                 marker_dates, marker_closes, job["title"], "Signal")
+        if "html" in job["formats"]:
+            # Every page loads the one plotly.min.js render_charts wrote next to them
+            fig.write_html(base + ".html", include_plotlyjs="plotly.min.js")
+        if "png" in job["formats"]:
+            fig.write_image(base + ".png")
+    else:
+        with open(base + ".html", "w", encoding="utf-8") as chart_file:
+            chart_file.write(svg_chart(columns, marker_dates, job["title"]))
+
+    return {"instrument_token": job["instrument_token"], "file": job["file_stem"] + ".html",
+            "candles": len(job["columns"]["date"]), "points": len(columns["date"]),
+            "render_ms": (time.perf_counter() - started) * 1000}
+
+def _file_stem(contract):
+    stem = f"{contract['name']}_{contract['expiry']}_{contract['strike']:g}{contract['option_type']}_" \
+           f"{contract['instrument_token']}"
+    return re.sub(r"[^A-Za-z0-9_.-]", "-", stem)
+
+def chart_renderer(formats):
+    """plotly when it is installed, otherwise the built-in SVG pages (HTML only)"""
+    try:
+        import plotly  # noqa: F401
+        return "plotly"
+    except ImportError:
+        if set(formats) - {"html"}:
+            logging.warning(f"plotly is not installed, charts are written as HTML/SVG only instead of {formats}")
+        return "svg"
+
+def check_png_support():
+    """Fail before rendering anything when plotly can't write PNGs (its image export needs kaleido)"""
+    try:
+        import kaleido  # noqa: F401
+    except ImportError:
+        raise RuntimeError("PNG charts need the kaleido package: pip install kaleido, or leave png out of --formats")
+
+def render_charts(store, results, out_dir=CHART_DIR, formats=CHART_FORMATS, max_points=CHART_MAX_POINTS,
+                  workers=CHART_WORKERS):
+    """Chart every flagged contract of results from the candle store, plus index.html and manifest.csv
+
+    Each contract's candles are a zero-copy slice of the store, so a job pickles only
+    that contract's arrays. Charts render in a process pool and each records how long
+    it took, the index lists them best scored first with those timings.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    renderer = chart_renderer(formats)
+    if renderer == "plotly" and "png" in formats:
+        check_png_support()
+    if renderer == "plotly" and "html" in formats:
+        from plotly.offline import get_plotlyjs
+
+        with open(os.path.join(out_dir, "plotly.min.js"), "w", encoding="utf-8") as bundle:
+            bundle.write(get_plotlyjs())
+
+    if "score" in results.columns:
+        results = results.sort_values("score", ascending=False, kind="stable")
+    jobs, skipped = [], 0
+    for result in results.drop_duplicates("instrument_token").to_dict("records"):
+        try:
+            view = store.view_token(result["instrument_token"])
+        except KeyError:
+            skipped += 1
+            continue
+        contract = dict(view.contract)
+        contract["expiry"] = pd.to_datetime(contract["expiry"]).strftime("%Y-%m-%d")
+        as_of = result.get("as_of")
+        jobs.append({"instrument_token": result["instrument_token"], "columns": view.columns,
+                     "marker_dates": [pd.to_datetime(as_of).strftime("%Y-%m-%d")] if pd.notna(as_of) else [],
+                     "title": f"{contract['name']} {contract['expiry']} {contract['strike']:g} {contract['option_type']}",
+                     "file_stem": _file_stem(contract), "out_dir": out_dir, "formats": formats,
+                     "max_points": max_points, "renderer": renderer})
+    if skipped:
+        logging.warning(f"No candles for {skipped} flagged contracts, they are not charted")
+
+    started = time.perf_counter()
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            timings = list(pool.map(render_chart, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    else:
+        timings = [render_chart(job) for job in jobs]
+    elapsed = time.perf_counter() - started
+
+    manifest = pd.DataFrame(timings, columns=["instrument_token", "file", "candles", "points", "render_ms"])
+    index_columns = [c for c in ["name", "strike", "expiry", "option_type", "as_of", "pct_move", "score", "buildup"]
+                     if c in results.columns]
+    manifest = manifest.merge(results.drop_duplicates("instrument_token")[["instrument_token"] + index_columns],
+                              on="instrument_token", how="left")
+    manifest.to_csv(os.path.join(out_dir, "manifest.csv"), index=False)
+    write_index(manifest, os.path.join(out_dir, "index.html"), elapsed, workers)
+
+    if len(manifest):
+        logging.info(f"Rendered {len(manifest)} {renderer} charts into {out_dir} in {elapsed:.2f} s with {workers} "
+                     f"processes: {manifest['render_ms'].median():.1f} ms median, "
+                     f"{manifest['render_ms'].quantile(0.95):.1f} ms p95, {manifest['render_ms'].max():.1f} ms max")
+    return manifest
+
+def write_index(manifest, path, elapsed, workers):
+    """index.html linking every chart with its render time"""
+    table = pd.DataFrame({"Contract": [
+        f'<a href="{html.escape(row.file)}">{html.escape(f"{row.name} {row.strike:g} {row.option_type}")}</a>'
+        for row in manifest.itertuples()]})
+    for column in ["expiry", "as_of", "pct_move", "score", "buildup"]:
+        if column in manifest.columns:
+            values = manifest[column].round(2) if manifest[column].dtype.kind == "f" else manifest[column]
+            table[column] = values.astype(str).map(html.escape).replace({"nan": "", "None": ""})
+    table["candles"], table["points"] = manifest["candles"], manifest["points"]
+    table["render ms"] = manifest["render_ms"].round(1)
+    with open(path, "w", encoding="utf-8") as index_file:
+        index_file.write(
+            "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Flagged contracts</title></head><body>"
+            f"<h3>{len(manifest)} flagged contracts</h3><p>Rendered in {elapsed:.2f} s by {workers} processes, "
+            f"{manifest['render_ms'].sum() / 1000:.2f} s of chart time</p><table border='1' cellspacing='0'>"
+            "<tr>" + "".join(f"<th>{h}</th>" for h in table.columns) + "</tr>"
+            + "".join("<tr>" + "".join(f"<td>{cell}</td>" for cell in row) + "</tr>" for row in table.itertuples(index=False))
+            + "</table></body></html>")
@@ -4,6 +4,160 @@ Application settings and configuration
 
 import logging
 
+# Rows read per chunk when re-analyzing saved OHLC artifacts
+ARTIFACT_CHUNK_ROWS = 500_000
+
+# As-of replay: default date range and how many sessions after the signal it is scored on
+REPLAY_LOOKBACK_DAYS = 365
+REPLAY_HORIZON_SESSIONS = 5
+# As-of days are replayed in batches whose contract x day matrices hold at most this many cells
+REPLAY_BATCH_CELLS = 2 ** 22
+
+# OI change is measured over this many sessions, one week like the weekly pattern;
+# with OI_CONFIRMED_ONLY only patterns backed by a long buildup are written
+OI_CHANGE_SESSIONS = 5
+OI_CONFIRMED_ONLY = False
+
+# Chain analytics build a strike x strike payoff matrix per chain; chains are batched so a
+# batch's padded matrices hold at most this many cells
+CHAIN_BATCH_CELLS = 2 ** 22
+
+# Scored signal output: the best matches overall and per underlying. The score is a weighted
+# sum of the match metrics (% move, OI change %, log10 volume, IV %), missing metrics count as 0
+SIGNAL_TOP_K = 25
+SIGNAL_TOP_PER_UNDERLYING = 3
+SIGNAL_SCORE_WEIGHTS = {"pct_move": 1.0, "oi_change_pct": 0.5, "log_volume": 5.0, "iv": -0.1}
+# Annual risk free rate used to back out implied volatility
+RISK_FREE_RATE = 0.065
+
+# Index underlyings scanned next to stocklist.symbols, mapped to their NSE LTP symbol
+INDEX_LTP_SYMBOLS = {
+    "NIFTY": "NIFTY 50",
+    "BANKNIFTY": "NIFTY BANK",
+    "FINNIFTY": "NIFTY FIN SERVICE",
+}
+
+# Expiries analyzed per underlying: "weekly" (nearest), "near" (near-month), "next" (next-month)
+STOCK_EXPIRIES = ["near", "next"]
+INDEX_EXPIRIES = ["weekly", "near", "next"]
+
+# A near-month expiry closer than this many days rolls over to the following month
+EXPIRY_MIN_DAYS = 10
+
+# Strikes fetched per underlying/expiry: "all" OTM strikes, "atm" (nearest N),
+# "moneyness" (within a % band of the LTP) or "min_oi" (quote snapshot OI cutoff)
+STRIKE_WINDOW = "all"
+STRIKE_WINDOW_STRIKES = 10
+STRIKE_WINDOW_BAND_PCT = 10.0
+STRIKE_WINDOW_MIN_OI = 1
+
+# Kite quote accepts up to 500 instruments per call
+QUOTE_BATCH_SIZE = 500
+
+# Drop contracts with zero volume and OI before fetching candles. Judged from one bulk quote snapshot,
+# so a contract that traded earlier in the lookback but is dead today loses its history too
+LIQUIDITY_PREFILTER = True
+
+# Fetched tokens are journaled here (one directory per run date) so --resume can continue a failed run
+CHECKPOINT_DIR = "checkpoints"
+CHECKPOINT_FLUSH_TOKENS = 100
+
+# Every scan's daily candles are also added to this archive (underlying=/expiry= partitions) for backtests
+ARCHIVE_DIR = "archive"
+ARCHIVE_HISTORY = True
+
+# Pattern results are written as a typed Parquet table (the text file is rendered from it, JSON
+# Lines optional) and each scan's table is also kept under RESULTS_DIR/run_date=YYYY-MM-DD/
+RESULT_JSON_LINES = True
+RESULTS_DIR = "results"
+
+# Distributed scan: shards of the underlyings are handed to workers through a spool directory
+DISTRIBUTED_SPOOL_DIR = "spool"
+DISTRIBUTED_WORKERS = 2
+DISTRIBUTED_POLL_SECONDS = 2
+DISTRIBUTED_MAX_ATTEMPTS = 3
+
+# Daemon mode: scan at these IST times on trading days and/or every N minutes while the market is open
+DAEMON_RUN_TIMES = ["15:45"]
+DAEMON_INTERVAL_MINUTES = None
+MARKET_OPEN = "09:15"
+MARKET_CLOSE = "15:30"
+
+# Local query API over the latest scan results, chains and candles
+API_HOST = "127.0.0.1"
+API_PORT = 8765
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+API_CACHE_ENTRIES = 512
+API_CACHE_MAX_AGE = 15
+# A standalone server checks the scan artifacts for changes at most this often
+API_RELOAD_SECONDS = 5
+
+# Batch charts of flagged contracts, long histories are merged into at most CHART_MAX_POINTS candles
+CHART_DIR = "charts"
+CHART_FORMATS = ["html"]
+CHART_MAX_POINTS = 400
+# Render processes, None uses every CPU
+CHART_WORKERS = None
+# Days of archived history charted with --archive
+CHART_HISTORY_DAYS = 365
+
+# Pooled HTTP session and on-disk response cache used by the NSE/Zerodha scraping helpers
+HTTP_CACHE_DIR = ".http_cache"
+HTTP_POOL_SIZE = 10
+HTTP_TIMEOUT = 10
+HTTP_USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+                   "Chrome/114.0.0.0 Safari/537.36")
+NSE_HOLIDAY_TTL = 24 * 60 * 60
+NSE_QUOTE_TTL = 30
+
+# Parsed holiday tables, one CSV per source and year. Tables parsed from a holiday sheet are
+# reparsed when the sheet changes, downloaded ones are fetched again after HOLIDAY_CACHE_TTL seconds
+HOLIDAY_CACHE_DIR = ".holiday_cache"
+HOLIDAY_CACHE_TTL = 7 * 24 * 60 * 60
+# A calendar built without some year's holidays (failed fetch, unpublished year) is rebuilt after this many seconds
+HOLIDAY_RETRY_SECONDS = 10 * 60
+
+# Underlying LTPs are fetched in bulk and reused for this many seconds
+UNDERLYING_PRICE_TTL = 60
+UNDERLYING_PRICE_SOURCE = "kite"
+KITE_LTP_BATCH_SIZE = 1000
+
+# Kite allows 3 historical_data requests per second
+HISTORICAL_RATE_LIMIT = 3
+FETCH_WORKERS = 3
+
+# Candle interval and how far back the scan fetches
+OHLC_INTERVAL = "day"
+OHLC_LOOKBACK_DAYS = 20
+# Longest date range Kite serves in one historical_data call, per interval
+HISTORICAL_CHUNK_DAYS = {
+    "minute": 60,
+    "3minute": 100,
+    "5minute": 100,
+    "10minute": 100,
+    "15minute": 200,
+    "30minute": 200,
+    "60minute": 400,
+    "day": 2000,
+}
+INTERVAL_ALIASES = {"hour": "60minute", "1minute": "minute", "daily": "day"}
+
+# Requests per second allowed per Kite endpoint, used by the shared KiteClient
+KITE_RATE_LIMITS = {
+    "historical_data": 3,
+    "quote": 1,
+    "ohlc": 1,
+    "ltp": 1,
+    "instruments": 10,
+    "profile": 10,
+}
+# Concurrency window per endpoint grows while calls are fast and halves on a 429
+KITE_MAX_CONCURRENCY = 3
+KITE_LATENCY_TARGET = 2.0
+KITE_RETRY_ATTEMPTS = 5
+KITE_RETRY_BACKOFF = 1.0
+
 # Configure logging
 def setup_logging():
     logging.basicConfig(
@@ -0,0 +1,37 @@
+"""
+Daemon loop: sleeps until each scheduled time and runs the scan with state kept warm in between
+"""
+
+import logging
+import time
+
+from options_analysis.daemon.schedule import now_ist
+
+# Sleep in short steps so a suspended host or clock change does not oversleep a run
+MAX_SLEEP_SECONDS = 60
+
+def run_daemon(schedule, scan_once, run_now=False, max_runs=None, clock=now_ist, sleep=time.sleep):
+    """Call scan_once(run_at) at every scheduled time until max_runs scans have run
+
+    A failing scan is logged and the daemon waits for the next time, the state
+    scan_once keeps (session, caches) decides what a retry has to redo.
+    """
+    runs = 0
+    run_at = clock() if run_now else schedule.next_run(clock())
+
+    while max_runs is None or runs < max_runs:
+        logging.info(f"Next scan at {run_at:%Y-%m-%d %H:%M} IST")
+        while (wait := (run_at - clock()).total_seconds()) > 0:
+            sleep(min(wait, MAX_SLEEP_SECONDS))
+
+        started = time.monotonic()
+        try:
+            scan_once(run_at)
+            logging.info(f"Scan for {run_at:%Y-%m-%d %H:%M} finished in {time.monotonic() - started:.1f}s")
+        except Exception as e:
+            logging.error(f"Scan for {run_at:%Y-%m-%d %H:%M} failed: {e}")
+        runs += 1
+        run_at = schedule.next_run(max(run_at, clock()))
+
+    logging.info(f"Daemon stopping after {runs} scans")
+    return runs
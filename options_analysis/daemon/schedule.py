@@ -0,0 +1,59 @@
+"""
+Scan schedule of the daemon: fixed times and/or a fixed interval while the market is open, trading days only
+"""
+
+from datetime import datetime, timedelta
+
+import pytz
+
+from options_analysis.config.settings import DAEMON_RUN_TIMES, DAEMON_INTERVAL_MINUTES, MARKET_OPEN, MARKET_CLOSE
+from options_analysis.utils.trading_calendar import calendar_for
+
+# Longer than any run of exchange holidays plus weekends
+MAX_DAYS_WITHOUT_SESSION = 15
+
+def now_ist():
+    """Current India time as a naive datetime, the schedule's clock"""
+    return datetime.now(pytz.timezone('Asia/Kolkata')).replace(tzinfo=None)
+
+def parse_time(value):
+    return datetime.strptime(value, "%H:%M").time()
+
+class ScanSchedule:
+    """When the daemon scans: the given times and every N minutes from market open to close"""
+
+    def __init__(self, times=DAEMON_RUN_TIMES, every_minutes=DAEMON_INTERVAL_MINUTES,
+                 market_open=MARKET_OPEN, market_close=MARKET_CLOSE):
+        self.times = sorted(parse_time(t) for t in times or [])
+        self.every_minutes = every_minutes
+        self.market_open = parse_time(market_open)
+        self.market_close = parse_time(market_close)
+        if not self.times and not every_minutes:
+            raise ValueError("A scan schedule needs run times or an interval")
+
+    def day_times(self, day):
+        """Scan times of one day, none on weekends and exchange holidays"""
+        if not calendar_for(day).is_session(day):
+            return []
+
+        times = {datetime.combine(day, t) for t in self.times}
+        if self.every_minutes:
+            run_at = datetime.combine(day, self.market_open)
+            while run_at.time() <= self.market_close:
+                times.add(run_at)
+                run_at += timedelta(minutes=self.every_minutes)
+        return sorted(times)
+
+    def next_run(self, after):
+        """First scan time strictly after a datetime"""
+        day = after.date()
+        for _ in range(MAX_DAYS_WITHOUT_SESSION):
+            for run_at in self.day_times(day):
+                if run_at > after:
+                    return run_at
+            day += timedelta(days=1)
+        raise RuntimeError(f"No trading session within {MAX_DAYS_WITHOUT_SESSION} days of {after:%Y-%m-%d}")
+
+    def after_close(self, run_at):
+        """Whether a scan at run_at sees the session's final daily candles"""
+        return run_at.time() >= self.market_close
@@ -0,0 +1,61 @@
+"""
+Adapters from source-specific OHLC frames (Kite historical data, NSE bhavcopy via nselib) to candle frames
+
+A candle frame has one row per contract and session: instrument_token, date as a
+YYYY-MM-DD string, name, strike, expiry, option_type and float open/high/low/close,
+which is what CandleStore and the pattern rules expect.
+"""
+
+import pandas as pd
+
+PRICE_COLUMNS = ["open", "high", "low", "close", "volume", "oi", "strike", "underlying_price"]
+
+# nselib's option_price_volume_data columns, root main.py renames some of them to the lower-case names itself
+NSE_COLUMNS = {
+    "TIMESTAMP": "date", "SYMBOL": "name", "EXPIRY_DT": "expiry", "STRIKE_PRICE": "strike",
+    "OPTION_TYPE": "option_type", "OPENING_PRICE": "open", "TRADE_HIGH_PRICE": "high",
+    "TRADE_LOW_PRICE": "low", "CLOSING_PRICE": "close", "TOT_TRADED_QTY": "volume",
+    "OPEN_INT": "oi", "UNDERLYING_VALUE": "underlying_price",
+}
+NSE_DATE_FORMAT = "%d-%b-%Y"
+
+def _to_float(values):
+    """Prices that may come as strings with thousands separators or "-" for no trade"""
+    if values.dtype.kind in "fiu":
+        return values.astype(float)
+    numbers = pd.to_numeric(values, errors="coerce")
+    # Only the few values the fast parse rejected go through string cleanup
+    retry = numbers.isna() & values.notna()
+    if retry.any():
+        numbers[retry] = pd.to_numeric(values[retry].astype(str).str.replace(",", "", regex=False).str.strip(),
+                                       errors="coerce")
+    return numbers.astype(float)
+
+def from_kite(kite_df):
+    """Candle frame of daily Kite historical candles (the fetcher's frames and saved OHLC files)"""
+    candles = kite_df.reset_index(drop=True)
+    candles = candles.assign(date=pd.to_datetime(candles["date"]).dt.strftime("%Y-%m-%d"))
+    return candles.assign(**{c: _to_float(candles[c]) for c in PRICE_COLUMNS if c in candles.columns})
+
+def from_nse(nse_df, option_type=None):
+    """Candle frame of NSE option price/volume rows, newest first with string prices as nselib returns them
+
+    Contracts get a synthetic instrument_token per (name, expiry, strike, option_type),
+    numbered in order of first appearance. option_type fills in for frames without
+    the OPTION_TYPE column.
+    """
+    candles = nse_df.reset_index(drop=True).rename(columns=NSE_COLUMNS)
+    candles = candles.loc[:, ~candles.columns.duplicated()]
+    if "option_type" not in candles.columns:
+        candles["option_type"] = option_type
+
+    candles["date"] = pd.to_datetime(candles["date"], format=NSE_DATE_FORMAT).dt.strftime("%Y-%m-%d")
+    candles["expiry"] = pd.to_datetime(candles["expiry"], format=NSE_DATE_FORMAT).dt.date
+    candles["name"] = candles["name"].astype(str).str.strip()
+    for column in PRICE_COLUMNS:
+        if column in candles.columns:
+            candles[column] = _to_float(candles[column])
+
+    contract = ["name", "expiry", "strike", "option_type"]
+    candles["instrument_token"] = candles.groupby(contract, sort=False, dropna=False).ngroup() + 1
+    return candles
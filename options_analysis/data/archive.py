@@ -0,0 +1,165 @@
+"""
+Multi-year daily option history archive: Arrow IPC files partitioned by underlying and expiry
+"""
+
+import glob
+import logging
+import os
+import pandas as pd
+from datetime import datetime
+
+from options_analysis.config.settings import ARCHIVE_DIR
+
+ARCHIVE_FLOAT_COLUMNS = ["open", "high", "low", "close", "volume", "oi", "strike", "underlying_price"]
+
+def _partition_path(root, underlying, expiry):
+    return os.path.join(root, f"underlying={underlying}", f"expiry={expiry}")
+
+def _partition_key(path):
+    return path.split("=", 1)[1]
+
+def write_archive(daily_ohlc_df, run_date=None, root=ARCHIVE_DIR):
+    """Add a run's daily candles to the archive, one uncompressed Arrow IPC file per underlying/expiry
+
+    Files are named by run date. Only candles the partition doesn't already hold,
+    new sessions or revised ones like a session fetched while it was still trading,
+    are written, so the lookback each run refetches isn't archived again. The reader
+    keeps the latest run's candle for each token and date.
+    """
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    run_date = run_date or datetime.today().strftime("%Y-%m-%d")
+    archive_df = daily_ohlc_df.dropna(subset=["date", "expiry"]).copy()
+    if archive_df.empty:
+        return 0
+
+    archive_df["date"] = pd.to_datetime(archive_df["date"]).dt.date
+    archive_df["expiry"] = pd.to_datetime(archive_df["expiry"]).dt.strftime("%Y-%m-%d")
+    for column in ARCHIVE_FLOAT_COLUMNS:
+        if column in archive_df.columns:
+            archive_df[column] = pd.to_numeric(archive_df[column], errors="coerce").astype("float64")
+    archive_df = archive_df.sort_values(["instrument_token", "date"])
+
+    files = 0
+    candles = 0
+    for (underlying, expiry), partition_df in archive_df.groupby(["name", "expiry"], sort=False):
+        partition_dir = _partition_path(root, underlying, expiry)
+        os.makedirs(partition_dir, exist_ok=True)
+
+        part_file = os.path.join(partition_dir, f"part-{run_date}.arrow")
+        partition_df = partition_df.drop(columns=["name", "expiry"])
+        earlier_files = [f for f in sorted(glob.glob(os.path.join(partition_dir, "part-*.arrow"))) if f != part_file]
+        partition_df = _unarchived_candles(partition_df, earlier_files)
+        new_candles = len(partition_df)
+        if os.path.exists(part_file):
+            # A rerun on the same day replaces its file, keep what the earlier run added
+            partition_df = pd.concat([_read_parts([part_file]), partition_df], ignore_index=True)
+            partition_df = partition_df.drop_duplicates(subset=["instrument_token", "date"], keep="last")
+        if partition_df.empty:
+            continue
+
+        tmp_file = part_file + ".tmp"
+        table = pa.Table.from_pandas(partition_df, preserve_index=False)
+        # Uncompressed so readers can memory-map the columns instead of decoding them
+        feather.write_feather(table, tmp_file, compression="uncompressed")
+        os.replace(tmp_file, part_file)
+        files += 1
+        candles += new_candles
+
+    logging.info(f"Archived {candles} new candles of {len(archive_df)} into {files} partitions under {root}")
+    return files
+
+def _read_parts(part_files):
+    """A partition's part files as one frame, the latest run's candle for each token and date"""
+    import pyarrow as pa
+
+    parts_df = pd.concat([pa.ipc.open_file(pa.memory_map(f, "r")).read_all().to_pandas() for f in part_files],
+                         ignore_index=True)
+    return parts_df.drop_duplicates(subset=["instrument_token", "date"], keep="last")
+
+def _unarchived_candles(partition_df, part_files):
+    """Rows of partition_df that aren't already archived with the same values"""
+    if not part_files:
+        return partition_df
+    archived_df = _read_parts(part_files)
+    # A run with columns the archive lacks has nothing archived yet to compare against
+    if not set(partition_df.columns) <= set(archived_df.columns):
+        return partition_df
+    archived_df = archived_df[partition_df.columns].astype(partition_df.dtypes.to_dict(), errors="ignore")
+    # merge matches NaN to NaN, so unchanged candles with missing values are found too
+    merged = partition_df.merge(archived_df.drop_duplicates(), how="left", indicator=True)
+    return partition_df[(merged["_merge"] == "left_only").to_numpy()]
+
+def archive_partitions(root=ARCHIVE_DIR, underlyings=None, expiries=None):
+    """(underlying, expiry, part files) of the partitions matching the filters, pruned by directory name"""
+    # Filters may be arrays, whose truth value is ambiguous
+    underlyings = set(underlyings) if underlyings is not None else None
+    expiries = {pd.to_datetime(e).strftime("%Y-%m-%d") for e in expiries} if expiries is not None else None
+
+    partitions = []
+    for underlying_dir in sorted(glob.glob(os.path.join(root, "underlying=*"))):
+        underlying = _partition_key(os.path.basename(underlying_dir))
+        if underlyings is not None and underlying not in underlyings:
+            continue
+        for expiry_dir in sorted(glob.glob(os.path.join(underlying_dir, "expiry=*"))):
+            expiry = _partition_key(os.path.basename(expiry_dir))
+            if expiries is not None and expiry not in expiries:
+                continue
+            partitions.append((underlying, expiry, sorted(glob.glob(os.path.join(expiry_dir, "part-*.arrow")))))
+    return partitions
+
+def read_archive(underlyings=None, start=None, end=None, expiries=None, columns=None, root=ARCHIVE_DIR):
+    """Load archived candles for some underlyings and a date range
+
+    Partitions outside the requested underlyings/expiries are never opened, and
+    partitions whose expiry is before start are skipped since they hold no later
+    candles. The rest are memory-mapped, only the requested columns are touched and
+    rows outside start..end are filtered on the mapped Arrow arrays before anything
+    is converted to pandas. Dates come back as YYYY-MM-DD strings like the fetcher writes.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    start = pd.to_datetime(start).date() if start is not None else None
+    end = pd.to_datetime(end).date() if end is not None else None
+
+    tables = []
+    files_read = 0
+    for underlying, expiry, part_files in archive_partitions(root, underlyings, expiries):
+        if start is not None and expiry < start.strftime("%Y-%m-%d"):
+            continue
+
+        for part_file in part_files:
+            # The mapped buffers stay alive as long as the table references them
+            table = pa.ipc.open_file(pa.memory_map(part_file, "r")).read_all()
+            files_read += 1
+            if columns is not None:
+                table = table.select([c for c in table.column_names if c in columns or c in ("instrument_token", "date")])
+
+            mask = None
+            if start is not None:
+                mask = pc.greater_equal(table["date"], pa.scalar(start, pa.date32()))
+            if end is not None:
+                before_end = pc.less_equal(table["date"], pa.scalar(end, pa.date32()))
+                mask = before_end if mask is None else pc.and_(mask, before_end)
+            if mask is not None:
+                table = table.filter(mask)
+
+            if table.num_rows:
+                table = table.append_column("name", pa.array([underlying] * table.num_rows, pa.string()))
+                table = table.append_column("expiry", pa.array([expiry] * table.num_rows, pa.string()))
+                tables.append(table)
+
+    if not tables:
+        return pd.DataFrame(columns=columns or ["instrument_token", "date", "name", "expiry"])
+
+    history = pa.concat_tables(tables, promote_options="default")
+    history = history.set_column(history.column_names.index("date"), "date", history["date"].cast(pa.string()))
+    history_df = history.to_pandas()
+    # Later run files come last, so their candles win where runs overlap
+    history_df = history_df.drop_duplicates(subset=["instrument_token", "date"], keep="last")
+    history_df = history_df.sort_values(["instrument_token", "date"], ignore_index=True)
+
+    logging.info(f"Read {len(history_df)} archived candles from {files_read} files under {root}")
+    return history_df[columns] if columns is not None else history_df
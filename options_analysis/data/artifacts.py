@@ -0,0 +1,83 @@
+"""
+Readers for OHLC artifacts saved by previous runs
+"""
+
+import logging
+import os
+import pandas as pd
+
+from options_analysis.config.settings import ARTIFACT_CHUNK_ROWS
+
+# Columns the weekly filter and pattern analysis need, with their dtypes.
+# volume/oi are nullable because fetch_ohlc_data writes placeholder rows for empty tokens.
+OHLC_DTYPES = {
+    "instrument_token": "int64",
+    "date": "object",
+    "open": "float64",
+    "high": "float64",
+    "low": "float64",
+    "close": "float64",
+    "volume": "float64",
+    "oi": "float64",
+    "expiry": "object",
+    "name": "object",
+    "strike": "float64",
+    "option_type": "object",
+    "underlying_price": "float64",
+}
+
+# Everything the scan's analysis reads, volume/oi/underlying_price feed the OI ranking and IV
+ANALYSIS_COLUMNS = ["instrument_token", "date", "open", "high", "low", "close", "volume", "oi",
+                    "expiry", "name", "strike", "option_type", "underlying_price"]
+
+def read_ohlc_artifact(path, dates=None, columns=None, chunksize=ARTIFACT_CHUNK_ROWS):
+    """Read a saved OHLC CSV/Parquet in chunks, keeping only the given columns and dates"""
+    columns = columns or ANALYSIS_COLUMNS
+    dates = set(dates) if dates else None
+
+    if os.path.splitext(path)[1].lower() in (".parquet", ".pq"):
+        chunks = _iter_parquet_chunks(path, columns, chunksize)
+    else:
+        chunks = _iter_csv_chunks(path, columns, chunksize)
+
+    kept = []
+    rows_read = 0
+    for chunk in chunks:
+        rows_read += len(chunk)
+        chunk = _normalize_dates(chunk)
+        if dates is not None:
+            chunk = chunk[chunk["date"].isin(dates)]
+        if not chunk.empty:
+            kept.append(chunk)
+
+    ohlc_df = pd.concat(kept, ignore_index=True) if kept else pd.DataFrame(columns=columns)
+    logging.info(f"Read {rows_read} rows from {path}, kept {len(ohlc_df)}")
+    return ohlc_df
+
+def _iter_csv_chunks(path, columns, chunksize):
+    """Yield typed DataFrame chunks of the requested columns from a CSV"""
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [c for c in columns if c in header]
+    dtypes = {c: OHLC_DTYPES[c] for c in usecols if c in OHLC_DTYPES}
+
+    with pd.read_csv(path, usecols=usecols, dtype=dtypes, chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield chunk
+
+def _iter_parquet_chunks(path, columns, chunksize):
+    """Yield typed DataFrame chunks of the requested columns from a Parquet file"""
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    usecols = [c for c in columns if c in parquet_file.schema_arrow.names]
+
+    for batch in parquet_file.iter_batches(batch_size=chunksize, columns=usecols):
+        chunk = batch.to_pandas()
+        dtypes = {c: OHLC_DTYPES[c] for c in usecols if c in OHLC_DTYPES and c != "date"}
+        yield chunk.astype(dtypes)
+
+def _normalize_dates(chunk):
+    """Make sure the date column holds YYYY-MM-DD strings like the fetcher writes"""
+    if "date" in chunk.columns and pd.api.types.is_datetime64_any_dtype(chunk["date"]):
+        chunk = chunk.assign(date=chunk["date"].dt.strftime("%Y-%m-%d"))
+    return chunk
@@ -0,0 +1,57 @@
+"""
+Daily candles kept in memory between daemon runs so each run only fetches what changed
+"""
+
+import logging
+import pandas as pd
+from datetime import datetime, timedelta
+
+from options_analysis.config.settings import OHLC_LOOKBACK_DAYS
+from options_analysis.data.fetcher import fetch_candles
+
+class CandleCache:
+    """Warm daily candles of every token scanned so far, trimmed to the lookback window"""
+
+    def __init__(self, lookback_days=OHLC_LOOKBACK_DAYS):
+        self.lookback_days = lookback_days
+        self.candles = pd.DataFrame(columns=["instrument_token", "date"])
+        # Last session whose final (after close) candles every cached token has
+        self.settled_through = None
+
+    def refresh(self, kite, tokens, now=None, after_close=False, scheduler=None):
+        """Candles of tokens for the lookback window ending now, fetching only what is missing
+
+        Tokens new to the cache get the whole window. Cached tokens are fetched from
+        the day after settled_through, so today's candle is fetched again until a
+        refresh after the close, and nothing is fetched once it has been.
+        """
+        now = now or datetime.today()
+        window_start = (now - timedelta(days=self.lookback_days)).strftime("%Y-%m-%d")
+
+        # Tokens that only have a placeholder were fetched too, they have no candles in the window
+        cached = self.candles[self.candles["instrument_token"].isin(tokens)]
+        cached_tokens = cached["instrument_token"].unique()
+        new_tokens = pd.Index(tokens).difference(cached_tokens)
+
+        frames = [cached]
+        since = None if self.settled_through is None else self.settled_through + timedelta(days=1)
+        if len(cached_tokens) and (since is None or since <= now.date()):
+            since = datetime.combine(since, datetime.min.time()) if since else now - timedelta(days=self.lookback_days)
+            frames += fetch_candles(kite, cached_tokens, since, now, scheduler=scheduler)
+        if len(new_tokens):
+            frames += fetch_candles(kite, new_tokens, now - timedelta(days=self.lookback_days), now,
+                                    scheduler=scheduler)
+
+        # Fresh candles replace cached ones of the same day, placeholders only stay for tokens without candles
+        frames = [frame for frame in frames if not frame.empty]
+        candles = pd.concat(frames, ignore_index=True) if frames else self.candles.iloc[:0]
+        candles = candles.drop_duplicates(subset=["instrument_token", "date"], keep="last")
+        dated = candles["date"].notna()
+        candles = candles[dated | ~candles["instrument_token"].isin(candles.loc[dated, "instrument_token"])]
+        candles = candles[candles["date"].isna() | (candles["date"].fillna("") >= window_start)]
+        self.candles = candles.sort_values(["instrument_token", "date"], ignore_index=True)
+
+        self.settled_through = now.date() if after_close else now.date() - timedelta(days=1)
+        logging.info(f"Candle cache: {len(cached_tokens)} cached and {len(new_tokens)} new tokens, "
+                     f"{len(self.candles)} candles")
+        return self.candles
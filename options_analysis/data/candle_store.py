@@ -0,0 +1,89 @@
+"""
+Contract-sorted columnar candle store with zero-copy per-contract views
+"""
+
+import numpy as np
+
+PRICE_COLUMNS = ["open", "high", "low", "close", "volume", "oi"]
+CONTRACT_COLUMNS = ["instrument_token", "name", "strike", "expiry", "option_type"]
+
+class CandleView:
+    """One contract's candles, every column a slice (not a copy) of the store's arrays"""
+
+    __slots__ = ("contract", "columns")
+
+    def __init__(self, contract, columns):
+        self.contract = contract
+        self.columns = columns
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def __len__(self):
+        return len(self.columns["date"])
+
+class CandleStore:
+    """Candles sorted by instrument_token then date, held as one NumPy array per column
+
+    offsets[i]:offsets[i + 1] is the row range of contracts.iloc[i], so a contract's
+    candles are a slice of each column and whole-store stages can gather the k-th
+    candle of every contract with offsets[:-1] + k instead of grouping.
+    """
+
+    def __init__(self, ohlc_df):
+        tokens = ohlc_df["instrument_token"].to_numpy(dtype=np.int64)
+        dates = ohlc_df["date"].astype(str).to_numpy()
+        order = np.lexsort((dates, tokens))
+        # Frames written by the fetcher are already contract/date ordered, their columns are used as they are
+        presorted = bool((order == np.arange(len(order))).all())
+
+        self.columns = {"date": dates if presorted else dates[order]}
+        for column in PRICE_COLUMNS:
+            if column in ohlc_df.columns:
+                values = ohlc_df[column].to_numpy(dtype=float)
+                self.columns[column] = values if presorted else values[order]
+
+        sorted_tokens = tokens[order]
+        self.tokens, starts = np.unique(sorted_tokens, return_index=True)
+        self.offsets = np.append(starts, len(sorted_tokens))
+
+        # One row of contract attributes per token, plus where it first appeared in the input
+        first_rows = order[starts]
+        self.contracts = ohlc_df.iloc[first_rows][[c for c in CONTRACT_COLUMNS if c in ohlc_df.columns]]
+        self.contracts = self.contracts.reset_index(drop=True)
+        self.contracts["first_seen"] = _first_positions(tokens, self.tokens)
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def counts(self):
+        """Number of candles of each contract"""
+        return np.diff(self.offsets)
+
+    def view(self, i):
+        """Zero-copy view of the i-th contract's candles"""
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return CandleView(self.contracts.iloc[i], {c: values[start:end] for c, values in self.columns.items()})
+
+    def view_token(self, token):
+        i = np.searchsorted(self.tokens, token)
+        if i == len(self.tokens) or self.tokens[i] != token:
+            raise KeyError(token)
+        return self.view(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.view(i)
+
+    def nth(self, column, k):
+        """k-th candle's value of a column for every contract, NaN where a contract has fewer candles"""
+        if not len(self.columns["date"]):
+            return np.full(len(self), np.nan)
+        rows = (self.offsets[:-1] + k).clip(max=len(self.columns["date"]) - 1)
+        return np.where(self.counts() > k, self.columns[column][rows], np.nan)
+
+def _first_positions(tokens, unique_tokens):
+    """Row of each unique token's first appearance in the unsorted input"""
+    first = np.full(len(unique_tokens), len(tokens), dtype=np.int64)
+    np.minimum.at(first, np.searchsorted(unique_tokens, tokens), np.arange(len(tokens)))
+    return first
@@ -0,0 +1,77 @@
+"""
+On-disk journal of fetched OHLC frames so an interrupted run can resume
+"""
+
+import glob
+import logging
+import os
+import shutil
+import pandas as pd
+from datetime import datetime
+
+from options_analysis.config.settings import CHECKPOINT_DIR, CHECKPOINT_FLUSH_TOKENS
+
+JOURNAL_FLOAT_COLUMNS = ["open", "high", "low", "close", "volume", "oi"]
+
+class FetchJournal:
+    """Append-only journal of completed tokens, one Arrow IPC part file per flush"""
+
+    def __init__(self, run_date=None, root=CHECKPOINT_DIR, flush_every=CHECKPOINT_FLUSH_TOKENS):
+        run_date = run_date or datetime.today().strftime("%Y-%m-%d")
+        self.path = os.path.join(root, run_date)
+        self.flush_every = flush_every
+        self.pending = []
+        os.makedirs(self.path, exist_ok=True)
+
+    def _part_files(self):
+        return sorted(glob.glob(os.path.join(self.path, "part-*.arrow")))
+
+    def load(self):
+        """Load every journaled frame, empty if nothing was journaled yet"""
+        import pyarrow.feather as feather
+
+        parts = [feather.read_table(part_file).to_pandas() for part_file in self._part_files()]
+        if not parts:
+            return pd.DataFrame()
+
+        journal_df = pd.concat(parts, ignore_index=True)
+        logging.info(f"Resuming from {self.path}: {journal_df['instrument_token'].nunique()} tokens already fetched")
+        return journal_df
+
+    def append(self, ohlc_df):
+        """Queue the frame of one completed token, flushing every flush_every tokens"""
+        self.pending.append(ohlc_df)
+        if len(self.pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Write queued frames to a new part file"""
+        if not self.pending:
+            return
+
+        part_file = os.path.join(self.path, f"part-{len(self._part_files()):05d}.arrow")
+        write_arrow_frame(pd.concat(self.pending, ignore_index=True), part_file)
+
+        logging.info(f"Checkpointed {len(self.pending)} tokens to {part_file}")
+        self.pending = []
+
+    def clear(self):
+        """Remove the journal once the run has completed"""
+        self.pending = []
+        shutil.rmtree(self.path, ignore_errors=True)
+
+def write_arrow_frame(frame, path):
+    """Atomically write a fetched OHLC frame (placeholder rows included) as an Arrow IPC file"""
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    frame = frame.copy()
+    for column in JOURNAL_FLOAT_COLUMNS:
+        if column in frame.columns:
+            frame[column] = pd.to_numeric(frame[column], errors="coerce").astype("float64")
+    # Placeholder rows carry NaT dates, store them as nulls
+    frame["date"] = frame["date"].astype(object).where(frame["date"].notna(), None)
+
+    tmp_path = path + ".tmp"
+    feather.write_feather(pa.Table.from_pandas(frame, preserve_index=False), tmp_path)
+    os.replace(tmp_path, path)
@@ -6,6 +6,12 @@ import logging
 import pandas as pd
 from datetime import datetime, timedelta
 
+from options_analysis.config.settings import (ARCHIVE_HISTORY, OHLC_INTERVAL, OHLC_LOOKBACK_DAYS,
+                                              HISTORICAL_CHUNK_DAYS, INTERVAL_ALIASES)
+from options_analysis.data.archive import write_archive
+from options_analysis.data.scheduler import FetchScheduler
+from options_analysis.data.kite_client import classify_error
+
 def get_instruments(kite, exchange="NFO"):
     """Fetch instruments and save to CSV"""
     instruments = kite.instruments(exchange)
@@ -19,65 +25,181 @@ def get_instruments(kite, exchange="NFO"):
     
     return instruments_df
 
-def get_ohlc_last_20_days(kite, instrument_token: int):
-    """Fetch OHLC for last 20 days for a given instrument token"""
-    to_date = datetime.today()
-    from_date = to_date - timedelta(days=20)
-    
+def normalize_interval(interval):
+    """Kite's name for a candle interval, accepting aliases such as hour"""
+    interval = INTERVAL_ALIASES.get(interval, interval)
+    if interval not in HISTORICAL_CHUNK_DAYS:
+        raise ValueError(f"Unsupported interval {interval}, expected one of {', '.join(HISTORICAL_CHUNK_DAYS)}")
+    return interval
+
+def chunk_ranges(from_date, to_date, interval="day"):
+    """Split from_date..to_date into the fewest ranges Kite serves in one historical_data call each
+
+    Ranges do not overlap, each starts a second after the previous one ends.
+    """
+    span = timedelta(days=HISTORICAL_CHUNK_DAYS[normalize_interval(interval)]) - timedelta(seconds=1)
+    from_date = pd.Timestamp(from_date).to_pydatetime()
+    to_date = pd.Timestamp(to_date).to_pydatetime()
+
+    ranges = []
+    start = from_date
+    while start <= to_date:
+        end = min(start + span, to_date)
+        ranges.append((start, end))
+        start = end + timedelta(seconds=1)
+    return ranges
+
+def get_ohlc_chunk(kite, instrument_token: int, from_date, to_date, interval="day"):
+    """Fetch one historical_data call worth of candles, from_date..to_date must fit the interval's limit"""
     try:
         data = kite.historical_data(
             instrument_token,
             from_date,
             to_date,
-            interval="day",
+            interval=interval,
             continuous=False,
             oi=True
         )
         df = pd.DataFrame(data)
+        if df.empty:
+            return df
         df["instrument_token"] = instrument_token
-        df["date"] = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")
+        # Daily candles keep the plain dates the weekly analysis matches on
+        date_format = "%Y-%m-%d" if interval == "day" else "%Y-%m-%d %H:%M:%S"
+        df["date"] = pd.to_datetime(df["date"]).dt.strftime(date_format)
         return df
     except Exception as e:
+        # Throttling, network and session errors must not turn into "No OHLC data" placeholders
+        if classify_error(e) != "permanent":
+            raise
         logging.error(f"Error fetching OHLC for {instrument_token}: {e}")
         return pd.DataFrame()
 
-def fetch_ohlc_data(kite, all_options_df):
-    """Fetch OHLC data for all instruments in the dataframe"""
+def stitch_chunks(chunks):
+    """One contiguous frame from a token's chunk frames, without duplicate candles"""
+    chunks = [chunk for chunk in chunks if chunk is not None and not chunk.empty]
+    if not chunks:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0]
+    df = pd.concat(chunks, ignore_index=True)
+    return df.drop_duplicates(subset=["date"], keep="last").sort_values("date", ignore_index=True)
+
+def get_ohlc(kite, instrument_token: int, from_date, to_date, interval="day", scheduler=None):
+    """Fetch candles of one token over any range, splitting it into chunks fetched concurrently"""
+    interval = normalize_interval(interval)
+    ranges = chunk_ranges(from_date, to_date, interval)
+    if len(ranges) == 1 or scheduler is None:
+        chunks = [get_ohlc_chunk(kite, instrument_token, start, end, interval) for start, end in ranges]
+    else:
+        chunks = [chunk for _, chunk in scheduler.map(
+            lambda r: get_ohlc_chunk(kite, instrument_token, r[0], r[1], interval), ranges)]
+    return stitch_chunks(chunks)
+
+def get_ohlc_last_20_days(kite, instrument_token: int):
+    """Fetch OHLC for last 20 days for a given instrument token"""
+    to_date = datetime.today()
+    return get_ohlc(kite, instrument_token, to_date - timedelta(days=20), to_date)
+
+def fetch_candles(kite, tokens, from_date, to_date, interval="day", scheduler=None, journal=None):
+    """Fetch candles of many tokens over one date range, one frame per token
+
+    The range is split into the chunks Kite allows for the interval and every
+    token's chunks go through the scheduler together, so they are fetched
+    concurrently. Tokens without candles get a placeholder row. With a journal
+    every completed token is checkpointed.
+    """
+    interval = normalize_interval(interval)
+    ranges = chunk_ranges(from_date, to_date, interval)
     ohlc_list = []
-    logging.info(f"✅ Total tokens - {len(all_options_df['instrument_token'].unique())}")
-    
     counter = 0
-    option_type = all_options_df["instrument_type"][0] if not all_options_df.empty else "UNKNOWN"
-    
-    for token in all_options_df["instrument_token"].unique():
-        ohlc_df = get_ohlc_last_20_days(kite, token)
 
-        if ohlc_df is not None and not ohlc_df.empty:
+    # One scheduler is shared by every token so CE/PE and all expiries stay under the rate limit
+    scheduler = scheduler or FetchScheduler()
+
+    # Chunks of a token come back consecutively, the last one completes the token
+    requests = [(token, start, end) for token in tokens for start, end in ranges]
+    last_end = ranges[-1][1]
+    chunks = []
+
+    try:
+        for (token, _, end), chunk_df in scheduler.map(
+                lambda r: get_ohlc_chunk(kite, r[0], r[1], r[2], interval), requests):
+            chunks.append(chunk_df)
+            if end != last_end:
+                continue
+            ohlc_df = stitch_chunks(chunks)
+            chunks = []
+
+            if ohlc_df is not None and not ohlc_df.empty:
+                if counter % 100 == 0:
+                    logging.info(f"✅ Processing token number - {counter}")
+                counter += 1
+            else:
+                ohlc_df = pd.DataFrame({
+                    "instrument_token": [token],
+                    "date": [pd.NaT],
+                    "open": [None],
+                    "high": [None],
+                    "low": [None],
+                    "close": [None],
+                    "volume": [None]
+                })
+                logging.warning(f"⚠️ No OHLC data for token - {token}, added placeholder")
+
             ohlc_list.append(ohlc_df)
-            if counter % 100 == 0:
-                logging.info(f"✅ Processing token number - {counter}")
-            counter += 1
-        else:
-            placeholder = pd.DataFrame({
-                "instrument_token": [token],
-                "date": [pd.NaT],
-                "open": [None],
-                "high": [None],
-                "low": [None],
-                "close": [None],
-                "volume": [None]
-            })
-            ohlc_list.append(placeholder)
-            logging.warning(f"⚠️ No OHLC data for token - {token}, added placeholder")
+            if journal is not None:
+                journal.append(ohlc_df)
+    finally:
+        # Keep whatever was fetched, even if the run is dying
+        if journal is not None:
+            journal.flush()
 
     logging.info(f"Total processed tokens: {counter}")
-    
+    return ohlc_list
+
+def fetch_ohlc_data(kite, all_options_df, scheduler=None, journal=None, archive=ARCHIVE_HISTORY,
+                    interval=OHLC_INTERVAL, lookback_days=OHLC_LOOKBACK_DAYS):
+    """Fetch OHLC data for all instruments in the dataframe
+
+    With a FetchJournal, tokens already journaled for the run date are not fetched
+    again and every fetched token is checkpointed to disk. Only daily candles are
+    archived.
+    """
+    interval = normalize_interval(interval)
+    to_date = datetime.today()
+
+    ohlc_list = []
+    tokens = all_options_df["instrument_token"].unique()
+    logging.info(f"✅ Total tokens - {len(tokens)}")
+
+    if journal is not None:
+        journal_df = journal.load()
+        if not journal_df.empty:
+            journal_df = journal_df[journal_df["instrument_token"].isin(tokens)]
+            ohlc_list.append(journal_df)
+            tokens = tokens[~pd.Series(tokens).isin(journal_df["instrument_token"]).to_numpy()]
+            logging.info(f"✅ Remaining tokens to fetch - {len(tokens)}")
+
+    ohlc_list += fetch_candles(kite, tokens, to_date - timedelta(days=lookback_days), to_date, interval,
+                               scheduler, journal)
+    return save_ohlc_data(ohlc_list, all_options_df, interval, archive)
+
+def save_ohlc_data(ohlc_list, all_options_df, interval=OHLC_INTERVAL, archive=ARCHIVE_HISTORY):
+    """Join fetched candle frames with their contracts, save them as CSV and archive daily candles"""
+    option_types = sorted(all_options_df["instrument_type"].unique()) if not all_options_df.empty else []
+    option_type = "-".join(option_types) or "UNKNOWN"
+
     # Merge all OHLC data
     ohlc_all_df = pd.concat(ohlc_list, ignore_index=True)
     
     # Join with original dataframe
+    option_columns = ["instrument_token", "expiry", "name", "strike", "instrument_type"]
+    if "underlying_price" in all_options_df.columns:
+        option_columns.append("underlying_price")
+
     daily_ohlc_df = ohlc_all_df.merge(
-        all_options_df[["instrument_token", "expiry", "name", "strike", "instrument_type"]],
+        all_options_df[option_columns],
         on="instrument_token",
         how="inner"
     )
@@ -86,8 +208,12 @@ def fetch_ohlc_data(kite, all_options_df):
     
     # Save to CSV
     formatted = datetime.now().strftime("%d-%b-%Y %H-%M-%S")
-    csv_filename = f"zerodha_NFO_filtered_{option_type}_daily_OHLC_{formatted}.csv"
+    label = "daily" if interval == "day" else interval
+    csv_filename = f"zerodha_NFO_filtered_{option_type}_{label}_OHLC_{formatted}.csv"
     daily_ohlc_df.to_csv(csv_filename, index=False)
-    logging.info(f"Daily OHLC data saved to {csv_filename}")
+    logging.info(f"{label.capitalize()} OHLC data saved to {csv_filename}")
+
+    if archive and interval == "day":
+        write_archive(daily_ohlc_df)
     
     return daily_ohlc_df, option_type
\ No newline at end of file
@@ -0,0 +1,147 @@
+"""
+Shared Kite client wrapper with adaptive per-endpoint rate limiting, retries and metrics
+"""
+
+import logging
+import random
+import threading
+import time
+
+from options_analysis.config.settings import (KITE_RATE_LIMITS, KITE_MAX_CONCURRENCY, KITE_LATENCY_TARGET,
+                                              KITE_RETRY_ATTEMPTS, KITE_RETRY_BACKOFF)
+from options_analysis.data.scheduler import RateLimiter
+
+RETRYABLE = ("throttled", "transient")
+
+def classify_error(error):
+    """Classify a Kite error as throttled, transient, session or permanent"""
+    code = getattr(error, "code", None)
+    name = type(error).__name__
+
+    if code == 429 or "too many requests" in str(error).lower():
+        return "throttled"
+    if name in ("TokenException", "PermissionException"):
+        return "session"
+    if name in ("NetworkException", "DataException") or (isinstance(code, int) and code >= 500):
+        return "transient"
+    # requests' ConnectionError/Timeout are OSErrors
+    if isinstance(error, OSError):
+        return "transient"
+    return "permanent"
+
+class AdaptiveLimiter:
+    """Token bucket plus an AIMD concurrency window for one endpoint"""
+
+    def __init__(self, rate, max_concurrency=KITE_MAX_CONCURRENCY, latency_target=KITE_LATENCY_TARGET):
+        self.base_rate = rate
+        self.bucket = RateLimiter(rate)
+        self.max_concurrency = max_concurrency
+        self.latency_target = latency_target
+        self.window = float(max_concurrency)
+        self.in_flight = 0
+        self.cond = threading.Condition()
+        self.stats = {"calls": 0, "throttled": 0, "retries": 0, "errors": 0,
+                      "wait_seconds": 0.0, "backoff_seconds": 0.0, "latency_seconds": 0.0}
+
+    def acquire(self):
+        """Block until both the concurrency window and the rate allow a call"""
+        started = time.monotonic()
+        with self.cond:
+            while self.in_flight >= int(self.window):
+                self.cond.wait()
+            self.in_flight += 1
+        self.bucket.acquire()
+
+        with self.cond:
+            self.stats["wait_seconds"] += time.monotonic() - started
+
+    def release(self, latency, throttled=False):
+        """Record a finished call and adapt the window and rate"""
+        with self.cond:
+            self.in_flight -= 1
+            self.stats["calls"] += 1
+            self.stats["latency_seconds"] += latency
+
+            if throttled:
+                # Multiplicative decrease on a 429
+                self.stats["throttled"] += 1
+                self.window = max(1.0, self.window / 2)
+                self.bucket.set_rate(max(self.base_rate / 8, self.bucket.rate / 2))
+            elif latency > self.latency_target:
+                self.window = max(1.0, self.window - 1)
+            else:
+                # Additive increase, about one slot per window of successful calls
+                self.window = min(self.max_concurrency, self.window + 1 / self.window)
+                self.bucket.set_rate(min(self.base_rate, self.bucket.rate + self.base_rate / 20))
+
+            self.cond.notify_all()
+
+    def metrics(self):
+        with self.cond:
+            metrics = dict(self.stats)
+            metrics["window"] = round(self.window, 2)
+            metrics["rate"] = round(self.bucket.rate, 2)
+            return metrics
+
+class KiteClient:
+    """Wraps a KiteConnect session so every API call is throttled, retried and measured
+
+    Endpoints listed in KITE_RATE_LIMITS go through their own AdaptiveLimiter,
+    anything else (login_url, set_access_token, ...) is passed straight through,
+    so a KiteClient can be used wherever a KiteConnect object is expected.
+    """
+
+    def __init__(self, kite, rate_limits=None, retry_attempts=KITE_RETRY_ATTEMPTS, retry_backoff=KITE_RETRY_BACKOFF):
+        self.kite = kite
+        self.retry_attempts = retry_attempts
+        self.retry_backoff = retry_backoff
+        self.limiters = {endpoint: AdaptiveLimiter(rate)
+                         for endpoint, rate in (rate_limits or KITE_RATE_LIMITS).items()}
+
+    def __getattr__(self, name):
+        attr = getattr(self.kite, name)
+        if name in self.limiters and callable(attr):
+            return lambda *args, **kwargs: self.call(name, *args, **kwargs)
+        return attr
+
+    def call(self, endpoint, *args, **kwargs):
+        """Call a Kite endpoint, retrying throttled and transient errors with backoff"""
+        limiter = self.limiters[endpoint]
+        fn = getattr(self.kite, endpoint)
+
+        for attempt in range(1, self.retry_attempts + 1):
+            limiter.acquire()
+            started = time.monotonic()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                kind = classify_error(e)
+                limiter.release(time.monotonic() - started, throttled=(kind == "throttled"))
+
+                if kind not in RETRYABLE or attempt == self.retry_attempts:
+                    with limiter.cond:
+                        limiter.stats["errors"] += 1
+                    raise
+
+                backoff = self.retry_backoff * 2 ** (attempt - 1) * random.uniform(1, 1.5)
+                with limiter.cond:
+                    limiter.stats["retries"] += 1
+                    limiter.stats["backoff_seconds"] += backoff
+                logging.warning(f"{endpoint} {kind} error ({e}), retry {attempt} in {backoff:.1f}s")
+                time.sleep(backoff)
+                continue
+
+            limiter.release(time.monotonic() - started)
+            return result
+
+    def metrics(self):
+        """Per-endpoint call, throttling and timing counters"""
+        return {endpoint: limiter.metrics() for endpoint, limiter in self.limiters.items()
+                if limiter.stats["calls"]}
+
+    def log_metrics(self):
+        for endpoint, metrics in self.metrics().items():
+            logging.info(f"Kite {endpoint}: {metrics['calls']} calls, {metrics['throttled']} throttled, "
+                         f"{metrics['retries']} retries, {metrics['errors']} errors, "
+                         f"waited {metrics['wait_seconds']:.1f}s + backoff {metrics['backoff_seconds']:.1f}s, "
+                         f"window {metrics['window']}, rate {metrics['rate']}/s")
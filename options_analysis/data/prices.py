@@ -0,0 +1,102 @@
+"""
+Bulk underlying price providers shared by the NSE and Kite pipelines
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from options_analysis.config.settings import (INDEX_LTP_SYMBOLS, UNDERLYING_PRICE_TTL, NSE_QUOTE_TTL,
+                                              KITE_LTP_BATCH_SIZE, HTTP_POOL_SIZE)
+
+NSE_FO_STOCKS_URL = "https://www.nseindia.com/api/equity-stockIndices?index=" + quote("SECURITIES IN F&O")
+NSE_ALL_INDICES_URL = "https://www.nseindia.com/api/allIndices"
+NSE_QUOTE_URL = "https://www.nseindia.com/api/quote-equity?symbol="
+
+class UnderlyingPrices:
+    """Memoized underlying LTPs, refreshed in one bulk call for every missing or stale symbol
+
+    fetch takes a list of symbols and returns a {symbol: last_price} dict.
+    """
+
+    def __init__(self, fetch, ttl=UNDERLYING_PRICE_TTL):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.prices = {}
+        self.lock = threading.Lock()
+
+    def get(self, symbols):
+        """Get {symbol: last_price} for the symbols, symbols without a price are left out"""
+        symbols = list(symbols)
+        now = time.monotonic()
+
+        with self.lock:
+            stale = [s for s in symbols if s not in self.prices or now - self.prices[s][1] > self.ttl]
+            if stale:
+                fetched = self.fetch(stale)
+                self.prices.update({s: (price, now) for s, price in fetched.items()})
+                logging.info(f"Fetched {len(fetched)} of {len(stale)} underlying prices")
+
+            return {s: self.prices[s][0] for s in symbols if s in self.prices}
+
+    def expire(self):
+        """Mark every memoized price stale, the next get fetches them all again"""
+        with self.lock:
+            self.prices.clear()
+
+def fetch_kite_prices(kite, symbols, batch_size=KITE_LTP_BATCH_SIZE):
+    """Fetch LTPs from Kite with one ltp call per batch of instruments"""
+    keys = {f"NSE:{INDEX_LTP_SYMBOLS.get(s, s)}": s for s in symbols}
+
+    prices = {}
+    key_list = list(keys)
+    for start in range(0, len(key_list), batch_size):
+        data = kite.ltp(key_list[start:start + batch_size])
+        prices.update({keys[key]: quote_data["last_price"] for key, quote_data in data.items() if key in keys})
+    return prices
+
+def fetch_nse_prices(symbols):
+    """Fetch LTPs from NSE's bulk F&O stock and index lists, falling back to pooled per-symbol quotes"""
+    from options_analysis.utils.http_client import fetch_json
+
+    wanted = set(symbols)
+    prices = {}
+
+    fo_stocks = fetch_json(NSE_FO_STOCKS_URL, ttl=NSE_QUOTE_TTL)
+    prices.update({row["symbol"]: row["lastPrice"] for row in fo_stocks.get("data", []) if row.get("symbol") in wanted})
+
+    index_symbols = {INDEX_LTP_SYMBOLS[s]: s for s in wanted if s in INDEX_LTP_SYMBOLS}
+    if index_symbols:
+        all_indices = fetch_json(NSE_ALL_INDICES_URL, ttl=NSE_QUOTE_TTL)
+        prices.update({index_symbols[row["index"]]: row["last"]
+                       for row in all_indices.get("data", []) if row.get("index") in index_symbols})
+
+    # Symbols missing from the bulk lists are fetched concurrently over the pooled session
+    missing = [s for s in wanted if s not in prices and s not in INDEX_LTP_SYMBOLS]
+    if missing:
+        def quote_price(symbol):
+            try:
+                return symbol, fetch_json(NSE_QUOTE_URL + quote(symbol), ttl=NSE_QUOTE_TTL)["priceInfo"]["lastPrice"]
+            except Exception as e:
+                logging.error(f"Error fetching NSE quote for {symbol}: {e}")
+                return symbol, None
+
+        with ThreadPoolExecutor(max_workers=HTTP_POOL_SIZE) as pool:
+            prices.update({s: price for s, price in pool.map(quote_price, missing) if price is not None})
+
+    return prices
+
+_nse_prices = None
+
+def get_nse_prices():
+    """Shared memoized NSE price provider"""
+    global _nse_prices
+    if _nse_prices is None:
+        _nse_prices = UnderlyingPrices(fetch_nse_prices)
+    return _nse_prices
+
+def get_kite_prices(kite):
+    """Memoized Kite price provider for one session"""
+    return UnderlyingPrices(lambda symbols: fetch_kite_prices(kite, symbols))
@@ -0,0 +1,61 @@
+"""
+Batched quote snapshots for option contracts
+"""
+
+import logging
+import pandas as pd
+
+from options_analysis.config.settings import QUOTE_BATCH_SIZE
+
+def get_quote_snapshot(kite, instruments_df, batch_size=QUOTE_BATCH_SIZE):
+    """Fetch last price, volume and OI for all instruments with one kite.quote call per batch"""
+    keys = (instruments_df["exchange"] + ":" + instruments_df["tradingsymbol"]).unique().tolist()
+
+    rows = []
+    calls = 0
+    for start in range(0, len(keys), batch_size):
+        batch = keys[start:start + batch_size]
+        try:
+            quotes = kite.quote(batch)
+        except Exception as e:
+            logging.error(f"Error fetching quotes for {len(batch)} instruments: {e}")
+            continue
+        calls += 1
+
+        for quote in quotes.values():
+            rows.append({
+                "instrument_token": quote["instrument_token"],
+                "last_price": quote.get("last_price"),
+                "volume": quote.get("volume", 0),
+                "oi": quote.get("oi", 0),
+            })
+
+    logging.info(f"Fetched {len(rows)} quotes for {len(keys)} instruments in {calls} calls")
+    return pd.DataFrame(rows, columns=["instrument_token", "last_price", "volume", "oi"])
+
+def prefilter_liquid_contracts(kite, universe_df, quote_df=None):
+    """Drop contracts with no volume and no open interest before any historical_data call
+
+    This is an approximation from one quote snapshot: a contract that traded earlier in
+    the lookback but has no volume today and no open positions left is dropped with its
+    history. Scan with --no-prefilter when those candles matter.
+
+    Returns the filtered universe and the quote snapshot used, so later stages can reuse it.
+    """
+    if universe_df.empty:
+        return universe_df, quote_df
+
+    quote_calls = 0
+    if quote_df is None:
+        quote_df = get_quote_snapshot(kite, universe_df)
+        quote_calls = -(-len(universe_df) // QUOTE_BATCH_SIZE)
+
+    liquidity = universe_df[["instrument_token"]].merge(
+        quote_df.drop_duplicates(subset="instrument_token"), on="instrument_token", how="left")
+    # Contracts missing from the snapshot are kept, the historical fetch decides for them
+    dead = ((liquidity["volume"] == 0) & (liquidity["oi"] == 0)).to_numpy()
+
+    liquid_df = universe_df[~dead].reset_index(drop=True)
+    logging.info(f" ✅ Liquidity prefilter: {quote_calls} quote calls dropped {dead.sum()} of {len(universe_df)} "
+                 f"contracts with zero volume and OI in today's snapshot, avoiding {dead.sum()} historical_data calls")
+    return liquid_df, quote_df
@@ -0,0 +1,125 @@
+"""
+Typed pattern result tables: one bulk Parquet/JSON Lines write per run, text rendered from the table
+"""
+
+import glob
+import logging
+import os
+import pandas as pd
+from datetime import datetime
+
+from options_analysis.config.settings import RESULT_JSON_LINES, RESULTS_DIR
+from options_analysis.utils.data_utils import bullish_messages
+
+# Column name and Arrow type of every result column, in table order
+RESULT_COLUMNS = [
+    ("run_date", "date32"),
+    ("pattern", "string"),
+    ("instrument_token", "int64"),
+    ("name", "string"),
+    ("strike", "float64"),
+    ("expiry", "date32"),
+    ("option_type", "string"),
+    ("as_of", "date32"),
+    ("first_open", "float64"),
+    ("first_close", "float64"),
+    ("last_open", "float64"),
+    ("last_close", "float64"),
+    ("pct_move", "float64"),
+    ("volume", "float64"),
+    ("iv", "float64"),
+    ("oi", "float64"),
+    ("oi_change", "float64"),
+    ("oi_change_pct", "float64"),
+    ("buildup", "string"),
+    ("pcr", "float64"),
+    ("oi_confirmed", "bool_"),
+    ("score", "float64"),
+    ("rank", "int32"),
+]
+
+def result_schema():
+    import pyarrow as pa
+
+    return pa.schema([(name, getattr(pa, arrow_type)()) for name, arrow_type in RESULT_COLUMNS])
+
+def result_table(results, run_date=None, pattern="green_bullish"):
+    """Typed Arrow table of pattern results in output order, metrics the run did not compute are null"""
+    import pyarrow as pa
+
+    run_date = pd.to_datetime(run_date or datetime.today().strftime("%Y-%m-%d")).date()
+    frame = results.assign(run_date=run_date, pattern=pattern, rank=range(1, len(results) + 1))
+    for column in ("expiry", "as_of"):
+        if column in frame.columns:
+            frame[column] = pd.to_datetime(frame[column]).dt.date
+
+    schema = result_schema()
+    arrays = [pa.array(frame[field.name], type=field.type, from_pandas=True) if field.name in frame.columns
+              else pa.nulls(len(frame), field.type) for field in schema]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+def render_text(table):
+    """The legacy *_Analysis.txt lines of a result table"""
+    frame = table.to_pandas()
+    if frame["buildup"].isna().all():
+        frame = frame.drop(columns="buildup")
+    return bullish_messages(frame)
+
+def write_results(results, filename, run_date=None, json_lines=RESULT_JSON_LINES, history=False, root=RESULTS_DIR):
+    """Write a run's results as <filename base>.parquet (and .jsonl) plus the text rendering at filename
+
+    With history the table is also added to the run date's partition under root,
+    replacing the table of an earlier scan that day.
+    """
+    import pyarrow.parquet as pq
+
+    table = results if not isinstance(results, pd.DataFrame) else result_table(results, run_date)
+    base = os.path.splitext(filename)[0]
+
+    pq.write_table(table, f"{base}.parquet")
+    if json_lines:
+        frame = table.to_pandas()
+        for column, arrow_type in RESULT_COLUMNS:
+            if arrow_type == "date32":
+                frame[column] = pd.to_datetime(frame[column]).dt.strftime("%Y-%m-%d")
+        frame.to_json(f"{base}.jsonl", orient="records", lines=True)
+
+    messages = render_text(table)
+    with open(filename, "w") as file_object:
+        file_object.write("".join(f"{message}\n" for message in messages))
+
+    if history and table.num_rows:
+        run_date = table["run_date"][0].as_py().strftime("%Y-%m-%d")
+        partition_dir = os.path.join(root, f"run_date={run_date}")
+        os.makedirs(partition_dir, exist_ok=True)
+        pq.write_table(table, os.path.join(partition_dir, os.path.basename(f"{base}.parquet")))
+
+    logging.info(f"{table.num_rows} pattern results saved to {base}.parquet{' and .jsonl' if json_lines else ''}, "
+                 f"rendered to {filename}")
+    return messages
+
+def read_result_files(paths):
+    """Concatenate result tables written by write_results, in the given order"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tables = [pq.read_table(path) for path in paths]
+    return pa.concat_tables(tables) if tables else result_schema().empty_table()
+
+def read_results(start=None, end=None, option_types=None, root=RESULTS_DIR):
+    """Results of every scanned day between start and end, pruned by partition directory"""
+    start = pd.to_datetime(start).strftime("%Y-%m-%d") if start is not None else None
+    end = pd.to_datetime(end).strftime("%Y-%m-%d") if end is not None else None
+
+    paths = []
+    for partition_dir in sorted(glob.glob(os.path.join(root, "run_date=*"))):
+        run_date = os.path.basename(partition_dir).split("=", 1)[1]
+        if (start is not None and run_date < start) or (end is not None and run_date > end):
+            continue
+        for path in sorted(glob.glob(os.path.join(partition_dir, "*.parquet"))):
+            if option_types is None or os.path.basename(path).split("_", 1)[0] in option_types:
+                paths.append(path)
+
+    results_df = read_result_files(paths).to_pandas()
+    logging.info(f"Read {len(results_df)} pattern results from {len(paths)} files under {root}")
+    return results_df
@@ -0,0 +1,72 @@
+"""
+Rate limited scheduler shared by all per-instrument Kite fetches
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from options_analysis.config.settings import HISTORICAL_RATE_LIMIT, FETCH_WORKERS
+
+class RateLimiter:
+    """Token bucket allowing `rate` calls per second"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        """Credit the tokens earned since the last update, called with the lock held"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def set_rate(self, rate):
+        """Change the refill rate, tokens earned so far are credited at the old one"""
+        with self.lock:
+            self._refill()
+            self.rate = rate
+
+    def acquire(self):
+        """Block until a call is allowed"""
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class FetchScheduler:
+    """Runs fetch calls on a worker pool behind one shared rate limiter"""
+
+    def __init__(self, rate=HISTORICAL_RATE_LIMIT, max_workers=FETCH_WORKERS):
+        # rate=None leaves throttling to the client, e.g. a KiteClient with per-endpoint limits
+        self.limiter = RateLimiter(rate) if rate else None
+        self.max_workers = max_workers
+        self.calls = 0
+        self._calls_lock = threading.Lock()
+
+    def _call(self, fn, item):
+        if self.limiter is not None:
+            self.limiter.acquire()
+        with self._calls_lock:
+            self.calls += 1
+        return fn(item)
+
+    def map(self, fn, items):
+        """Yield (item, fn(item)) pairs in input order"""
+        items = list(items)
+        started = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = pool.map(lambda item: self._call(fn, item), items)
+            for item, result in zip(items, results):
+                yield item, result
+
+        logging.info(f"Scheduler finished {len(items)} calls in {time.monotonic() - started:.1f}s")
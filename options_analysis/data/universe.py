@@ -0,0 +1,95 @@
+"""
+Option universe builder for stocks and index underlyings across several expiries
+"""
+
+import logging
+import pandas as pd
+
+from options_analysis.config.settings import STRIKE_WINDOW_STRIKES, STRIKE_WINDOW_BAND_PCT, STRIKE_WINDOW_MIN_OI
+from options_analysis.data.prices import get_kite_prices
+from options_analysis.utils.data_utils import filter_option_strikes, resolve_expiries, lookup_expiries
+
+def build_option_universe(kite, instruments_df, selections_by_symbol, option_types=("CE", "PE"), expiry_table=None,
+                          prices=None):
+    """Filter the option contracts of every underlying for its selected expiries
+
+    selections_by_symbol maps an underlying name to the expiries to scan
+    ("weekly", "near", "next"), resolved through the expiry lookup table.
+    LTPs for all underlyings come from one bulk call to the price provider
+    (Kite by default) and tokens are deduplicated so each contract is fetched once.
+    """
+    if expiry_table is None:
+        expiry_table = resolve_expiries(instruments_df)
+
+    prices = prices or get_kite_prices(kite)
+    last_traded_prices = prices.get(selections_by_symbol)
+
+    option_df = instruments_df[instruments_df["instrument_type"].isin(option_types)]
+    chains = dict(tuple(option_df.groupby("name")))
+
+    frames = []
+    for symbol, selections in selections_by_symbol.items():
+        expiries = lookup_expiries(expiry_table, symbol, selections)
+        if not expiries:
+            logging.warning(f"No expiry selected for {symbol}, skipping")
+            continue
+        if symbol not in chains:
+            logging.warning(f"No option chain found for {symbol}, skipping")
+            continue
+
+        last_traded_price = last_traded_prices.get(symbol)
+        if last_traded_price is None:
+            logging.error(f"Skipping {symbol}: no last traded price")
+            continue
+
+        for option_type in option_types:
+            filtered_df = filter_option_strikes(
+                chains[symbol], symbol,
+                min_strike=last_traded_price,
+                option_type=option_type,
+                expiry=expiries
+            )
+            if not filtered_df.empty:
+                frames.append(filtered_df.assign(underlying_price=last_traded_price))
+
+    if not frames:
+        return pd.DataFrame()
+
+    universe_df = pd.concat(frames, ignore_index=True)
+    total = len(universe_df)
+    universe_df = universe_df.drop_duplicates(subset="instrument_token").reset_index(drop=True)
+
+    logging.info(f" ✅ Universe has {len(universe_df)} contracts for {len(selections_by_symbol)} underlyings "
+                 f"({total - len(universe_df)} duplicate tokens dropped)")
+    return universe_df
+
+def apply_strike_window(universe_df, policy="all", strikes=STRIKE_WINDOW_STRIKES, band_pct=STRIKE_WINDOW_BAND_PCT,
+                        min_oi=STRIKE_WINDOW_MIN_OI, quote_df=None):
+    """Keep only the strikes inside the window policy, for the whole universe at once
+
+    "atm" keeps the N strikes nearest the LTP per underlying/expiry/option type,
+    "moneyness" keeps strikes within band_pct % of the LTP and "min_oi" keeps
+    contracts whose quote snapshot OI is at least min_oi.
+    """
+    if universe_df.empty or policy == "all":
+        return universe_df
+
+    distance = (universe_df["strike"] - universe_df["underlying_price"]).abs()
+
+    if policy == "atm":
+        rank = distance.groupby([universe_df["name"], universe_df["expiry"], universe_df["instrument_type"]]).rank(method="first")
+        keep = rank <= strikes
+    elif policy == "moneyness":
+        keep = distance <= universe_df["underlying_price"] * band_pct / 100
+    elif policy == "min_oi":
+        if quote_df is None:
+            raise ValueError("min_oi strike window needs a quote snapshot")
+        oi = universe_df["instrument_token"].map(quote_df.set_index("instrument_token")["oi"]).fillna(0)
+        keep = oi >= min_oi
+    else:
+        raise ValueError(f"Unknown strike window policy: {policy}")
+
+    windowed_df = universe_df[keep].reset_index(drop=True)
+    logging.info(f" ✅ Strike window '{policy}' kept {len(windowed_df)} of {len(universe_df)} contracts, "
+                 f"saving {len(universe_df) - len(windowed_df)} historical_data calls")
+    return windowed_df
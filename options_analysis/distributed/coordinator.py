@@ -0,0 +1,144 @@
+"""
+Distributed scan coordinator: shards the underlyings, runs local workers and merges their results
+"""
+
+import logging
+import os
+import subprocess
+import sys
+import time
+import pandas as pd
+from datetime import datetime
+
+from options_analysis.config.settings import (DISTRIBUTED_POLL_SECONDS, DISTRIBUTED_MAX_ATTEMPTS, ARCHIVE_HISTORY)
+
+SHARD_DAILY_FILE = "daily.arrow"
+SHARD_CHAINS_FILE = "chains.csv"
+
+def shard_selections(selections_by_symbol, shards):
+    """Split {symbol: expiries} into round-robin shards of roughly equal size"""
+    items = sorted(selections_by_symbol.items())
+    return [dict(items[i::shards]) for i in range(shards) if items[i::shards]]
+
+def queue_shards(spool, selections_by_symbol, shards, scan_options):
+    """Write one task per shard to the spool, shards already queued or done are kept"""
+    for i, selections in enumerate(shard_selections(selections_by_symbol, shards)):
+        spool.add_task(f"shard-{i:03d}", dict(scan_options, selections=selections))
+    logging.info(f"Spool {spool.path}: {spool.status()}")
+
+def worker_command(spool, worker_id, env_file=None):
+    """Command line of a local worker process"""
+    main_script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+    command = [sys.executable, main_script, "worker", "--spool", os.path.dirname(spool.path),
+               "--run-id", spool.run_id, "--worker-id", worker_id]
+    if env_file:
+        command += ["--env-file", os.path.abspath(env_file)]
+    return command
+
+def run_local_workers(spool, workers, credentials=None, max_attempts=DISTRIBUTED_MAX_ATTEMPTS,
+                      poll_seconds=DISTRIBUTED_POLL_SECONDS):
+    """Run worker processes until every shard is done or has failed max_attempts times
+
+    Worker i logs in with credentials[i] (an env file with its own ZERODHA_* values)
+    so each worker gets its own Kite rate limit. Each runs in its own directory under
+    the spool so the per-run files it writes do not collide with the others'.
+    Workers on other hosts can join by running `main.py worker` against the same spool.
+    """
+    credentials = list(credentials or [])
+    if credentials:
+        workers = len(credentials)
+    elif workers > 1:
+        logging.warning("No per-worker credentials given, all workers share one Kite account and its rate limits")
+
+    environment = dict(os.environ)
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    environment["PYTHONPATH"] = os.pathsep.join(p for p in [package_dir, os.path.dirname(package_dir),
+                                                             environment.get("PYTHONPATH")] if p)
+
+    def spawn(i):
+        worker_id = f"local{i}"
+        workdir = os.path.join(spool.path, "workers", worker_id)
+        os.makedirs(workdir, exist_ok=True)
+        command = worker_command(spool, worker_id, credentials[i] if credentials else None)
+        logging.info(f"Starting worker {worker_id}")
+        return worker_id, subprocess.Popen(command, cwd=workdir, env=environment)
+
+    processes = dict(spawn(i) for i in range(workers))
+    restarts = dict.fromkeys(processes, 0)
+    while True:
+        time.sleep(poll_seconds)
+        status = spool.status()
+        if status["tasks"] == 0 and status["claimed"] == 0:
+            break
+
+        exited = [worker_id for worker_id, process in processes.items() if process.poll() is not None]
+        spool.requeue_orphans(exited, max_attempts)
+        if not spool.status()["tasks"]:
+            continue
+
+        # Restart exited workers while shards are left, a worker that keeps dying is given up on
+        for worker_id in exited:
+            if restarts[worker_id] < max_attempts:
+                restarts[worker_id] += 1
+                processes[worker_id] = spawn(int(worker_id[len("local"):]))[1]
+        if all(process.poll() is not None for process in processes.values()):
+            logging.error(f"Every local worker has stopped with shards left: {spool.status()}")
+            break
+
+    for process in processes.values():
+        process.wait()
+
+    status = spool.status()
+    logging.info(f"Distributed scan finished: {status['done']} shards done, {status['failed']} failed")
+    for task in spool.failed():
+        logging.error(f"Shard {task['shard']} failed after {task['attempts']} attempts: {task.get('last_error')}")
+    return status
+
+def merge_shard_results(spool, option_types):
+    """Merge the shards' daily candles, chain analytics and pattern results into the usual run artifacts"""
+    from options_analysis.data.archive import write_archive
+    from options_analysis.analysis.oi import sort_by_oi
+    from options_analysis.analysis.ranking import write_top_signals
+    from options_analysis.data.results import read_result_files, write_results
+    import pyarrow.feather as feather
+
+    tasks = sorted(spool.finished(), key=lambda task: task["shard"])
+    daily_frames, chain_frames = [], []
+    for task in tasks:
+        daily_file = os.path.join(spool.results_dir(task["shard"]), SHARD_DAILY_FILE)
+        if os.path.exists(daily_file):
+            daily_frames.append(feather.read_table(daily_file).to_pandas())
+        chains_file = os.path.join(spool.results_dir(task["shard"]), SHARD_CHAINS_FILE)
+        if os.path.exists(chains_file) and os.path.getsize(chains_file):
+            chain_frames.append(pd.read_csv(chains_file))
+
+    daily_ohlc_df = pd.concat(daily_frames, ignore_index=True) if daily_frames else pd.DataFrame()
+    if not daily_ohlc_df.empty:
+        formatted = datetime.now().strftime("%d-%b-%Y %H-%M-%S")
+        csv_filename = f"zerodha_NFO_filtered_{'-'.join(sorted(option_types))}_daily_OHLC_{formatted}.csv"
+        daily_ohlc_df.to_csv(csv_filename, index=False)
+        logging.info(f"Merged daily OHLC data of {len(daily_frames)} shards saved to {csv_filename}")
+        if ARCHIVE_HISTORY:
+            write_archive(daily_ohlc_df)
+
+    if chain_frames:
+        # Shards hold whole underlyings, so their chains never overlap
+        chains_filename = f"zerodha_NFO_chain_analytics_{datetime.now().strftime('%d-%b-%Y %H-%M-%S')}.csv"
+        pd.concat(chain_frames, ignore_index=True).to_csv(chains_filename, index=False)
+        logging.info(f"Merged chain analytics of {len(chain_frames)} shards saved to {chains_filename}")
+
+    for option_type in option_types:
+        filename = f"{option_type}_Analysis.txt"
+        result_files = [os.path.join(spool.results_dir(task["shard"]), f"{option_type}_Analysis.parquet")
+                        for task in tasks]
+        result_files = [path for path in result_files if os.path.exists(path)]
+        # Ranks and run date are assigned again for the merged table, ranked by OI across all shards
+        # like a single-machine scan. Shard order is kept among equals.
+        results = read_result_files(result_files).to_pandas().drop(columns=["run_date", "pattern", "rank"])
+        results = sort_by_oi(results)
+        write_results(results, filename, history=True)
+        write_top_signals(results, filename)
+        logging.info(f"Merged {option_type} results of {len(result_files)} shards into {filename}: "
+                     f"{len(results)} patterns")
+
+    return daily_ohlc_df
@@ -0,0 +1,108 @@
+"""
+File spool shared by the coordinator and workers of a distributed scan
+
+A run directory holds tasks/, claimed/, done/ and failed/ markers plus one results
+directory per shard. Claims are atomic renames, so workers on other hosts can share
+the spool over a network filesystem.
+"""
+
+import glob
+import json
+import logging
+import os
+
+TASK_STATES = ("tasks", "claimed", "done", "failed")
+
+class Spool:
+    """One distributed run's task queue and shard results on disk"""
+
+    def __init__(self, root, run_id):
+        # Absolute, workers run in their own directories
+        self.path = os.path.join(os.path.abspath(root), run_id)
+        self.run_id = run_id
+        for state in TASK_STATES + ("results",):
+            os.makedirs(os.path.join(self.path, state), exist_ok=True)
+
+    def _marker(self, state, shard, worker_id=None):
+        name = f"{shard}.{worker_id}.json" if worker_id else f"{shard}.json"
+        return os.path.join(self.path, state, name)
+
+    def _markers(self, state):
+        return sorted(glob.glob(os.path.join(self.path, state, "*.json")))
+
+    @staticmethod
+    def _read(path):
+        with open(path) as marker_file:
+            return json.load(marker_file)
+
+    @staticmethod
+    def _write(path, payload):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as marker_file:
+            json.dump(payload, marker_file, indent=2, default=str)
+        os.replace(tmp_path, path)
+
+    def results_dir(self, shard):
+        path = os.path.join(self.path, "results", shard)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def add_task(self, shard, payload):
+        """Queue a shard unless it is already queued, running or finished"""
+        if any(self.shard_state(shard) == state for state in ("tasks", "claimed", "done")):
+            return
+        self._write(self._marker("tasks", shard), dict(payload, shard=shard, attempts=0))
+
+    def shard_state(self, shard):
+        for state in TASK_STATES:
+            if glob.glob(os.path.join(self.path, state, f"{shard}.*json")):
+                return state
+        return None
+
+    def claim(self, worker_id):
+        """Take the next queued task, None when the queue is empty"""
+        for task_path in self._markers("tasks"):
+            shard = os.path.basename(task_path)[:-len(".json")]
+            claimed_path = self._marker("claimed", shard, worker_id)
+            try:
+                # Only one worker wins the rename
+                os.rename(task_path, claimed_path)
+            except FileNotFoundError:
+                continue
+            return self._read(claimed_path)
+        return None
+
+    def complete(self, task, worker_id, metrics):
+        """Mark a claimed shard done"""
+        claimed_path = self._marker("claimed", task["shard"], worker_id)
+        self._write(self._marker("done", task["shard"]), dict(task, worker_id=worker_id, metrics=metrics))
+        os.remove(claimed_path)
+
+    def release(self, task, worker_id, error, max_attempts):
+        """Put a failed shard back on the queue, or park it in failed/ after max_attempts"""
+        claimed_path = self._marker("claimed", task["shard"], worker_id)
+        task = dict(task, attempts=task["attempts"] + 1, last_error=str(error))
+        state = "tasks" if task["attempts"] < max_attempts else "failed"
+        self._write(self._marker(state, task["shard"]), task)
+        os.remove(claimed_path)
+        logging.warning(f"Shard {task['shard']} failed on {worker_id} (attempt {task['attempts']}): {error}")
+
+    def requeue_orphans(self, worker_ids, max_attempts):
+        """Requeue shards claimed by workers that are no longer running"""
+        for claimed_path in self._markers("claimed"):
+            # Shard names have no dots, worker ids (host names) may
+            shard, worker_id = os.path.basename(claimed_path)[:-len(".json")].split(".", 1)
+            if worker_id in worker_ids:
+                self.release(self._read(claimed_path), worker_id, "worker exited without finishing the shard",
+                             max_attempts)
+
+    def status(self):
+        """Shard count per state"""
+        return {state: len(self._markers(state)) for state in TASK_STATES}
+
+    def finished(self):
+        """Payloads of the shards that completed"""
+        return [self._read(path) for path in self._markers("done")]
+
+    def failed(self):
+        return [self._read(path) for path in self._markers("failed")]
@@ -0,0 +1,41 @@
+"""
+Distributed scan worker: claims shards from the spool and runs the scan pipeline on each
+"""
+
+import logging
+import os
+import socket
+
+from options_analysis.config.settings import DISTRIBUTED_MAX_ATTEMPTS
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def run_worker(spool, scan_shard, worker_id=None, max_attempts=DISTRIBUTED_MAX_ATTEMPTS):
+    """Process shards until the queue is empty
+
+    scan_shard(task, results_dir) runs one shard and returns its metrics. A failing
+    shard is handed back to the queue and the worker stops, since the usual causes
+    (login, session, rate limit bans) would fail every following shard too.
+    """
+    worker_id = worker_id or default_worker_id()
+    completed = 0
+
+    while True:
+        task = spool.claim(worker_id)
+        if task is None:
+            break
+
+        logging.info(f"Worker {worker_id} scanning shard {task['shard']} ({len(task['selections'])} underlyings)")
+        try:
+            metrics = scan_shard(task, spool.results_dir(task["shard"]))
+        except Exception as e:
+            spool.release(task, worker_id, e, max_attempts)
+            raise
+
+        spool.complete(task, worker_id, metrics)
+        completed += 1
+        logging.info(f"Worker {worker_id} finished shard {task['shard']}")
+
+    logging.info(f"Worker {worker_id} done, {completed} shards completed")
+    return completed
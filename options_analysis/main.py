@@ -2,15 +2,20 @@
 Main execution script for Zerodha options analysis
 """
 
+import argparse
+import glob
 import logging
-import pandas as pd
-from datetime import datetime
+import os
+from datetime import datetime, timedelta
 
-from options_analysis.config.settings import setup_logging
-from auth.zerodha_auth import ZerodhaAuthenticator
-from data.fetcher import get_instruments, fetch_ohlc_data
-from utils.data_utils import get_ltp, get_expiry_date, filter_option_strikes, find_green_bullish_candles
-from utils.date_utils import get_working_days
+from options_analysis.config.settings import (setup_logging, INDEX_LTP_SYMBOLS, STOCK_EXPIRIES, INDEX_EXPIRIES,
+                                              STRIKE_WINDOW, STRIKE_WINDOW_STRIKES, STRIKE_WINDOW_BAND_PCT,
+                                              STRIKE_WINDOW_MIN_OI, LIQUIDITY_PREFILTER, UNDERLYING_PRICE_SOURCE,
+                                              REPLAY_LOOKBACK_DAYS, REPLAY_HORIZON_SESSIONS, DISTRIBUTED_WORKERS,
+                                              DISTRIBUTED_SPOOL_DIR, CHECKPOINT_DIR, OHLC_INTERVAL, OHLC_LOOKBACK_DAYS,
+                                              HISTORICAL_CHUNK_DAYS, INTERVAL_ALIASES, OI_CONFIRMED_ONLY, DAEMON_RUN_TIMES,
+                                              DAEMON_INTERVAL_MINUTES, API_HOST, API_PORT, CHART_DIR, CHART_FORMATS,
+                                              CHART_MAX_POINTS, CHART_WORKERS, CHART_HISTORY_DAYS)
 
 # Import your stock symbols (you'll need to create this file)
 try:
@@ -19,140 +24,580 @@ except ImportError:
     logging.error("No stock symbols defined.")
     symbols = []
 
-def main():
+def main(argv=None):
     """Main execution function"""
+    args = parse_args(argv)
     setup_logging()
-    # get_working_days()
 
+    if args.command == "analyze":
+        run_analyze(args.path, weekly=args.weekly, output_dir=args.output, chunksize=args.chunksize,
+                    oi_confirmed=args.oi_confirmed)
+    elif args.command == "replay":
+        run_replay(args.paths, start=args.start, end=args.end, option_types=args.option_types,
+                   horizon=args.horizon, chunksize=args.chunksize, underlyings=args.underlyings)
+    elif args.command == "worker":
+        run_worker(args.spool, args.run_id, worker_id=args.worker_id, env_file=args.env_file)
+    elif args.command == "serve":
+        run_serve(args.dir, host=args.host, port=args.port)
+    elif args.command == "charts":
+        run_charts(args.results, ohlc_path=args.ohlc, archive=args.archive, out_dir=args.out, formats=args.formats,
+                   max_points=args.max_points, workers=args.workers)
+    else:
+        strike_window = {"policy": args.strike_window, "strikes": args.strikes,
+                         "band_pct": args.band_pct, "min_oi": args.min_oi}
+        if args.command == "distributed":
+            run_distributed(args.option_types, args.expiries, args.index_expiries, strike_window, args.prefilter,
+                            args.price_source, workers=args.workers, shards=args.shards,
+                            credentials=args.credentials, spool_root=args.spool, run_id=args.run_id,
+                            oi_confirmed=args.oi_confirmed)
+        elif args.command == "daemon":
+            run_daemon(args.option_types, args.expiries, args.index_expiries, strike_window, args.prefilter,
+                       args.price_source, args.oi_confirmed, times=args.at, every_minutes=args.every,
+                       run_now=args.run_now, max_runs=args.max_runs, serve_port=args.serve)
+        else:
+            run_scan(args.option_types, args.expiries, args.index_expiries, strike_window, args.prefilter,
+                     args.resume, args.price_source, args.interval, args.lookback_days, args.oi_confirmed)
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Zerodha options analysis")
+    subparsers = parser.add_subparsers(dest="command")
+
+    # Options shared by the single machine and the distributed scan
+    scan_options = argparse.ArgumentParser(add_help=False)
+    scan_options.add_argument("--option-types", nargs="+", choices=["CE", "PE"], default=["CE", "PE"])
+    scan_options.add_argument("--expiries", nargs="+", choices=["weekly", "near", "next"], default=STOCK_EXPIRIES,
+                              help="expiries scanned for stocks")
+    scan_options.add_argument("--index-expiries", nargs="*", choices=["weekly", "near", "next"],
+                              default=INDEX_EXPIRIES, help="expiries scanned for index options, pass no value to skip indices")
+    scan_options.add_argument("--strike-window", choices=["all", "atm", "moneyness", "min_oi"], default=STRIKE_WINDOW,
+                              help="which OTM strikes to fetch per underlying and expiry")
+    scan_options.add_argument("--strikes", type=int, default=STRIKE_WINDOW_STRIKES, help="strikes kept by 'atm'")
+    scan_options.add_argument("--band-pct", type=float, default=STRIKE_WINDOW_BAND_PCT,
+                              help="%% band kept by 'moneyness'")
+    scan_options.add_argument("--min-oi", type=int, default=STRIKE_WINDOW_MIN_OI, help="OI cutoff used by 'min_oi'")
+    scan_options.add_argument("--no-prefilter", dest="prefilter", action="store_false", default=LIQUIDITY_PREFILTER,
+                              help="fetch candles even for contracts with zero volume and OI in today's quote snapshot")
+    scan_options.add_argument("--price-source", choices=["kite", "nse"], default=UNDERLYING_PRICE_SOURCE,
+                              help="where underlying LTPs are fetched from in bulk")
+    scan_options.add_argument("--oi-confirmed", action="store_true", default=OI_CONFIRMED_ONLY,
+                              help="only report patterns whose contract shows a long buildup (price and OI up)")
+
+    scan_parser = subparsers.add_parser("scan", parents=[scan_options],
+                                        help="Login to Zerodha, fetch option data and analyze it (default)")
+    scan_parser.add_argument("--resume", action="store_true",
+                             help="continue today's failed run, only fetching tokens missing from its checkpoint")
+    scan_parser.add_argument("--interval", choices=list(HISTORICAL_CHUNK_DAYS) + list(INTERVAL_ALIASES),
+                             default=OHLC_INTERVAL, help="candle interval, only daily candles are analyzed")
+    scan_parser.add_argument("--lookback-days", type=int, default=OHLC_LOOKBACK_DAYS,
+                             help="days of candles to fetch, long ranges are fetched in chunks")
+
+    distributed_parser = subparsers.add_parser("distributed", parents=[scan_options],
+                                               help="Shard the scan across worker processes, one Kite account each")
+    distributed_parser.add_argument("--workers", type=int, default=DISTRIBUTED_WORKERS, help="local worker processes")
+    distributed_parser.add_argument("--shards", type=int, help="shards the underlyings are split into, defaults to --workers")
+    distributed_parser.add_argument("--credentials", nargs="+",
+                                    help="one .env file of ZERODHA_* credentials per worker, overrides --workers")
+    distributed_parser.add_argument("--spool", default=DISTRIBUTED_SPOOL_DIR, help="spool directory shared with workers")
+    distributed_parser.add_argument("--run-id", help="continue an earlier distributed run, only unfinished shards run again")
+
+    daemon_parser = subparsers.add_parser("daemon", parents=[scan_options],
+                                          help="Stay running and scan at scheduled times with warm caches")
+    daemon_parser.add_argument("--at", nargs="*", default=DAEMON_RUN_TIMES, metavar="HH:MM",
+                               help="IST times to scan on trading days")
+    daemon_parser.add_argument("--every", type=int, default=DAEMON_INTERVAL_MINUTES, metavar="MINUTES",
+                               help="also scan every N minutes while the market is open")
+    daemon_parser.add_argument("--run-now", action="store_true", help="scan once right away, then follow the schedule")
+    daemon_parser.add_argument("--max-runs", type=int, help="stop after this many scans")
+    daemon_parser.add_argument("--serve", type=int, nargs="?", const=API_PORT, metavar="PORT",
+                               help="also serve each scan's results on the local query API")
+
+    serve_parser = subparsers.add_parser("serve", help="Serve the latest scan results, chains and candles as JSON")
+    serve_parser.add_argument("--dir", default=".", help="directory the scans write their files to")
+    serve_parser.add_argument("--host", default=API_HOST)
+    serve_parser.add_argument("--port", type=int, default=API_PORT)
+
+    charts_parser = subparsers.add_parser("charts", help="Render candlestick charts of every flagged contract")
+    charts_parser.add_argument("results", nargs="*", help="result tables (*_Analysis.parquet) of a scan, "
+                                                          "defaults to CE/PE_Analysis.parquet")
+    charts_parser.add_argument("--ohlc", help="daily OHLC CSV/Parquet, defaults to the newest one the scan saved")
+    charts_parser.add_argument("--archive", action="store_true",
+                               help=f"chart the last {CHART_HISTORY_DAYS} days from the history archive instead")
+    charts_parser.add_argument("--out", default=CHART_DIR, help="directory for the charts and index.html")
+    charts_parser.add_argument("--formats", nargs="+", choices=["html", "png"], default=CHART_FORMATS)
+    charts_parser.add_argument("--max-points", type=int, default=CHART_MAX_POINTS,
+                               help="longer histories are merged into this many candles")
+    charts_parser.add_argument("--workers", type=int, default=CHART_WORKERS, help="render processes")
+
+    worker_parser = subparsers.add_parser("worker", help="Scan shards of a distributed run, e.g. on another host")
+    worker_parser.add_argument("--spool", default=DISTRIBUTED_SPOOL_DIR, help="spool directory of the run")
+    worker_parser.add_argument("--run-id", required=True)
+    worker_parser.add_argument("--worker-id", help="defaults to <hostname>-<pid>")
+    worker_parser.add_argument("--env-file", help=".env file with this worker's ZERODHA_* credentials")
+
+    analyze_parser = subparsers.add_parser("analyze", help="Analyze an existing OHLC CSV/Parquet without logging in")
+    analyze_parser.add_argument("path", help="daily (or weekly, with --weekly) OHLC CSV/Parquet saved by a previous scan")
+    analyze_parser.add_argument("--weekly", action="store_true", help="input is already filtered to the weekly dates")
+    analyze_parser.add_argument("--output", help="directory for the <option_type>_Analysis files, "
+                                                 "defaults to the current one")
+    analyze_parser.add_argument("--oi-confirmed", action="store_true", default=OI_CONFIRMED_ONLY,
+                                help="only report patterns confirmed by a long OI buildup")
+    analyze_parser.add_argument("--chunksize", type=int, help="rows read per chunk")
+
+    replay_parser = subparsers.add_parser("replay", help="Replay the scan as of every trading day in a date range "
+                                                         "over saved daily OHLC history and report hit rates")
+    replay_parser.add_argument("paths", nargs="*",
+                               help="daily OHLC CSV/Parquet files saved by previous scans, defaults to the history archive")
+    replay_parser.add_argument("--underlyings", nargs="+", help="only replay these underlyings")
+    replay_parser.add_argument("--start", type=_parse_date,
+                               help=f"first as-of date (YYYY-MM-DD), defaults to {REPLAY_LOOKBACK_DAYS} days before --end")
+    replay_parser.add_argument("--end", type=_parse_date, help="last as-of date (YYYY-MM-DD), defaults to today")
+    replay_parser.add_argument("--option-types", nargs="+", choices=["CE", "PE"], default=["CE", "PE"])
+    replay_parser.add_argument("--horizon", type=int, default=REPLAY_HORIZON_SESSIONS,
+                               help="sessions after the as-of day a signal is scored on")
+    replay_parser.add_argument("--chunksize", type=int, help="rows read per chunk")
+
+    args = parser.parse_args(argv)
+    if args.command is None:
+        args = scan_parser.parse_args([])
+        args.command = "scan"
+    return args
+
+def _parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+def run_analyze(path, weekly=False, output_dir=None, chunksize=None, oi_confirmed=OI_CONFIRMED_ONLY):
+    """Analyze saved OHLC data for bullish patterns, no authentication or network needed
+
+    Runs the scan's own analysis (OI analytics, chain analytics and the weekly
+    patterns per option type) on the file's candles, so a saved scan analyzes to
+    the same results it produced. Weekly input has no sessions in between, its
+    OI changes are measured across the anchor dates.
+    """
+    from data.artifacts import read_ohlc_artifact
+    read_kwargs = {"chunksize": chunksize} if chunksize else {}
+    ohlc_df = read_ohlc_artifact(path, **read_kwargs)
+    if ohlc_df.empty:
+        logging.warning(f"No candles in {path}")
+        return
+
+    # The weekly input holds exactly the anchor dates. Otherwise they come from a calendar built
+    # from the holiday sheet or cache only, so analyze never goes online.
+    weekly_dates = sorted(ohlc_df["date"].dropna().unique()) if weekly else get_weekly_dates(offline=True)
+    option_types = sorted(ohlc_df["option_type"].dropna().unique())
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    analyze_candles(ohlc_df, option_types, weekly_dates, oi_confirmed, output_dir)
+
+def run_replay(paths=None, start=None, end=None, option_types=("CE", "PE"), horizon=REPLAY_HORIZON_SESSIONS,
+               chunksize=None, underlyings=None):
+    """Replay the bullish scan over stored candle history for every trading day between start and end"""
+    import pandas as pd
+    from options_analysis.data.archive import read_archive
+    from options_analysis.analysis.replay import replay_scan, replay_sessions
+    from data.artifacts import read_ohlc_artifact
+    end = end or datetime.now().date()
+    start = start or end - timedelta(days=REPLAY_LOOKBACK_DAYS)
+    read_kwargs = {"chunksize": chunksize} if chunksize else {}
+
+    if paths:
+        history_df = pd.concat([read_ohlc_artifact(path, **read_kwargs) for path in paths], ignore_index=True)
+        if underlyings:
+            history_df = history_df[history_df["name"].isin(underlyings)]
+    else:
+        # Anchors reach two weeks back and signals are scored horizon sessions ahead
+        history_df = read_archive(underlyings, start=start - timedelta(days=21),
+                                  end=end + timedelta(days=horizon * 2 + 7))
+    if history_df.empty:
+        logging.warning("No candle history to replay")
+        return
+
+    as_of_dates = replay_sessions(start, end)
+    logging.info(f"Replaying {len(as_of_dates)} trading days from {start} to {end}")
+
+    for option_type in option_types:
+        signals_df, summary_df = replay_scan(history_df[history_df["option_type"] == option_type], as_of_dates,
+                                             horizon=horizon)
+
+        signals_file = f"{option_type}_replay_signals_{start}_{end}.csv"
+        summary_file = f"{option_type}_replay_summary_{start}_{end}.csv"
+        signals_df.to_csv(signals_file, index=False)
+        summary_df.to_csv(summary_file, index=False)
+        logging.info(f"{option_type} replay: {summary_df['signals'].sum()} signals, {summary_df['hits'].sum()} hits "
+                     f"of {summary_df['scored'].sum()} scored, saved to {signals_file} and {summary_file}")
+
+def run_scan(option_types, stock_expiries=STOCK_EXPIRIES, index_expiries=INDEX_EXPIRIES, strike_window=None,
+             prefilter=LIQUIDITY_PREFILTER, resume=False, price_source=UNDERLYING_PRICE_SOURCE,
+             interval=OHLC_INTERVAL, lookback_days=OHLC_LOOKBACK_DAYS, oi_confirmed=OI_CONFIRMED_ONLY):
+    """Authenticate with Zerodha, fetch live data and analyze it"""
+    # selenium and kiteconnect are slow to import, only the live scan needs them
+    from auth.zerodha_auth import ZerodhaAuthenticator
+    from options_analysis.data.scheduler import FetchScheduler
+    from options_analysis.data.kite_client import KiteClient
+    from options_analysis.data.checkpoint import FetchJournal
+    from options_analysis.data.prices import get_kite_prices, get_nse_prices
+    from data.fetcher import get_instruments, fetch_ohlc_data, normalize_interval
 
     try:
         # Authenticate with Zerodha
         authenticator = ZerodhaAuthenticator()
-        kite = authenticator.authenticate()
+        # Every Kite call goes through one client with per-endpoint adaptive rate limits
+        kite = KiteClient(authenticator.authenticate())
 
         # Fetch instruments
         instruments_df = get_instruments(kite)
 
-        # Process options data
-        option_types = [ "CE", "PE"]
-        # option_types = ["PE"]
-        for option_type in option_types:
-            logging.info(f"######### {option_type} Analysis - START ############ ")
+        # Build the CE/PE universe for every underlying and expiry in one go
+        prices = get_nse_prices() if price_source == "nse" else get_kite_prices(kite)
+        all_options_df = process_options_data(kite, instruments_df, option_types, stock_expiries, index_expiries,
+                                              strike_window, prefilter, prices)
 
-            all_options_df = process_options_data(kite, instruments_df, option_type)
+        if all_options_df.empty:
+            logging.warning("No options data found. Exiting.")
+            return
 
-            if all_options_df.empty:
-                logging.warning("No options data found. Exiting.")
-                return
-
-            # Fetch OHLC data
-            daily_ohlc_df, option_type = fetch_ohlc_data(kite, all_options_df)
-            # daily_ohlc_df = pd.read_csv('zerodha_NFO_filtered_CE_daily_OHLC_09-Dec-2025 23-50-28.csv')
+        # Fetch OHLC data for all contracts through one rate limited scheduler, checkpointing as we go
+        # Intraday runs journal apart from the daily one so a resume never mixes intervals
+        interval = normalize_interval(interval)
+        journal_root = CHECKPOINT_DIR if interval == "day" else os.path.join(CHECKPOINT_DIR, interval)
+        journal = FetchJournal(root=journal_root)
+        if not resume:
+            journal.clear()
+            journal = FetchJournal(root=journal_root)
+        daily_ohlc_df, _ = fetch_ohlc_data(kite, all_options_df, FetchScheduler(rate=None), journal,
+                                           interval=interval, lookback_days=lookback_days)
+        journal.clear()
+        kite.log_metrics()
 
-            # Get weekly data
-            weekly_ohlc_df = get_weekly_data(daily_ohlc_df)
-            # weekly_ohlc_df = pd.read_csv('zerodha_NFO_filtered_PE_weekly_OHLC_30-Nov-2025 16-15-58.csv')
+        if interval != "day":
+            logging.info(f"Saved {interval} candles, the weekly analysis only runs on daily candles")
+            return
 
-            # Analyze for bullish patterns
-            analyze_bullish_patterns(weekly_ohlc_df, f"{option_type}_Analysis.txt")
-
-            logging.info(f"######### {option_type} Analysis - END ############ ")
+        # Use the 'analyze' command to rerun the pattern analysis on a saved OHLC file
+        analyze_candles(daily_ohlc_df, option_types, oi_confirmed=oi_confirmed, history=True)
 
     except Exception as e:
         logging.error(f"Program failed with error: {e}")
         raise
 
-def process_options_data(kite, instruments_df, option_type="PE"):
-    """Process options data for all symbols"""
-    all_options_df = pd.DataFrame()
-    symbol_counter = 0
-    
-    expiry_date = get_expiry_date(instruments_df)
-    if expiry_date is None:
-        logging.error("Expiry is None... So cannot proceed further")
-        return all_options_df
-    
-    logging.info(f"Total symbols to process for {option_type} is {len(symbols)}")
-    
-    for sym in symbols:
+def run_distributed(option_types, stock_expiries=STOCK_EXPIRIES, index_expiries=INDEX_EXPIRIES, strike_window=None,
+                    prefilter=LIQUIDITY_PREFILTER, price_source=UNDERLYING_PRICE_SOURCE, workers=DISTRIBUTED_WORKERS,
+                    shards=None, credentials=None, spool_root=DISTRIBUTED_SPOOL_DIR, run_id=None,
+                    oi_confirmed=OI_CONFIRMED_ONLY):
+    """Shard the underlyings across workers, each with its own Kite account, and merge their results"""
+    from options_analysis.distributed.spool import Spool
+    from options_analysis.distributed.coordinator import queue_shards, run_local_workers, merge_shard_results
+
+    run_id = run_id or datetime.now().strftime("%Y%m%d-%H%M%S")
+    spool = Spool(spool_root, run_id)
+    workers = len(credentials) if credentials else workers
+
+    # Every shard analyzes against the same weekly anchors, even if a worker runs past midnight
+    scan_options = {"option_types": option_types, "strike_window": strike_window or {"policy": STRIKE_WINDOW},
+                    "prefilter": prefilter, "price_source": price_source, "weekly_dates": get_weekly_dates(),
+                    "oi_confirmed": oi_confirmed}
+    queue_shards(spool, build_selections(stock_expiries, index_expiries), shards or workers, scan_options)
+
+    status = run_local_workers(spool, workers, credentials)
+    merge_shard_results(spool, option_types)
+    if status["failed"]:
+        raise RuntimeError(f"{status['failed']} shards failed, rerun with --run-id {run_id} to retry them")
+
+def run_worker(spool_root, run_id, worker_id=None, env_file=None):
+    """Claim shards of a distributed run from the spool and scan them with this worker's Kite account"""
+    from auth.zerodha_auth import ZerodhaAuthenticator
+    from options_analysis.distributed.spool import Spool
+    from options_analysis.distributed.worker import run_worker as claim_and_scan
+    from options_analysis.data.scheduler import FetchScheduler
+    from options_analysis.data.kite_client import KiteClient
+    from options_analysis.data.checkpoint import FetchJournal, write_arrow_frame
+    from options_analysis.data.prices import get_kite_prices, get_nse_prices
+    from data.fetcher import get_instruments, fetch_ohlc_data
+
+    session = {}
+
+    def scan_shard(task, results_dir):
+        # Log in once, and only if there is a shard to scan
+        if "kite" not in session:
+            session["kite"] = KiteClient(ZerodhaAuthenticator(env_file).authenticate())
+            session["instruments_df"] = get_instruments(session["kite"])
+        kite = session["kite"]
+
+        option_types = task["option_types"]
+        prices = get_nse_prices() if task["price_source"] == "nse" else get_kite_prices(kite)
+        all_options_df = process_options_data(kite, session["instruments_df"], option_types,
+                                              strike_window=task["strike_window"], prefilter=task["prefilter"],
+                                              prices=prices, selections_by_symbol=task["selections"])
+        if all_options_df.empty:
+            return {"contracts": 0, "candles": 0}
+
+        # A retried shard resumes from the tokens its previous attempt checkpointed
+        journal = FetchJournal(root=os.path.join(results_dir, "checkpoints"))
+        daily_ohlc_df, _ = fetch_ohlc_data(kite, all_options_df, FetchScheduler(rate=None), journal, archive=False)
+        write_arrow_frame(daily_ohlc_df, os.path.join(results_dir, "daily.arrow"))
+        journal.clear()
+
+        # Shards hold whole underlyings, so each shard's chains give complete put-call ratios
+        analyze_candles(daily_ohlc_df, option_types, task["weekly_dates"], task.get("oi_confirmed", OI_CONFIRMED_ONLY),
+                        output_dir=results_dir)
+
+        kite.log_metrics()
+        return {"contracts": len(all_options_df), "candles": int(daily_ohlc_df["date"].notna().sum()),
+                "kite": kite.metrics()}
+
+    claim_and_scan(Spool(spool_root, run_id), scan_shard, worker_id)
+
+def run_serve(directory=".", host=API_HOST, port=API_PORT):
+    """Serve the newest scan files of a directory, picking up new scans as they are written"""
+    from options_analysis.api.store import ScanData
+    from options_analysis.api.server import serve
+
+    data = ScanData(directory)
+    data.reload()
+    serve(data, host, port)
+
+def run_charts(result_paths=None, ohlc_path=None, archive=False, out_dir=CHART_DIR, formats=CHART_FORMATS,
+               max_points=CHART_MAX_POINTS, workers=CHART_WORKERS):
+    """Chart the flagged contracts of a scan from its saved candles or the history archive"""
+    from options_analysis.data.results import read_result_files
+    from options_analysis.charts.render import render_charts
+    from options_analysis.data.archive import read_archive
+    from options_analysis.data.candle_store import CandleStore
+    from data.artifacts import read_ohlc_artifact
+
+    result_paths = result_paths or [path for path in ("CE_Analysis.parquet", "PE_Analysis.parquet")
+                                    if os.path.exists(path)]
+    results = read_result_files(result_paths).to_pandas()
+    if results.empty:
+        logging.warning(f"No flagged contracts in {result_paths}, nothing to chart")
+        return
+
+    if archive:
+        start = datetime.today() - timedelta(days=CHART_HISTORY_DAYS)
+        candles = read_archive(underlyings=list(results["name"].unique()), start=start)
+    else:
+        ohlc_path = ohlc_path or max(glob.glob("zerodha_NFO_filtered_*_daily_OHLC_*.*"), key=os.path.getmtime,
+                                     default=None)
+        if ohlc_path is None:
+            logging.error("No daily OHLC file found, pass one with --ohlc")
+            return
+        candles = read_ohlc_artifact(ohlc_path, columns=["instrument_token", "date", "open", "high", "low", "close",
+                                                         "volume", "oi", "name", "strike", "expiry", "option_type"])
+
+    candles = candles[candles["instrument_token"].isin(results["instrument_token"])].dropna(subset=["date"])
+    render_charts(CandleStore(candles), results, out_dir, formats, max_points, workers)
+
+def run_daemon(option_types, stock_expiries=STOCK_EXPIRIES, index_expiries=INDEX_EXPIRIES, strike_window=None,
+               prefilter=LIQUIDITY_PREFILTER, price_source=UNDERLYING_PRICE_SOURCE, oi_confirmed=OI_CONFIRMED_ONLY,
+               times=DAEMON_RUN_TIMES, every_minutes=DAEMON_INTERVAL_MINUTES, run_now=False, max_runs=None,
+               serve_port=None):
+    """Scan on a schedule, keeping the Kite session, instruments and candles warm between runs
+
+    With serve_port the query API runs alongside and serves each scan from memory.
+    """
+    from auth.zerodha_auth import ZerodhaAuthenticator
+    from options_analysis.daemon.schedule import ScanSchedule
+    from options_analysis.daemon.runner import run_daemon as run_scheduled
+    from options_analysis.data.candle_cache import CandleCache
+    import pandas as pd
+    from options_analysis.data.scheduler import FetchScheduler
+    from options_analysis.data.kite_client import KiteClient, classify_error
+    from options_analysis.data.prices import get_kite_prices, get_nse_prices
+    from options_analysis.data.results import result_table
+    from data.fetcher import get_instruments, save_ohlc_data
+
+    schedule = ScanSchedule(times, every_minutes)
+    session = {"candles": CandleCache()}
+    api_data = None
+    if serve_port is not None:
+        from options_analysis.api.store import ScanData
+        from options_analysis.api.server import serve
+
+        api_data = ScanData()
+        serve(api_data, API_HOST, serve_port, background=True)
+
+    def scan_once(run_at):
+        if "kite" not in session:
+            session["kite"] = KiteClient(ZerodhaAuthenticator().authenticate())
+            # The price provider lives as long as the session, each run only refreshes its quotes
+            session["prices"] = get_nse_prices() if price_source == "nse" else get_kite_prices(session["kite"])
+        kite, prices = session["kite"], session["prices"]
+        prices.expire()
+
         try:
-            last_traded_price = get_ltp(kite, sym, exchange="NSE")
-            filtered_df = filter_option_strikes(
-                instruments_df, sym, 
-                min_strike=last_traded_price, 
-                option_type=option_type, 
-                expiry=expiry_date
-            )
-            
-            if not filtered_df.empty:
-                all_options_df = pd.concat([all_options_df, filtered_df])
-                if symbol_counter % 50 == 0:
-                    logging.info(f" ✅ Processing symbol number - {symbol_counter}")
-                symbol_counter += 1
-                    
+            # Instruments change once a day, with new listings and expiries
+            if session.get("instruments_date") != run_at.date():
+                session["instruments_df"] = get_instruments(kite)
+                session["instruments_date"] = run_at.date()
+
+            all_options_df = process_options_data(kite, session["instruments_df"], option_types, stock_expiries,
+                                                  index_expiries, strike_window, prefilter, prices)
+            if all_options_df.empty:
+                logging.warning("No options data found, skipping this scan")
+                return
+
+            candles = session["candles"].refresh(kite, all_options_df["instrument_token"].unique(), run_at,
+                                                 schedule.after_close(run_at), FetchScheduler(rate=None))
+            daily_ohlc_df, _ = save_ohlc_data([candles], all_options_df)
         except Exception as e:
-            logging.error(f"Skipping {sym}: {e}")
-    
-    logging.info(f" ✅ Processed all the symbols: {symbol_counter}")
-    all_options_df.reset_index(drop=True, inplace=True)
+            # An expired session is replaced by a fresh login on the next run
+            if classify_error(e) == "session":
+                session.pop("kite")
+                session.pop("prices")
+            raise
+
+        kite.log_metrics()
+        chain_df, results = analyze_candles(daily_ohlc_df, option_types, oi_confirmed=oi_confirmed, history=True)
+        if api_data is not None:
+            api_data.update(pd.concat([result_table(r).to_pandas() for r in results.values()], ignore_index=True),
+                            chain_df, daily_ohlc_df)
+
+    run_scheduled(schedule, scan_once, run_now=run_now, max_runs=max_runs)
+
+def analyze_candles(daily_ohlc_df, option_types, weekly_dates=None, oi_confirmed=OI_CONFIRMED_ONLY, output_dir=None,
+                    history=False):
+    """Chain analytics and the weekly pattern analysis of a run's daily candles, written to output_dir
+
+    Returns the chain analytics and the pattern results of each option type.
+    """
+    from options_analysis.analysis.oi import oi_analytics
+    from options_analysis.analysis.ranking import underlying_closes
+    weekly_dates = weekly_dates or get_weekly_dates()
+    # OI analytics need both sides of every chain for the put-call ratio, the IV's underlying closes put-call parity
+    oi_df = oi_analytics(daily_ohlc_df)
+    closes = underlying_closes(daily_ohlc_df)
+    chain_df = summarize_chains(daily_ohlc_df, os.path.join(output_dir, "chains.csv") if output_dir else None)
+
+    results = {}
+    for option_type in option_types:
+        logging.info(f"######### {option_type} Analysis - START ############ ")
+
+        weekly_ohlc_df = get_weekly_data(daily_ohlc_df[daily_ohlc_df["option_type"] == option_type], weekly_dates,
+                                         output_dir)
+
+        # Analyze for bullish patterns
+        filename = f"{option_type}_Analysis.txt"
+        results[option_type] = analyze_bullish_patterns(
+            weekly_ohlc_df, os.path.join(output_dir, filename) if output_dir else filename, oi_df, oi_confirmed, history,
+            closes)
+
+        logging.info(f"######### {option_type} Analysis - END ############ ")
+
+    return chain_df, results
+
+def build_selections(stock_expiries=STOCK_EXPIRIES, index_expiries=INDEX_EXPIRIES):
+    """Expiries to scan per underlying, {symbol: ["near", ...]}"""
+    selections_by_symbol = {sym: stock_expiries for sym in symbols}
+    if index_expiries:
+        selections_by_symbol.update({index_symbol: index_expiries for index_symbol in INDEX_LTP_SYMBOLS})
+    return selections_by_symbol
+
+def process_options_data(kite, instruments_df, option_types=("CE", "PE"),
+                         stock_expiries=STOCK_EXPIRIES, index_expiries=INDEX_EXPIRIES, strike_window=None,
+                         prefilter=LIQUIDITY_PREFILTER, prices=None, selections_by_symbol=None):
+    """Process options data for all symbols, or only the given {symbol: expiries} selections"""
+    from options_analysis.data.quotes import get_quote_snapshot, prefilter_liquid_contracts
+    from options_analysis.data.universe import build_option_universe, apply_strike_window
+    from utils.data_utils import resolve_expiries
+    selections_by_symbol = selections_by_symbol or build_selections(stock_expiries, index_expiries)
+
+    logging.info(f"Total symbols to process for {'/'.join(option_types)} is {len(selections_by_symbol)}")
+
+    expiry_table = resolve_expiries(instruments_df)
+    all_options_df = build_option_universe(kite, instruments_df, selections_by_symbol, option_types, expiry_table,
+                                           prices)
+    if all_options_df.empty:
+        return all_options_df
+
+    # One bulk quote snapshot serves both the liquidity prefilter and the min_oi strike window
+    quote_df = None
+    if prefilter:
+        all_options_df, quote_df = prefilter_liquid_contracts(kite, all_options_df)
+
+    strike_window = strike_window or {"policy": STRIKE_WINDOW}
+    if strike_window["policy"] == "min_oi":
+        if quote_df is None:
+            quote_df = get_quote_snapshot(kite, all_options_df)
+        strike_window = dict(strike_window, quote_df=quote_df)
+    all_options_df = apply_strike_window(all_options_df, **strike_window)
     
     # Save filtered data
     formatted = datetime.now().strftime("%d-%b-%Y %H-%M-%S")
-    csv_filename = f"zerodha_NFO_filtered_{option_type}_options_{formatted}.csv"
+    csv_filename = f"zerodha_NFO_filtered_{'-'.join(option_types)}_options_{formatted}.csv"
     all_options_df.to_csv(csv_filename, index=False)
     logging.info(f"Filtered options data saved to {csv_filename}")
     
     return all_options_df
 
-def get_weekly_data(daily_ohlc_df):
-    """Extract weekly OHLC data"""
-    first_week_open_date, first_week_close_date, last_week_open_date, last_week_close_date = get_working_days()
-    
-    first_week_open_date = first_week_open_date.strftime("%Y-%m-%d")
-    first_week_close_date = first_week_close_date.strftime("%Y-%m-%d")
-    last_week_open_date = last_week_open_date.strftime("%Y-%m-%d")
-    last_week_close_date = last_week_close_date.strftime("%Y-%m-%d")
-    
-    weekly_ohlc_df = daily_ohlc_df[
-        daily_ohlc_df['date'].isin([
-            first_week_open_date, first_week_close_date, 
-            last_week_open_date, last_week_close_date
-        ])
+def get_weekly_dates(offline=False):
+    """Get the weekly open/close dates as YYYY-MM-DD strings, offline without downloading holidays"""
+    from utils.date_utils import get_working_days
+    first_week_open_date, first_week_close_date, last_week_open_date, last_week_close_date = \
+        get_working_days(offline)
+
+    return [
+        first_week_open_date.strftime("%Y-%m-%d"),
+        first_week_close_date.strftime("%Y-%m-%d"),
+        last_week_open_date.strftime("%Y-%m-%d"),
+        last_week_close_date.strftime("%Y-%m-%d"),
     ]
+
+def get_weekly_data(daily_ohlc_df, weekly_dates=None, output_dir=None):
+    """Extract weekly OHLC data, saved as CSV in output_dir (the working directory by default)"""
+    if weekly_dates is None:
+        weekly_dates = get_weekly_dates()
+
+    weekly_ohlc_df = daily_ohlc_df[daily_ohlc_df['date'].isin(weekly_dates)]
     
     option_type = weekly_ohlc_df["option_type"].iloc[0] if not weekly_ohlc_df.empty else "UNKNOWN"
     formatted = datetime.now().strftime("%d-%b-%Y %H-%M-%S")
     csv_filename = f"zerodha_NFO_filtered_{option_type}_weekly_OHLC_{formatted}.csv"
+    if output_dir:
+        csv_filename = os.path.join(output_dir, csv_filename)
     weekly_ohlc_df.to_csv(csv_filename, index=False)
     logging.info(f"Weekly OHLC data saved to {csv_filename}")
     
     return weekly_ohlc_df
 
-def analyze_bullish_patterns(weekly_ohlc_df, filename):
-    """Analyze weekly data for bullish patterns"""
-    unique_symbols = weekly_ohlc_df['name'].unique()
-    
+def summarize_chains(daily_ohlc_df, filename=None):
+    """Save max pain, OI-weighted strikes and the ATM straddle of every underlying/expiry chain"""
+    from options_analysis.analysis.chain import chain_analytics
+    chain_df = chain_analytics(daily_ohlc_df)
+    if filename is None:
+        formatted = datetime.now().strftime("%d-%b-%Y %H-%M-%S")
+        filename = f"zerodha_NFO_chain_analytics_{formatted}.csv"
+    chain_df.to_csv(filename, index=False)
+    logging.info(f"Chain analytics of {len(chain_df)} underlying/expiry chains saved to {filename}")
+    return chain_df
+
+def analyze_bullish_patterns(weekly_ohlc_df, filename, oi_df=None, oi_confirmed=OI_CONFIRMED_ONLY, history=False,
+                             underlying_closes=None):
+    """Analyze weekly data for bullish patterns, ranked by OI confirmation when OI analytics are given
+
+    Results are written as a typed table next to filename, which gets the text rendering
+    of it, and the best scored matches overall and per underlying as JSON/CSV.
+    With history the table is also kept in the results history. IV needs the
+    underlying's closes per date (ranking.underlying_closes), it is left empty without them.
+    """
+    from options_analysis.data.candle_store import CandleStore
+    from options_analysis.analysis.ranking import pattern_results, write_top_signals
+    from options_analysis.data.results import write_results
+    from utils.data_utils import green_bullish_contracts
+    # Every contract is checked on zero-copy slices of one columnar store instead of per-symbol sub-frames
+    store = CandleStore(weekly_ohlc_df)
+    results = pattern_results(store, green_bullish_contracts(store), underlying_closes, oi_df, oi_confirmed)
+
     try:
-        with open(filename, "w") as file_object:
-            for symbol in unique_symbols:
-                symbol_df = weekly_ohlc_df[weekly_ohlc_df['name'] == symbol]
-                # symbol_df = weekly_ohlc_df[weekly_ohlc_df['name'] == symbol]
-                unique_strike_prices = symbol_df['strike'].unique()
-                
-                for strike_price in unique_strike_prices:
-                    final_df = symbol_df[symbol_df['strike'] == strike_price]
-                    message = find_green_bullish_candles(final_df)
-                   
-                    if message is not None:
-                        file_object.write(f"{message}\n")
-                        logging.info(f"Bullish pattern found: {message}")
-                    # else:
-                        # logging.info(f"Bullish pattern NOT found! {message}")
-                        
+        for message in write_results(results, filename, history=history):
+            logging.info(f"Bullish pattern found: {message}")
+        write_top_signals(results, filename)
+
     except IOError as e:
         logging.error(f"An I/O error occurred while writing output: {e}")
     except Exception as e:
         logging.error(f"Exception occurred while writing output: {e}")
 
+    return results
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -6,81 +6,123 @@ import logging
 import pandas as pd
 from datetime import datetime
 
+from options_analysis.config.settings import EXPIRY_MIN_DAYS
+from options_analysis.analysis.patterns import green_bullish_contracts
+from options_analysis.data.adapters import from_kite
+from options_analysis.data.candle_store import CandleStore
+
 def get_ltp(kite, symbol: str, exchange: str = "NSE"):
     """Get the last traded price for a given symbol"""
     instrument_token = f"{exchange}:{symbol}"
     data = kite.ltp([instrument_token])
     return data[instrument_token]["last_price"]
 
+def resolve_expiries(instruments_df, today=None, min_days=EXPIRY_MIN_DAYS):
+    """Resolve the weekly/near/next expiry of every underlying in one grouped pass
+
+    Returns a lookup table indexed by underlying name with one column per selection:
+    weekly is the nearest live expiry, near is the first monthly expiry at least
+    min_days away (or the only one), next is the monthly expiry after near.
+    """
+    today = pd.Timestamp(today or datetime.today().date())
+
+    expiry_df = instruments_df[["name", "expiry"]].dropna().drop_duplicates()
+    expiry_df = expiry_df.assign(expiry=pd.to_datetime(expiry_df["expiry"]))
+    expiry_df = expiry_df[expiry_df["expiry"] >= today]
+
+    weekly = expiry_df.groupby("name")["expiry"].min()
+
+    # Monthly expiries are the last expiry of each calendar month
+    monthly = (expiry_df.groupby(["name", expiry_df["expiry"].dt.to_period("M")])["expiry"].max()
+               .reset_index(level=1, drop=True).reset_index()
+               .sort_values(["name", "expiry"]))
+    monthly["rank"] = monthly.groupby("name").cumcount()
+
+    first_monthly = monthly[monthly["rank"] == 0].set_index("name")["expiry"]
+    monthly_count = monthly.groupby("name").size()
+    near_rank = (((first_monthly - today).dt.days < min_days) & (monthly_count > 1)).astype(int)
+    monthly["offset"] = monthly["rank"] - monthly["name"].map(near_rank)
+
+    expiry_table = pd.DataFrame({
+        "weekly": weekly,
+        "near": monthly[monthly["offset"] == 0].set_index("name")["expiry"],
+        "next": monthly[monthly["offset"] == 1].set_index("name")["expiry"],
+    })
+    expiry_table = expiry_table.apply(lambda col: col.dt.date)
+
+    logging.info(f"Resolved expiries for {len(expiry_table)} underlyings")
+    return expiry_table
+
+def lookup_expiries(expiry_table, symbol, selections):
+    """Get the set of selected expiry dates for one underlying from the resolved table"""
+    if symbol not in expiry_table.index:
+        return set()
+
+    row = expiry_table.loc[symbol]
+    return {row[selection] for selection in selections if pd.notna(row[selection])}
+
 def get_expiry_date(instruments_df, symbol="ABB"):
     """Get appropriate expiry date for options"""
-    matched_df = instruments_df[(instruments_df["name"] == symbol)]
-    
-    if matched_df.empty:
-        return None
-    
-    symbol_df = pd.DataFrame()
-    symbol_df["expiry"] = pd.to_datetime(matched_df["expiry"])
-    expiries = sorted(symbol_df["expiry"].unique())
-    
+    expiries = lookup_expiries(resolve_expiries(instruments_df), symbol, ["near"])
+
     if not expiries:
         return None
 
-    selected_expiry = expiries[0]
-    today = pd.Timestamp(datetime.today().date())
-    
-    if (selected_expiry - today).days < 10 and len(expiries) > 1:
-        selected_expiry = expiries[1]
-
-    logging.info(f"selected_expiry: {selected_expiry.date()}")
-    return selected_expiry.date()
+    selected_expiry = expiries.pop()
+    logging.info(f"selected_expiry: {selected_expiry}")
+    return selected_expiry
 
-def filter_option_strikes(df, symbol: str, min_strike: float, option_type: str = "CE", expiry: str = None):
-    """Filter option contracts for a given symbol"""
+def filter_option_strikes(df, symbol: str, min_strike: float, option_type: str = "CE", expiry=None):
+    """Filter option contracts for a given symbol, expiry can be one date or a collection of dates"""
     if option_type not in ["CE", "PE"]:
         raise ValueError("option_type must be 'CE' or 'PE'")
 
+    if isinstance(expiry, (list, set, tuple)):
+        expiry_mask = df["expiry"].isin(expiry)
+    else:
+        expiry_mask = df["expiry"] == expiry
+
     if option_type == "CE":
         symbol_df = df[(df["name"] == symbol) & 
                       (df["strike"] > min_strike) & 
                       (df["instrument_type"] == option_type) &
-                      (df["expiry"] == expiry)]
+                      expiry_mask]
     else:
         symbol_df = df[(df["name"] == symbol) & 
                       (df["strike"] < min_strike) & 
                       (df["instrument_type"] == option_type) &
-                      (df["expiry"] == expiry)]
+                      expiry_mask]
     
     if symbol_df.empty:
         return pd.DataFrame()
 
-    return symbol_df.sort_values(by="strike")
+    return symbol_df.sort_values(by=["expiry", "strike"])
 
 def find_green_bullish_candles(final_df):
-    """Identify green bullish candle patterns"""
-    bullish_message = None
-    if len(final_df) == 4:
-        openFlag = False
-        closeFlag = False
-
-        # Handle zero values
-        for i in range(4):
-            row = final_df.iloc[i]
-            if (row['open'] == '0.00') and (row['high'] == '0.00') and (row['low'] == '0.00'):
-                final_df.at[final_df.index[i], 'open'] = row['close']
-
-        # Validate if each week is GREEN candle
-        if ((float(final_df.iloc[3]['close']) > float(final_df.iloc[2]['open'])) and
-                (float(final_df.iloc[1]['close']) > float(final_df.iloc[0]['open']))):
-
-            # Check price conditions
-            if final_df.iloc[2]['open'] <= final_df.iloc[0]['open']:
-                openFlag = True
-         
-            if final_df.iloc[3]['close'] >= final_df.iloc[1]['close']:
-                closeFlag = True
-           
-            if (openFlag & closeFlag):
-                bullish_message = f"***** GREEN bullish ****** {final_df.iloc[0]['name']}, {final_df.iloc[0]['strike']}, {final_df.iloc[0]['expiry']} ***** "
-
-    return bullish_message
\ No newline at end of file
+    """Identify green bullish candle patterns in one contract's four weekly anchor candles"""
+    if len(final_df) != 4:
+        return None
+    messages = bullish_messages(green_bullish_contracts(CandleStore(from_kite(final_df))))
+    return messages[0] if messages else None
+
+def bullish_messages(contracts):
+    """Output lines of matched contracts, with their OI confirmation when it was ranked in"""
+    messages = []
+    for contract in contracts.itertuples(index=False):
+        message = f"***** GREEN bullish ****** {contract.name}, {contract.strike}, {contract.expiry} ***** "
+        if "buildup" in contracts.columns and isinstance(contract.buildup, str):
+            message += f"OI {contract.oi_change_pct:+.1f}% {contract.buildup}"
+            if pd.notna(contract.pcr):
+                message += f", PCR {contract.pcr:.2f}"
+        messages.append(message)
+    return messages
+
+def nse_bullish_messages(contracts):
+    """Output lines of root main.py's NSE scan, one per matched strike"""
+    return "".join(f"***** GREEN bullish ****** {contract.name}, {contract.strike:.2f}, "
+                   f"{contract.expiry:%d-%b-%Y} ***** Line {contract.strike:.2f}\n"
+                   for contract in contracts.itertuples(index=False))
+
+def find_green_bullish_contracts(store):
+    """find_green_bullish_candles for every contract of a CandleStore at once"""
+    return bullish_messages(green_bullish_contracts(store))
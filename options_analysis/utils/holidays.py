@@ -0,0 +1,215 @@
+"""
+Trading holiday provider: parses each year's holidays once and caches the normalized table
+"""
+
+import importlib.util
+import logging
+import os
+import re
+import time
+import pandas as pd
+
+from options_analysis.config.settings import HOLIDAY_CACHE_DIR, HOLIDAY_CACHE_TTL, NSE_HOLIDAY_TTL
+
+ZERODHA_HOLIDAYS_URL = "https://zerodha.com/marketintel/holiday-calendar/"
+
+# Curated holiday sheets shipped with the package (nse_holidays_<year>.xlsx)
+HOLIDAY_SHEET_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HOLIDAY_COLUMNS = ["Date", "Day", "Description", "Exchanges"]
+DATE_FORMATS = ["%d-%b-%Y", "%d %b %Y", "%b %d, %Y", "%d/%m/%Y", "%Y-%m-%d", "%d %B %Y", "%B %d, %Y",
+                "%d-%b-%y", "%d %b %y", "%d/%m/%y"]
+DATE_PATTERN = (r"(\d{1,2}[-\s/][A-Za-z]{3,}[-\s/]\d{2,4}|[A-Za-z]{3,} \d{1,2}, \d{4}|"
+                r"\d{1,2}[-\s/]\d{1,2}[-\s/]\d{2,4}|\d{4}[-\s/]\d{1,2}[-\s/]\d{1,2})")
+
+ZERODHA_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
+    "Referer": "https://zerodha.com/",
+}
+
+# Parsed tables by (source, year), only non-empty ones so failed loads are retried
+_tables = {}
+
+def _is_fresh(cache_file, source_file=None):
+    """A cached table is stale once its holiday sheet changed, or HOLIDAY_CACHE_TTL after a download"""
+    if not os.path.exists(cache_file):
+        return False
+    if source_file is not None:
+        return os.path.exists(source_file) and os.path.getmtime(cache_file) >= os.path.getmtime(source_file)
+    return time.time() - os.path.getmtime(cache_file) < HOLIDAY_CACHE_TTL
+
+def _cached_table(name, year, load, source_file=None):
+    """Load a year's holiday table from memory or the CSV cache, parsing and caching it on a miss
+
+    source_file is the file the table is parsed from, None for downloaded tables.
+    """
+    cache_file = os.path.join(HOLIDAY_CACHE_DIR, f"{name}_{year}.csv")
+    fresh = _is_fresh(cache_file, source_file)
+    if fresh and (name, year) in _tables:
+        return _tables[name, year]
+
+    if fresh:
+        holidays_df = pd.read_csv(cache_file, dtype=str).fillna("")
+    else:
+        holidays_df = load(year)
+        if not holidays_df.empty:
+            os.makedirs(HOLIDAY_CACHE_DIR, exist_ok=True)
+            holidays_df.to_csv(cache_file, index=False)
+            logging.info(f"Cached {len(holidays_df)} {name} for {year} to {cache_file}")
+        elif source_file is None and os.path.exists(cache_file):
+            # A failed download falls back to the expired table, fetched again on the next call
+            logging.warning(f"Using expired {name} for {year} from {cache_file}")
+            return pd.read_csv(cache_file, dtype=str).fillna("")
+
+    if not holidays_df.empty:
+        _tables[name, year] = holidays_df
+    return holidays_df
+
+def _zerodha_holidays(year, offline=False):
+    # Offline only the CSV cache is used, an expired one included
+    load = (lambda year: pd.DataFrame(columns=HOLIDAY_COLUMNS)) if offline else _download_zerodha_holidays
+    return _cached_table("zerodha_holidays", year, load)
+
+def _load_holidays(year, offline=False):
+    holidays_df = _cached_table("holidays", year, _read_holiday_sheet, _holiday_sheet_file(year))
+    return holidays_df if not holidays_df.empty else _zerodha_holidays(year, offline)
+
+def get_zerodha_holidays(year):
+    """Get Zerodha's holiday calendar for a year, scraped and cached on disk for HOLIDAY_CACHE_TTL"""
+    return _zerodha_holidays(int(year)).copy()
+
+def get_holidays(year):
+    """Get the trading holidays of a year as a Date/Day/Description/Exchanges table
+
+    The curated nse_holidays_<year>.xlsx sheet is used when there is one, otherwise
+    Zerodha's holiday calendar. Either way the parsed table is cached on disk until
+    the sheet changes or the download is HOLIDAY_CACHE_TTL old.
+    """
+    return _load_holidays(int(year)).copy()
+
+def get_holiday_dates(year, offline=False):
+    """Get the set of holiday dates of a year, offline from the holiday sheet or cache only"""
+    return set(pd.to_datetime(_load_holidays(int(year), offline)["Date"]).dt.date)
+
+def _holiday_sheet_file(year):
+    return os.path.join(HOLIDAY_SHEET_DIR, f"nse_holidays_{year}.xlsx")
+
+def _read_holiday_sheet(year):
+    sheet_file = _holiday_sheet_file(year)
+    if not os.path.exists(sheet_file):
+        return pd.DataFrame(columns=HOLIDAY_COLUMNS)
+
+    try:
+        sheet_df = pd.read_excel(sheet_file)
+    except Exception as e:
+        logging.error(f"Error reading holidays from {sheet_file}: {e}")
+        return pd.DataFrame(columns=HOLIDAY_COLUMNS)
+
+    sheet_df["Date"] = pd.to_datetime(sheet_df["Date"]).dt.strftime("%Y-%m-%d")
+    sheet_df["Day"] = sheet_df["Day"].astype(str).str.strip()
+    sheet_df["Exchanges"] = "All"
+    return sheet_df[HOLIDAY_COLUMNS]
+
+def _download_zerodha_holidays(year):
+    from options_analysis.utils.http_client import fetch_text
+
+    try:
+        html = fetch_text(ZERODHA_HOLIDAYS_URL, ttl=NSE_HOLIDAY_TTL, headers=ZERODHA_HEADERS)
+    except Exception as e:
+        logging.error(f"Error fetching Zerodha holidays: {e}")
+        return pd.DataFrame(columns=HOLIDAY_COLUMNS)
+
+    return parse_zerodha_holidays(html, year)
+
+def parse_zerodha_holidays(html, year, parser=None):
+    """Parse the holiday table for a year out of Zerodha's holiday calendar page
+
+    parser is "lxml" or "html.parser", by default lxml when it is installed.
+    """
+    if parser is None:
+        parser = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+    table_rows = _lxml_table_rows(html, year) if parser == "lxml" else _bs4_table_rows(html, year)
+    if not table_rows:
+        logging.warning(f"Could not find holiday table for year {year}")
+        return pd.DataFrame(columns=HOLIDAY_COLUMNS)
+
+    headers, rows = table_rows
+    rows = [cells for cells in rows if len(cells) >= 3]
+    if not rows:
+        return pd.DataFrame(columns=HOLIDAY_COLUMNS)
+
+    width = max(len(cells) for cells in rows)
+    headers = (headers + [f"Column_{i}" for i in range(len(headers), width)])[:width]
+    table_df = pd.DataFrame([cells + [""] * (width - len(cells)) for cells in rows], columns=range(width))
+
+    # Parse every date in the column at once, one vectorized pass per format
+    raw_dates = table_df[0].str.replace(r"\s+", " ", regex=True).str.strip()
+    raw_dates = raw_dates.str.extract(DATE_PATTERN, expand=False).fillna(raw_dates)
+    dates = pd.Series(pd.NaT, index=table_df.index, dtype="datetime64[ns]")
+    for date_format in DATE_FORMATS:
+        dates = dates.fillna(pd.to_datetime(raw_dates, format=date_format, errors="coerce"))
+
+    keep = dates.dt.year == year
+    holidays_df = pd.DataFrame({
+        "Date": dates[keep].dt.strftime("%Y-%m-%d"),
+        "Day": dates[keep].dt.strftime("%A"),
+        "Description": table_df.loc[keep, 1] if width > 1 else "",
+        "Exchanges": "All",
+    })
+
+    for i, header in enumerate(headers[1:], start=1):
+        if re.search(r"desc|occasion|holiday|reason", header, re.I):
+            holidays_df["Description"] = table_df.loc[keep, i]
+        elif re.search(r"day|week", header, re.I):
+            holidays_df["Day"] = table_df.loc[keep, i]
+        elif re.search(r"exchange|market", header, re.I):
+            holidays_df["Exchanges"] = table_df.loc[keep, i]
+
+    return holidays_df[HOLIDAY_COLUMNS].reset_index(drop=True)
+
+def _split_header(rows):
+    """The first row of the table holds the column headers"""
+    return (rows[0], rows[1:]) if rows else ([], [])
+
+def _lxml_table_rows(html, year):
+    import lxml.html
+
+    document = lxml.html.fromstring(html)
+    table = None
+    for header in document.xpath("//h1|//h2|//h3|//h4|//h5|//h6"):
+        if str(year) in header.text_content():
+            following = header.xpath("following::table[1]")
+            table = following[0] if following else None
+            break
+
+    if table is None:
+        for candidate in document.xpath("//table"):
+            if str(year) in candidate.text_content()[:100]:
+                table = candidate
+                break
+    if table is None:
+        return None
+
+    rows = [[cell.text_content().strip() for cell in row.xpath("./td|./th")] for row in table.xpath(".//tr")]
+    return _split_header(rows)
+
+def _bs4_table_rows(html, year):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    table = None
+    for header in soup.find_all(["h1", "h2", "h3", "h4", "h5", "h6"]):
+        if str(year) in header.text:
+            table = header.find_next("table")
+            break
+
+    if table is None:
+        for candidate in soup.find_all("table"):
+            if str(year) in candidate.text[:100]:
+                table = candidate
+                break
+    if table is None:
+        return None
+
+    rows = [[cell.text.strip() for cell in row.find_all(["td", "th"])] for row in table.find_all("tr")]
+    return _split_header(rows)
@@ -0,0 +1,123 @@
+"""
+Pooled HTTP sessions with cookie warm-up and an on-disk response cache for NSE/Zerodha pages
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from options_analysis.config.settings import (HTTP_CACHE_DIR, HTTP_POOL_SIZE, HTTP_TIMEOUT, HTTP_USER_AGENT)
+
+# NSE only answers API calls once the home page has set its cookies
+WARMUP_URLS = {
+    "www.nseindia.com": "https://www.nseindia.com",
+}
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+# Per-host locks and the hosts whose cookies are primed, so a slow warm-up only blocks its own host
+_warm_up_locks = {}
+_warmed_up = set()
+
+def get_session(host):
+    """Get the shared keep-alive session for a host, priming its cookies on first use"""
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=2)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({
+                "User-Agent": HTTP_USER_AGENT,
+                "Accept-Language": "en-US,en;q=0.9",
+                "Accept-Encoding": "gzip, deflate",
+                "Connection": "keep-alive",
+            })
+            _sessions[host] = session
+            _warm_up_locks[host] = threading.Lock()
+        warm_up_lock = _warm_up_locks[host]
+
+    if host not in _warmed_up:
+        with warm_up_lock:
+            if host not in _warmed_up:
+                _warm_up(session, host)
+                _warmed_up.add(host)
+    return session
+
+def _warm_up(session, host):
+    """Visit the site's home page so the session carries its cookies"""
+    warmup_url = WARMUP_URLS.get(host)
+    if warmup_url is None:
+        return
+    try:
+        session.get(warmup_url, timeout=HTTP_TIMEOUT)
+    except requests.exceptions.RequestException as e:
+        logging.warning(f"Cookie warm-up for {host} failed: {e}")
+
+def _cache_paths(url, cache_dir):
+    key = hashlib.sha1(url.encode()).hexdigest()
+    return os.path.join(cache_dir, f"{key}.body"), os.path.join(cache_dir, f"{key}.meta")
+
+def fetch_text(url, ttl=0, headers=None, cache_dir=HTTP_CACHE_DIR):
+    """GET a URL through the pooled session and return the body text
+
+    Responses younger than ttl seconds are served from the on-disk cache. Older
+    ones are revalidated with If-None-Match/If-Modified-Since, so an unchanged
+    page costs a 304 instead of a full download.
+    """
+    body_path, meta_path = _cache_paths(url, cache_dir)
+    meta = None
+    if ttl and os.path.exists(meta_path) and os.path.exists(body_path):
+        with open(meta_path) as meta_file:
+            meta = json.load(meta_file)
+        if time.time() - meta["fetched_at"] < ttl:
+            with open(body_path, encoding="utf-8") as body_file:
+                return body_file.read()
+
+    request_headers = dict(headers or {})
+    if meta is not None:
+        if meta.get("etag"):
+            request_headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            request_headers["If-Modified-Since"] = meta["last_modified"]
+
+    host = urlparse(url).netloc
+    session = get_session(host)
+    response = session.get(url, headers=request_headers, timeout=HTTP_TIMEOUT)
+    if response.status_code in (401, 403) and host in WARMUP_URLS:
+        # Cookies expired, prime them again and retry once
+        _warm_up(session, host)
+        response = session.get(url, headers=request_headers, timeout=HTTP_TIMEOUT)
+
+    if response.status_code == 304 and meta is not None:
+        with open(body_path, encoding="utf-8") as body_file:
+            text = body_file.read()
+    else:
+        response.raise_for_status()
+        text = response.text
+
+    if ttl:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(body_path, "w", encoding="utf-8") as body_file:
+            body_file.write(text)
+        with open(meta_path, "w") as meta_file:
+            json.dump({
+                "url": url,
+                "fetched_at": time.time(),
+                "etag": response.headers.get("ETag", meta and meta.get("etag")),
+                "last_modified": response.headers.get("Last-Modified", meta and meta.get("last_modified")),
+            }, meta_file)
+
+    return text
+
+def fetch_json(url, ttl=0, headers=None, cache_dir=HTTP_CACHE_DIR):
+    """GET a URL through the pooled session and decode its JSON body"""
+    return json.loads(fetch_text(url, ttl=ttl, headers=headers, cache_dir=cache_dir))
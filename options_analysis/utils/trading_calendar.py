@@ -0,0 +1,151 @@
+"""
+Trading calendar: precomputed session arrays answering week anchor queries by index arithmetic
+"""
+
+import logging
+import time
+from datetime import datetime
+
+import numpy as np
+import pytz
+
+from options_analysis.config.settings import HOLIDAY_RETRY_SECONDS
+from options_analysis.utils.holidays import get_holiday_dates
+
+# 1970-01-01 was a Thursday, so (days since epoch + 3) counts from a Monday
+EPOCH_MONDAY_OFFSET = 3
+
+def _week_of(days):
+    return (days + EPOCH_MONDAY_OFFSET) // 7
+
+class TradingCalendar:
+    """Every trading session between two years, indexed by Monday-based week number"""
+
+    def __init__(self, start_year, end_year, holidays=None, offline=False):
+        # Years whose holidays couldn't be loaded, their sessions are weekdays only
+        self.missing_years = []
+        if holidays is None:
+            holidays = set()
+            for year in range(start_year, end_year + 1):
+                try:
+                    year_holidays = get_holiday_dates(year, offline)
+                except Exception as e:
+                    logging.error(f"Error fetching holidays for {year}, treating it as having none: {e}")
+                    year_holidays = set()
+                if not year_holidays:
+                    self.missing_years.append(year)
+                    if offline:
+                        logging.warning(f"No holiday sheet or cached holidays for {year}, "
+                                        f"treating every weekday of it as a session")
+                holidays |= year_holidays
+
+        days = np.arange(np.datetime64(f"{start_year}-01-01"), np.datetime64(f"{end_year + 1}-01-01"))
+        holiday_days = np.array(sorted(holidays), dtype="datetime64[D]")
+        self.start_year = start_year
+        self.end_year = end_year
+        self.holidays = holiday_days
+        self.sessions = days[np.is_busday(days, holidays=holiday_days)]
+        self.session_weeks = _week_of(self.sessions.astype(np.int64))
+
+    def is_session(self, dates):
+        """Vectorized check that dates are trading sessions"""
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        idx = np.searchsorted(self.sessions, dates).clip(max=len(self.sessions) - 1)
+        return self.sessions[idx] == dates
+
+    def is_holiday(self, dates):
+        """Vectorized check that dates are listed trading holidays (weekends are not, unless listed)"""
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        if not len(self.holidays):
+            return np.zeros(dates.shape, dtype=bool)
+        idx = np.searchsorted(self.holidays, dates).clip(max=len(self.holidays) - 1)
+        return self.holidays[idx] == dates
+
+    def week_bounds(self, weeks):
+        """First and last session of each Monday-based week number, NaT for weeks without sessions"""
+        weeks = np.asarray(weeks, dtype=np.int64)
+        first = np.searchsorted(self.session_weeks, weeks, side="left")
+        last = np.searchsorted(self.session_weeks, weeks, side="right") - 1
+        has_sessions = last >= first
+
+        nat = np.datetime64("NaT", "D")
+        first_session = np.where(has_sessions, self.sessions[first.clip(max=len(self.sessions) - 1)], nat)
+        last_session = np.where(has_sessions, self.sessions[last.clip(min=0)], nat)
+        return first_session, last_session
+
+    def completed_week(self, as_of, weeks_back=1):
+        """Week number of the Nth most recent completed trading week as of each date
+
+        A week counts as completed from its Saturday, so on a weekday weeks_back=1
+        is the previous week and on a weekend it is the current one.
+        """
+        days = np.asarray(as_of, dtype="datetime64[D]").astype(np.int64)
+        in_week = (days + EPOCH_MONDAY_OFFSET) % 7 < 5
+        return _week_of(days) - in_week - (weeks_back - 1)
+
+    def session_week(self, weeks):
+        """Latest week number up to each given one that has sessions
+
+        Weeks closed throughout (a run of holidays) give way to the nearest earlier
+        week that traded. Raises ValueError when the calendar has none before a week.
+        """
+        weeks = np.asarray(weeks, dtype=np.int64)
+        last = np.searchsorted(self.session_weeks, weeks, side="right") - 1
+        if (last < 0).any():
+            monday = np.datetime64(int(weeks[last < 0].min()) * 7 - EPOCH_MONDAY_OFFSET, "D")
+            raise ValueError(f"No trading week on or before the week of {monday} in the "
+                             f"{self.start_year}-{self.end_year} calendar")
+        return self.session_weeks[last]
+
+    def previous_week_sessions(self, as_of, weeks_back=1):
+        """First and last session of the Nth most recent completed week, vectorized over as_of"""
+        return self.week_bounds(self.completed_week(as_of, weeks_back))
+
+    def anchor_dates(self, as_of):
+        """Open/close sessions of the last two completed weeks for each as-of date
+
+        Returns first_week_open, first_week_close, last_week_open, last_week_close
+        as datetime64[D] arrays, the same anchors get_working_days gives for today.
+        Weeks without sessions are skipped, the anchors then come from the weeks before.
+        """
+        last_week = self.session_week(self.completed_week(as_of))
+        first_week = self.session_week(last_week - 1)
+        first_week_open, first_week_close = self.week_bounds(first_week)
+        last_week_open, last_week_close = self.week_bounds(last_week)
+        return first_week_open, first_week_close, last_week_open, last_week_close
+
+# (start_year, end_year, offline) -> (calendar, monotonic time it expires at, None when it doesn't)
+_calendars = {}
+
+def get_trading_calendar(start_year, end_year=None, offline=False):
+    """Shared calendar covering start_year..end_year, built once per range
+
+    A calendar missing some year's holidays is only kept for HOLIDAY_RETRY_SECONDS,
+    then rebuilt so a failed or not yet published holiday list is fetched again.
+    Offline calendars never download holidays, see get_holiday_dates.
+    """
+    key = (start_year, end_year or start_year, offline)
+    calendar, expires = _calendars.get(key, (None, None))
+    if calendar is None or (expires is not None and time.monotonic() >= expires):
+        calendar = TradingCalendar(*key[:2], offline=offline)
+        expires = time.monotonic() + HOLIDAY_RETRY_SECONDS if calendar.missing_years else None
+        _calendars[key] = (calendar, expires)
+    return calendar
+
+def calendar_for(as_of, offline=False):
+    """Shared calendar covering a month before the earliest as-of date up to the latest
+
+    That is the two anchor weeks plus room to skip a week without sessions.
+    """
+    days = np.asarray(as_of, dtype="datetime64[D]")
+    start_year = int(str(days.min() - np.timedelta64(35, "D"))[:4])
+    end_year = int(str(days.max())[:4])
+    return get_trading_calendar(start_year, end_year, offline)
+
+def today_ist():
+    return datetime.now(pytz.timezone('Asia/Kolkata')).date()
+
+def get_anchor_dates(as_of=None, offline=False):
+    """Week anchors as of a date (today in IST by default) as datetime.date objects"""
+    as_of = np.atleast_1d(np.datetime64(as_of or today_ist(), "D"))
+    return tuple(anchor[0].item() for anchor in calendar_for(as_of, offline).anchor_dates(as_of))
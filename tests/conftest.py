@@ -0,0 +1,8 @@
+import os
+import sys
+
+# options_analysis/main.py imports its siblings both as options_analysis.x and as top-level packages
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (REPO_ROOT, os.path.join(REPO_ROOT, "options_analysis")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
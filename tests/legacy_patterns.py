@@ -0,0 +1,115 @@
+"""
+The per-row implementations the shared pattern/calendar core replaced, kept as references
+"""
+
+from datetime import timedelta
+
+import pandas as pd
+
+def legacy_nse_green_bullish(final_df):
+    """root main.py's find_green_bullish_candles: four rows, newest first, string prices"""
+    if len(final_df) != 4:
+        return None
+    final_df = final_df.copy()
+    for i in range(4):
+        row = final_df.iloc[i]
+        if (row['open'] == '0.00') and (row['high'] == '0.00') and (row['low'] == '0.00'):
+            final_df.at[final_df.index[i], 'open'] = row['close']
+
+    if ((float(final_df.iloc[2]['close']) > float(final_df.iloc[3]['open'])) and
+            (float(final_df.iloc[0]['close']) > float(final_df.iloc[1]['open']))):
+        open_flag = final_df.iloc[1]['open'] <= final_df.iloc[3]['open']
+        close_flag = final_df.iloc[0]['close'] >= final_df.iloc[2]['close']
+        if open_flag & close_flag:
+            return (f"***** GREEN bullish ****** {final_df.iloc[0]['SYMBOL']}, {final_df.iloc[0]['strike']}, "
+                    f"{final_df.iloc[0]['EXPIRY_DT']} ***** ")
+    return None
+
+def legacy_nse_messages(stock_df, anchors):
+    """root main.py's per-strike loop, keeping every match instead of only the last strike's"""
+    stock_df = stock_df[stock_df['TIMESTAMP'].isin(anchors)]
+    messages = []
+    for strike_price in stock_df['strike'].unique():
+        message = legacy_nse_green_bullish(stock_df[stock_df['strike'] == strike_price])
+        if message is not None:
+            messages.append(message + f"Line {strike_price}\n")
+    return "".join(messages)
+
+def legacy_kite_green_bullish(final_df):
+    """options_analysis' old find_green_bullish_candles: four rows, oldest first, numeric prices"""
+    if len(final_df) != 4:
+        return None
+    final_df = final_df.copy()
+    for i in range(4):
+        row = final_df.iloc[i]
+        if (row['open'] == '0.00') and (row['high'] == '0.00') and (row['low'] == '0.00'):
+            final_df.at[final_df.index[i], 'open'] = row['close']
+
+    if ((float(final_df.iloc[3]['close']) > float(final_df.iloc[2]['open'])) and
+            (float(final_df.iloc[1]['close']) > float(final_df.iloc[0]['open']))):
+        if (final_df.iloc[2]['open'] <= final_df.iloc[0]['open']) & (final_df.iloc[3]['close'] >= final_df.iloc[1]['close']):
+            return (f"***** GREEN bullish ****** {final_df.iloc[0]['name']}, {final_df.iloc[0]['strike']}, "
+                    f"{final_df.iloc[0]['expiry']} ***** ")
+    return None
+
+def legacy_kite_messages(weekly_ohlc_df):
+    """analyze_bullish_patterns' old per-symbol, per-(expiry, strike) loop"""
+    messages = []
+    for symbol in weekly_ohlc_df['name'].unique():
+        symbol_df = weekly_ohlc_df[weekly_ohlc_df['name'] == symbol]
+        for _, final_df in symbol_df.groupby(['expiry', 'strike'], sort=False):
+            message = legacy_kite_green_bullish(final_df)
+            if message is not None:
+                messages.append(message)
+    return messages
+
+def legacy_holiday_check(date, holidays_df):
+    """date_utils.holiday_check before the trading calendar: a lookup in the holiday table"""
+    return pd.to_datetime(date) in pd.to_datetime(holidays_df['Date']).values
+
+def legacy_working_days(today, holidays_df):
+    """options_analysis get_working_days before the trading calendar, with today passed in
+
+    Only Tuesday, Wednesday, Saturday and Sunday set prev_monday, on Monday, Thursday
+    and Friday it raised UnboundLocalError.
+    """
+    def get_nth_working_day(prev_week_num, offset):
+        days_since_offset = (today.weekday() - offset) % 7
+        total_days_back = days_since_offset + (prev_week_num - 1) * 7
+        return today - timedelta(days=total_days_back)
+
+    if today.weekday() == 5:  # Saturday
+        prev_monday = get_nth_working_day(2, 0)
+        last_monday = get_nth_working_day(1, 0)
+
+    if today.weekday() == 4:  # Friday
+        prev_friday = get_nth_working_day(3, 4)
+        last_friday = get_nth_working_day(2, 4)
+    else:
+        prev_friday = get_nth_working_day(2, 4)
+        last_friday = get_nth_working_day(1, 4)
+
+    if today.weekday() == 6:  # Sunday
+        prev_monday = get_nth_working_day(2, 0)
+        last_monday = get_nth_working_day(1, 0)
+
+    if today.weekday() == 1:  # Tuesday
+        prev_monday = get_nth_working_day(3, 0)
+        last_monday = get_nth_working_day(2, 0)
+
+    if today.weekday() == 2:  # Wednesday
+        prev_monday = get_nth_working_day(3, 0)
+        last_monday = get_nth_working_day(2, 0)
+
+    def adjust_date_for_holiday(date, forward=True):
+        delta = timedelta(days=1) if forward else timedelta(days=-1)
+        current_date = date
+        while legacy_holiday_check(current_date, holidays_df):
+            current_date = current_date + delta
+        return current_date
+
+    first_week_open_date = adjust_date_for_holiday(prev_monday, forward=True)
+    last_week_open_date = adjust_date_for_holiday(last_monday, forward=True)
+    first_week_close_date = adjust_date_for_holiday(prev_friday, forward=False)
+    last_week_close_date = adjust_date_for_holiday(last_friday, forward=False)
+    return first_week_open_date, first_week_close_date, last_week_open_date, last_week_close_date
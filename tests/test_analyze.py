@@ -0,0 +1,25 @@
+import glob
+import os
+
+from test_charts import _daily_candles
+
+def test_analyze_stays_offline_and_writes_to_output(tmp_path, monkeypatch):
+    import options_analysis.main as main
+    from options_analysis.utils import holidays, trading_calendar
+
+    def download(year):
+        raise AssertionError("analyze downloaded holidays")
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(holidays, "HOLIDAY_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(holidays, "HOLIDAY_SHEET_DIR", str(tmp_path))
+    monkeypatch.setattr(holidays, "_tables", {})
+    monkeypatch.setattr(holidays, "_download_zerodha_holidays", download)
+    monkeypatch.setattr(trading_calendar, "_calendars", {})
+    _daily_candles().to_csv("daily.csv", index=False)
+
+    main.main(["analyze", "daily.csv", "--output", "out"])
+
+    assert sorted(os.listdir(tmp_path)) == ["daily.csv", "out"]
+    assert len(glob.glob(os.path.join("out", "zerodha_NFO_filtered_*_weekly_OHLC_*.csv"))) == 2
+    assert os.path.exists(os.path.join("out", "CE_Analysis.txt"))
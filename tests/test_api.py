@@ -0,0 +1,41 @@
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+def test_next_link_is_url_encoded():
+    from options_analysis.api.server import page
+
+    query = {"name": ["M&M"], "option_type": ["CE PE"], "limit": ["2"]}
+    body = page(pd.DataFrame({"name": ["M&M"] * 5}), query, "/signals")
+
+    link = urlsplit(body["next"])
+    assert link.path == "/signals"
+    assert parse_qs(link.query) == {"name": ["M&M"], "option_type": ["CE PE"], "limit": ["2"], "offset": ["2"]}
+
+def test_concurrent_requests_reload_once(tmp_path, monkeypatch):
+    import threading
+    import time
+
+    from options_analysis.api.store import ScanData
+
+    data = ScanData(str(tmp_path), reload_seconds=60)
+    reloads = []
+
+    def slow_reload():
+        reloads.append(threading.get_ident())
+        time.sleep(0.05)
+        return True
+
+    def slow_clock(clock=time.monotonic):
+        # Lets every thread pass an unguarded check before any of them records it
+        time.sleep(0.01)
+        return clock()
+
+    monkeypatch.setattr(data, "reload", slow_reload)
+    monkeypatch.setattr("options_analysis.api.store.time.monotonic", slow_clock)
+    threads = [threading.Thread(target=data.current) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(reloads) == 1
@@ -0,0 +1,45 @@
+import glob
+import os
+
+import pandas as pd
+
+from test_charts import _daily_candles
+
+def _archived_rows(root):
+    import pyarrow.feather as feather
+
+    return sum(len(feather.read_table(f)) for f in glob.glob(os.path.join(root, "**", "part-*.arrow"), recursive=True))
+
+def test_reruns_archive_only_new_or_revised_candles(tmp_path):
+    from options_analysis.data.archive import read_archive, write_archive
+
+    root = str(tmp_path)
+    candles = _daily_candles()
+    first_run, second_run = candles[candles["date"] < candles["date"].max()], candles.copy()
+    # The second run refetches the lookback, revises one session and adds the next one
+    revised = (second_run["instrument_token"] == 101) & (second_run["date"] == first_run["date"].max())
+    second_run.loc[revised, "close"] += 5
+
+    assert write_archive(first_run, run_date="2026-10-15", root=root) == 2
+    assert write_archive(first_run, run_date="2026-10-16", root=root) == 0
+    assert write_archive(second_run, run_date="2026-10-17", root=root) == 2
+    assert _archived_rows(root) == len(first_run) + 3 + 1
+
+    history_df = read_archive(root=root)
+    assert len(history_df) == len(candles)
+    assert history_df.loc[(history_df["instrument_token"] == 101)
+                          & (history_df["date"] == first_run["date"].max()), "close"].item() == \
+        second_run.loc[revised, "close"].item()
+
+def test_same_day_rerun_keeps_that_days_candles(tmp_path):
+    from options_analysis.data.archive import read_archive, write_archive
+
+    root = str(tmp_path)
+    candles = _daily_candles()
+    write_archive(candles[candles["instrument_token"] == 101], run_date="2026-10-16", root=root)
+    write_archive(candles[candles["instrument_token"] == 102], run_date="2026-10-16", root=root)
+
+    history_df = read_archive(underlyings=["ABB"], root=root)
+    assert sorted(history_df["instrument_token"].unique()) == [101, 102]
+    pd.testing.assert_series_equal(history_df["close"], candles[candles["name"] == "ABB"]["close"],
+                                   check_index=False)
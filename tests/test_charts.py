@@ -0,0 +1,59 @@
+import os
+import sys
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+def _daily_candles(days=30):
+    sessions = pd.bdate_range(end=date.today() - timedelta(days=1), periods=days).strftime("%Y-%m-%d")
+    frames = []
+    for token, (name, option_type) in enumerate([("ABB", "CE"), ("ABB", "PE"), ("TCS", "CE")], start=101):
+        closes = 10 + np.arange(days, dtype=float)
+        frames.append(pd.DataFrame({"instrument_token": token, "date": sessions, "open": closes - 0.5,
+                                    "high": closes + 1, "low": closes - 1, "close": closes, "volume": 100.0,
+                                    "oi": 1000.0, "name": name, "strike": 100.0,
+                                    "expiry": (date.today() + timedelta(days=40)).isoformat(),
+                                    "option_type": option_type, "underlying_price": 105.0}))
+    return pd.concat(frames, ignore_index=True)
+
+def test_charts_from_archive(tmp_path, monkeypatch):
+    import options_analysis.main as main
+    from options_analysis.data.archive import write_archive
+    from options_analysis.data.results import write_results
+
+    monkeypatch.chdir(tmp_path)
+    candles = _daily_candles()
+    write_archive(candles)
+    flagged = candles[candles["instrument_token"].isin([101, 103])].drop_duplicates("instrument_token")
+    write_results(flagged.assign(as_of=candles["date"].max(), score=[2.0, 1.0])
+                  [["instrument_token", "name", "strike", "expiry", "option_type", "as_of", "score"]],
+                  "CE_Analysis.txt", json_lines=False)
+
+    main.main(["charts", "--archive", "--workers", "1", "--out", "charts"])
+
+    manifest = pd.read_csv(os.path.join("charts", "manifest.csv"))
+    assert list(manifest["instrument_token"]) == [101, 103]
+    assert (manifest["candles"] == 30).all()
+    assert all(os.path.exists(os.path.join("charts", name)) for name in manifest["file"])
+    assert os.path.exists(os.path.join("charts", "index.html"))
+
+def test_archive_filters_accept_arrays(tmp_path):
+    from options_analysis.data.archive import archive_partitions, write_archive
+
+    write_archive(_daily_candles(), root=str(tmp_path))
+    partitions = archive_partitions(str(tmp_path), underlyings=np.array(["TCS", "INFY"]))
+    assert [underlying for underlying, _, _ in partitions] == ["TCS"]
+
+def test_png_without_kaleido_fails_up_front(tmp_path, monkeypatch):
+    from options_analysis.charts import render
+    from options_analysis.data.candle_store import CandleStore
+
+    monkeypatch.setattr(render, "chart_renderer", lambda formats: "plotly")
+    monkeypatch.setitem(sys.modules, "kaleido", None)
+    candles = _daily_candles()
+    with pytest.raises(RuntimeError, match="kaleido"):
+        render.render_charts(CandleStore(candles), candles.drop_duplicates("instrument_token"),
+                             str(tmp_path / "charts"), formats=["html", "png"], workers=1)
+    assert os.listdir(tmp_path / "charts") == []
@@ -0,0 +1,34 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+def _shard_results(tokens, confirmed, oi_change_pct):
+    return pd.DataFrame({"instrument_token": tokens, "name": [f"N{t}" for t in tokens], "strike": 100.0,
+                         "expiry": "2026-10-27", "option_type": "CE", "as_of": "2026-10-16",
+                         "oi_change_pct": oi_change_pct, "buildup": "neutral", "oi_confirmed": confirmed,
+                         "score": 1.0})
+
+def test_merged_results_are_ranked_by_oi_across_shards(tmp_path, monkeypatch):
+    from options_analysis.data.results import write_results
+    from options_analysis.distributed.coordinator import merge_shard_results
+    from options_analysis.distributed.spool import Spool
+
+    monkeypatch.chdir(tmp_path)
+    spool = Spool(str(tmp_path / "spool"), "run")
+    # Each shard's table is ranked on its own, confirmed first
+    shards = {"shard-000": _shard_results([1, 2, 3], [True, False, False], [5.0, 40.0, np.nan]),
+              "shard-001": _shard_results([4, 5, 6], [True, True, False], [20.0, 5.0, 10.0])}
+    for shard, results in shards.items():
+        spool.add_task(shard, {"option_types": ["CE"]})
+        task = spool.claim("w1")
+        write_results(results, os.path.join(spool.results_dir(shard), "CE_Analysis.txt"), json_lines=False)
+        spool.complete(task, "w1", {})
+
+    merge_shard_results(spool, ["CE"])
+
+    merged = pd.read_parquet("CE_Analysis.parquet")
+    assert merged["instrument_token"].tolist() == [4, 1, 5, 2, 6, 3]
+    assert merged["rank"].tolist() == list(range(1, 7))
+    with open("CE_Analysis.txt") as text:
+        assert [line.split(", ")[0][-2:] for line in text] == ["N4", "N1", "N5", "N2", "N6", "N3"]
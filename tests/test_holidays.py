@@ -0,0 +1,39 @@
+import os
+import time
+
+import pandas as pd
+
+def _table(*dates):
+    return pd.DataFrame({"Date": list(dates), "Day": "", "Description": "", "Exchanges": "All"})
+
+def _isolated(monkeypatch, tmp_path):
+    from options_analysis.utils import holidays
+
+    monkeypatch.setattr(holidays, "HOLIDAY_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(holidays, "HOLIDAY_SHEET_DIR", str(tmp_path))
+    monkeypatch.setattr(holidays, "_tables", {})
+    return holidays
+
+def test_cache_follows_the_holiday_sheet(tmp_path, monkeypatch):
+    holidays = _isolated(monkeypatch, tmp_path)
+    sheet = tmp_path / "nse_holidays_2031.xlsx"
+    sheet.write_text("")
+    monkeypatch.setattr(holidays, "_read_holiday_sheet", lambda year: _table("2031-01-27"))
+    assert list(holidays.get_holidays(2031)["Date"]) == ["2031-01-27"]
+
+    # Editing the sheet invalidates both the CSV cache and the in-process table
+    monkeypatch.setattr(holidays, "_read_holiday_sheet", lambda year: _table("2031-01-27", "2031-03-10"))
+    os.utime(sheet, (time.time() + 10, time.time() + 10))
+    assert list(holidays.get_holidays(2031)["Date"]) == ["2031-01-27", "2031-03-10"]
+
+def test_downloaded_table_expires(tmp_path, monkeypatch):
+    holidays = _isolated(monkeypatch, tmp_path)
+    downloads = [_table("2031-01-27"), _table("2031-01-27", "2031-03-10"), _table()]
+    monkeypatch.setattr(holidays, "_download_zerodha_holidays", lambda year: downloads.pop(0))
+    assert len(holidays.get_zerodha_holidays(2031)) == 1
+    assert len(holidays.get_zerodha_holidays(2031)) == 1
+
+    monkeypatch.setattr(holidays, "HOLIDAY_CACHE_TTL", 0)
+    assert len(holidays.get_zerodha_holidays(2031)) == 2
+    # A failed download keeps serving the expired table
+    assert len(holidays.get_zerodha_holidays(2031)) == 2
@@ -0,0 +1,33 @@
+import threading
+import time
+
+def test_warm_up_blocks_only_its_own_host(monkeypatch):
+    from options_analysis.utils import http_client
+
+    monkeypatch.setattr(http_client, "_sessions", {})
+    monkeypatch.setattr(http_client, "_warm_up_locks", {})
+    monkeypatch.setattr(http_client, "_warmed_up", set())
+    warming = threading.Event()
+    release = threading.Event()
+    warm_ups = []
+
+    def slow_warm_up(session, host):
+        warm_ups.append(host)
+        if host == "slow.example":
+            warming.set()
+            release.wait(5)
+
+    monkeypatch.setattr(http_client, "_warm_up", slow_warm_up)
+    slow = [threading.Thread(target=http_client.get_session, args=("slow.example",)) for _ in range(3)]
+    for thread in slow:
+        thread.start()
+    assert warming.wait(5)
+
+    started = time.monotonic()
+    http_client.get_session("fast.example")
+    assert time.monotonic() - started < 1
+
+    release.set()
+    for thread in slow:
+        thread.join()
+    assert sorted(warm_ups) == ["fast.example", "slow.example"]
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from test_charts import _daily_candles
+
+def test_pcr_per_underlying_expiry():
+    from options_analysis.analysis.oi import oi_analytics
+
+    candles = _daily_candles(days=5)
+    # A second ABB expiry with only calls, and different OI on each side of the near one
+    far = candles[candles["instrument_token"] == 101].assign(instrument_token=104, expiry="2099-12-30", oi=7000.0)
+    candles.loc[candles["instrument_token"] == 102, "oi"] = 3000.0
+    candles = pd.concat([candles, far], ignore_index=True)
+
+    pcr = oi_analytics(candles).set_index("instrument_token")["pcr"]
+    assert pcr[101] == pcr[102] == 3.0
+    # Chains with one option type have no put-call ratio
+    assert np.isnan(pcr[103]) and np.isnan(pcr[104])
+
+def test_pcr_left_out_of_messages_without_both_sides():
+    from options_analysis.analysis.oi import oi_analytics, rank_by_oi
+    from options_analysis.utils.data_utils import bullish_messages
+
+    candles = _daily_candles(days=5)
+    contracts = candles.drop_duplicates("instrument_token")[["instrument_token", "name", "strike", "expiry"]]
+    messages = bullish_messages(rank_by_oi(contracts, oi_analytics(candles)))
+    assert ["PCR" in message for message in messages] == [True, True, False]
@@ -0,0 +1,202 @@
+"""
+The shared pattern/calendar core against the per-row implementations it replaced (tests/legacy_patterns.py)
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from options_analysis.analysis.patterns import green_bullish_contracts, scan_green_bullish
+from options_analysis.data.adapters import from_nse
+from options_analysis.data.candle_store import CandleStore
+from options_analysis.utils.data_utils import bullish_messages, nse_bullish_messages
+from options_analysis.utils.trading_calendar import TradingCalendar
+from legacy_patterns import (legacy_nse_messages, legacy_kite_messages, legacy_holiday_check,
+                             legacy_working_days)
+
+EXPIRY = "30-Oct-2026"
+# Newest first, like nselib returns them, with non-anchor sessions in between
+SESSIONS = ["16-Oct-2026", "15-Oct-2026", "14-Oct-2026", "13-Oct-2026", "12-Oct-2026",
+            "09-Oct-2026", "08-Oct-2026", "07-Oct-2026", "06-Oct-2026", "05-Oct-2026"]
+ANCHORS = ["05-Oct-2026", "09-Oct-2026", "12-Oct-2026", "16-Oct-2026"]
+
+def nse_frame(symbol, opens, closes, sessions=SESSIONS, flat=None, strikes=None):
+    """Rows as root main.py's get_options_data_from_nse returns them, prices as formatted strings
+
+    opens/closes are (strikes x sessions) arrays, newest session first.
+    """
+    strikes = strikes if strikes is not None else np.arange(len(opens)) * 10.0 + 1000
+    flat = flat if flat is not None else np.zeros(opens.shape, dtype=bool)
+    opens, closes = opens.ravel(), closes.ravel()
+    highs = np.where(flat.ravel(), 0.0, np.maximum(opens, closes) + 1)
+    lows = np.where(flat.ravel(), 0.0, np.minimum(opens, closes) - 1)
+    opens = np.where(flat.ravel(), 0.0, opens)
+    frame = pd.DataFrame({"TIMESTAMP": np.tile(sessions, len(strikes)), "SYMBOL": symbol,
+                          "strike": np.repeat(strikes, len(sessions)), "EXPIRY_DT": EXPIRY,
+                          "open": opens, "high": highs, "low": lows, "close": closes})
+    for column in ("strike", "open", "high", "low", "close"):
+        frame[column] = frame[column].map("{:.2f}".format)
+    return frame
+
+def core_nse_messages(frame, anchors=ANCHORS):
+    """What root main.py's process_logic runs"""
+    return nse_bullish_messages(scan_green_bullish(from_nse(frame, option_type="CE"), anchors))
+
+def kite_frame(frame, anchors=ANCHORS):
+    """The same candles as Kite weekly OHLC rows: oldest first, float prices, ISO dates"""
+    candles = from_nse(frame, option_type="CE")
+    candles = candles[candles["date"].isin(pd.to_datetime(anchors).strftime("%Y-%m-%d"))]
+    return candles.sort_values(["instrument_token", "date"], kind="stable", ignore_index=True)
+
+def random_prices(rng, strikes, sessions=len(SESSIONS)):
+    # Three digit prices, where the old string comparisons agree with numeric order
+    opens = rng.uniform(100, 999, (strikes, sessions))
+    closes = (opens * rng.uniform(0.85, 1.15, opens.shape)).clip(100, 999.99)
+    return opens, closes
+
+@pytest.mark.parametrize("seed", range(5))
+def test_nse_frames_match_root_loop(seed):
+    rng = np.random.default_rng(seed)
+    for symbol in ("ABB", "TCS", "M&M"):
+        opens, closes = random_prices(rng, 40)
+        frame = nse_frame(symbol, opens, closes, flat=rng.random(opens.shape) < 0.1)
+        assert core_nse_messages(frame) == legacy_nse_messages(frame, ANCHORS)
+
+# Anchor sessions newest first: last week close, last week open, first week close, first week open
+WEEK_ANCHORS = ANCHORS[::-1]
+
+def anchor_frame(opens, closes, flat=(False, False, False, False)):
+    return nse_frame("ABB", np.array([opens], dtype=float), np.array([closes], dtype=float),
+                     sessions=WEEK_ANCHORS, flat=np.array([flat]))
+
+def test_flat_candles_take_their_close_as_open():
+    # The newer week's open session had no trades, its close (230) becomes its open, above the older open
+    frame = anchor_frame([240, 0, 205, 200], [260, 230, 250, 210], flat=[False, True, False, False])
+    assert legacy_nse_messages(frame, ANCHORS) == core_nse_messages(frame) == ""
+
+    frame = anchor_frame([240, 0, 205, 200], [260, 190, 250, 210], flat=[False, True, False, False])
+    assert legacy_nse_messages(frame, ANCHORS) == core_nse_messages(frame) != ""
+
+def test_flat_kite_candles_are_filled_like_nse_ones():
+    """The old Kite loop compared float prices with '0.00', so it never filled flat opens"""
+    frame = anchor_frame([240, 0, 205, 200], [260, 230, 250, 210], flat=[False, True, False, False])
+    weekly = kite_frame(frame)
+
+    assert bullish_messages(green_bullish_contracts(CandleStore(weekly))) == []
+    assert legacy_kite_messages(weekly) != []
+
+def test_prices_compare_as_numbers_not_strings():
+    """root main.py compared opens and closes as strings, where "95.00" > "105.00" """
+    # Both weeks green, the newer one opening at 95 below 105 and closing at 112 above 110
+    frame = anchor_frame([100, 95, 100, 105], [112, 96, 110, 104])
+
+    assert legacy_nse_messages(frame, ANCHORS) == ""
+    assert core_nse_messages(frame) == "***** GREEN bullish ****** ABB, 1000.00, 30-Oct-2026 ***** Line 1000.00\n"
+
+def test_string_prices_with_separators_and_no_trades():
+    """nselib prices may carry thousands separators or '-' for no trade, the old loop raised on both"""
+    frame = pd.DataFrame({"TIMESTAMP": WEEK_ANCHORS, "SYMBOL": "NIFTY", "strike": "25,000.00", "EXPIRY_DT": EXPIRY,
+                          "open": ["1,200.00", "1,050.00", "1,300.00", "1,100.00"],
+                          "high": ["1,360.00", "1,300.00", "1,310.00", "1,250.00"],
+                          "low": ["1,000.00", "1,040.00", "1,000.00", "1,090.00"],
+                          "close": ["1,350.00", "1,060.00", "1,290.00", "1,200.00"]})
+    with pytest.raises(ValueError):
+        legacy_nse_messages(frame, ANCHORS)
+    assert core_nse_messages(frame) == ("***** GREEN bullish ****** NIFTY, 25000.00, 30-Oct-2026 ***** "
+                                        "Line 25000.00\n")
+
+    frame.loc[0, "close"] = "-"
+    assert core_nse_messages(frame) == ""
+
+@pytest.mark.parametrize("seed", range(5))
+def test_kite_frames_with_nans_match_old_loop(seed):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for symbol in ("ABB", "TCS"):
+        opens, closes = random_prices(rng, 40)
+        frames.append(nse_frame(symbol, opens, closes))
+    weekly = kite_frame(pd.concat(frames, ignore_index=True))
+    for column in ("open", "close"):
+        weekly.loc[rng.random(len(weekly)) < 0.05, column] = np.nan
+
+    assert bullish_messages(green_bullish_contracts(CandleStore(weekly))) == legacy_kite_messages(weekly)
+
+def test_contracts_missing_an_anchor_never_match():
+    opens, closes = random_prices(np.random.default_rng(0), 40)
+    weekly = kite_frame(nse_frame("ABB", opens, closes))
+    weekly = weekly.drop(weekly.index[::7])
+
+    assert bullish_messages(green_bullish_contracts(CandleStore(weekly))) == legacy_kite_messages(weekly)
+
+HOLIDAYS = pd.DataFrame({"Date": ["2026-10-02", "2026-10-12", "2026-10-20", "2026-10-23", "2026-11-08"]})
+
+def test_holiday_lookup_matches_table_check():
+    holidays = set(pd.to_datetime(HOLIDAYS["Date"]).dt.date)
+    calendar = TradingCalendar(2026, 2026, holidays)
+    days = pd.date_range("2026-01-01", "2026-12-31")
+    # 2026-11-08 is a Sunday, a listed holiday either way
+    expected = [legacy_holiday_check(day, HOLIDAYS) for day in days]
+    assert calendar.is_holiday(days.values.astype("datetime64[D]")).tolist() == expected
+
+def expected_anchor_dates(as_of, holidays_df):
+    """The anchors the trading calendar is meant to give, for any as-of date
+
+    Monday and Friday of the last two completed weeks (a week counts as completed from
+    its Saturday), Mondays moved forward and Fridays back one day at a time while they
+    are holidays. This is a spec, not the old code: that only ran on some weekdays, see
+    test_anchors_match_old_working_days.
+    """
+    def adjust(day, forward):
+        while legacy_holiday_check(day, holidays_df):
+            day += timedelta(days=1 if forward else -1)
+        return day
+
+    last_monday = as_of - timedelta(days=as_of.weekday()) - timedelta(weeks=1 if as_of.weekday() < 5 else 0)
+    prev_monday = last_monday - timedelta(weeks=1)
+    return (adjust(prev_monday, True), adjust(prev_monday + timedelta(days=4), False),
+            adjust(last_monday, True), adjust(last_monday + timedelta(days=4), False))
+
+def test_anchors_around_holidays_match_expected_weeks():
+    calendar = TradingCalendar(2026, 2026, set(pd.to_datetime(HOLIDAYS["Date"]).dt.date))
+    as_of = [date(2026, 9, 20) + timedelta(days=i) for i in range(70)]
+
+    anchors = calendar.anchor_dates(np.array(as_of, dtype="datetime64[D]"))
+    for i, day in enumerate(as_of):
+        assert tuple(anchor[i].item() for anchor in anchors) == expected_anchor_dates(day, HOLIDAYS), day
+
+def test_anchors_match_old_working_days():
+    """The old get_working_days on the weekdays it ran, verbatim
+
+    Intentional change: on Monday, Thursday and Friday it raised UnboundLocalError
+    (prev_monday was never set), the calendar gives the last two completed weeks there
+    too. Root utility.py's copy ran every day but on Monday and Saturday took its
+    Monday and Friday anchors from different weeks.
+    """
+    calendar = TradingCalendar(2026, 2026, set(pd.to_datetime(HOLIDAYS["Date"]).dt.date))
+    as_of = [date(2026, 9, 20) + timedelta(days=i) for i in range(70)]
+
+    anchors = calendar.anchor_dates(np.array(as_of, dtype="datetime64[D]"))
+    for i, day in enumerate(as_of):
+        if day.weekday() in (1, 2, 5, 6):
+            assert tuple(anchor[i].item() for anchor in anchors) == legacy_working_days(day, HOLIDAYS), day
+        else:
+            with pytest.raises(UnboundLocalError):
+                legacy_working_days(day, HOLIDAYS)
+
+def test_pattern_across_a_holiday_week():
+    """Monday 12-Oct is a holiday, so the newer week opens on Tuesday"""
+    calendar = TradingCalendar(2026, 2026, set(pd.to_datetime(HOLIDAYS["Date"]).dt.date))
+    anchors = [anchor[0].item() for anchor in calendar.anchor_dates(np.array(["2026-10-17"], dtype="datetime64[D]"))]
+    assert anchors == list(legacy_working_days(date(2026, 10, 17), HOLIDAYS))
+    assert anchors[2] == date(2026, 10, 13)
+
+    sessions = [day.strftime("%d-%b-%Y") for day in pd.bdate_range("2026-10-05", "2026-10-16")[::-1]
+                if day.date() != date(2026, 10, 12)]
+    anchor_labels = [anchor.strftime("%d-%b-%Y") for anchor in anchors]
+    rng = np.random.default_rng(7)
+    opens, closes = random_prices(rng, 60, len(sessions))
+    frame = nse_frame("ABB", opens, closes, sessions=sessions)
+
+    assert core_nse_messages(frame, anchors) == legacy_nse_messages(frame, anchor_labels)
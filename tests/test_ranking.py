@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from options_analysis.analysis.ranking import black_scholes, signal_metrics, score_signals, underlying_closes
+from options_analysis.data.candle_store import CandleStore
+
+DATES = ["2026-10-05", "2026-10-09", "2026-10-12", "2026-10-16"]
+EXPIRY = "2026-10-27"
+
+def _candles(spots, rate=0.065, vol=0.3, scan_price=150.0):
+    """Black-Scholes priced CE and PE candles at two strikes, underlying_price holding an unrelated scan LTP"""
+    rows = []
+    for token, (strike, option_type) in enumerate([(100, "CE"), (110, "CE"), (100, "PE"), (110, "PE")], start=1):
+        for date, spot in zip(DATES, spots):
+            years = (pd.Timestamp(EXPIRY) - pd.Timestamp(date)).days / 365
+            close = float(black_scholes(spot, strike, years, rate, vol, option_type == "CE"))
+            rows.append({"instrument_token": token, "name": "ABB", "strike": float(strike), "expiry": EXPIRY,
+                         "option_type": option_type, "date": date, "open": close, "high": close, "low": close,
+                         "close": close, "volume": 100.0, "underlying_price": scan_price})
+    return pd.DataFrame(rows)
+
+def test_iv_uses_the_underlying_close_on_the_as_of_date():
+    candles = _candles([95.0, 98.0, 101.0, 104.0])
+    closes = underlying_closes(candles)
+    assert abs(closes[("ABB", EXPIRY, "2026-10-16")] - 104.0) < 1e-6
+
+    store = CandleStore(candles)
+    metrics = signal_metrics(store, store.contracts, closes)
+    assert (metrics["as_of"] == "2026-10-16").all()
+    np.testing.assert_allclose(metrics["iv"], 30.0, atol=1e-3)
+
+def test_iv_left_empty_without_an_as_of_close():
+    candles = _candles([95.0, 98.0, 101.0, 104.0])
+    # Only calls fetched, and the other side's close missing on the as-of date: no parity close there
+    calls = candles[candles["option_type"] == "CE"]
+    no_put_close = candles[~((candles["option_type"] == "PE") & (candles["date"] == DATES[-1]))]
+    for frame in (calls, no_put_close):
+        store = CandleStore(frame)
+        matched = store.contracts[store.contracts["option_type"] == "CE"]
+        signals = signal_metrics(store, matched, underlying_closes(frame))
+        assert signals["iv"].isna().all()
+        without_iv = signals.drop(columns="iv")
+        np.testing.assert_array_equal(score_signals(signals)["score"], score_signals(without_iv)["score"])
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+def _history(contracts=60, seed=1):
+    from options_analysis.analysis.replay import replay_sessions
+
+    rng = np.random.default_rng(seed)
+    sessions = replay_sessions("2026-01-05", "2026-09-30")
+    frames = []
+    for token in range(contracts):
+        start = rng.integers(0, len(sessions) - 40)
+        life = sessions[start:start + rng.integers(15, 40)]
+        close = rng.uniform(50, 150, len(life))
+        open_ = close * rng.uniform(0.8, 1.2, len(life))
+        frames.append(pd.DataFrame({"instrument_token": token, "date": pd.to_datetime(life).strftime("%Y-%m-%d"),
+                                    "open": open_, "high": open_ + 1, "low": open_ - 1, "close": close,
+                                    "name": "ABB", "strike": 100.0, "expiry": str(life[-1]), "option_type": "CE"}))
+    return pd.concat(frames, ignore_index=True)
+
+def test_batched_replay_matches_one_pass(tmp_path, monkeypatch):
+    from options_analysis.analysis.replay import replay_scan, replay_sessions
+
+    monkeypatch.chdir(tmp_path)
+    history = _history()
+    as_of = replay_sessions("2026-02-02", "2026-09-15")
+    signals, summary = replay_scan(history, as_of, batch_cells=10 ** 9)
+    assert len(signals)
+    for batch_cells in (500, 60):
+        batched_signals, batched_summary = replay_scan(history, as_of, batch_cells=batch_cells)
+        pd.testing.assert_frame_equal(batched_signals, signals)
+        pd.testing.assert_frame_equal(batched_summary, summary)
+
+def test_replay_signal_and_score(tmp_path, monkeypatch):
+    from options_analysis.analysis.replay import replay_scan
+
+    monkeypatch.chdir(tmp_path)
+    # Green weeks of 5-9 and 12-16 Oct 2026, the second opening lower and closing higher
+    dates = ["2026-10-05", "2026-10-09", "2026-10-12", "2026-10-16", "2026-10-19", "2026-10-23"]
+    history = pd.DataFrame({"instrument_token": 7, "date": dates, "open": [100, 101, 95, 100, 120, 120],
+                            "high": 130.0, "low": 90.0, "close": [101, 110, 100, 115, 120, 126],
+                            "name": "ABB", "strike": 100.0, "expiry": "2026-10-27", "option_type": "CE"})
+    signals, _ = replay_scan(history, ["2026-10-19"], horizon=4)
+    assert signals[["as_of", "instrument_token", "entry_close", "exit_close"]].values.tolist() == \
+        [["2026-10-19", 7, 120.0, 126.0]]
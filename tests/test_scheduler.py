@@ -0,0 +1,25 @@
+def test_set_rate_credits_tokens_at_the_old_rate(monkeypatch):
+    from options_analysis.data import scheduler
+
+    clock = [100.0]
+    monkeypatch.setattr(scheduler.time, "monotonic", lambda: clock[0])
+    limiter = scheduler.RateLimiter(2, burst=10)
+    limiter.tokens = 0
+
+    clock[0] += 1
+    limiter.set_rate(8)
+    assert limiter.tokens == 2 and limiter.rate == 8
+    clock[0] += 0.5
+    limiter.acquire()
+    assert limiter.tokens == 5
+
+def test_throttling_halves_the_bucket_rate():
+    from options_analysis.data.kite_client import AdaptiveLimiter
+
+    limiter = AdaptiveLimiter(10)
+    limiter.acquire()
+    limiter.release(0.01, throttled=True)
+    assert limiter.bucket.rate == 5
+    limiter.acquire()
+    limiter.release(0.01)
+    assert limiter.bucket.rate == 5.5
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+def test_calendar_without_holidays_is_rebuilt(tmp_path, monkeypatch):
+    from options_analysis.utils import holidays, trading_calendar
+
+    monkeypatch.setattr(holidays, "HOLIDAY_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(holidays, "_tables", {})
+    monkeypatch.setattr(trading_calendar, "_calendars", {})
+    monkeypatch.setattr(holidays, "_read_holiday_sheet", lambda year: pd.DataFrame(columns=holidays.HOLIDAY_COLUMNS))
+    downloaded = [pd.DataFrame(columns=holidays.HOLIDAY_COLUMNS),
+                  pd.DataFrame({"Date": ["2031-01-27"], "Day": ["Monday"], "Description": ["Holiday"],
+                                "Exchanges": ["All"]})]
+    monkeypatch.setattr(holidays, "_download_zerodha_holidays", lambda year: downloaded.pop(0))
+
+    # The first download fails, that calendar is kept until its retry time passes
+    failed = trading_calendar.get_trading_calendar(2031)
+    assert failed.missing_years == [2031] and not failed.is_holiday("2031-01-27")
+    assert trading_calendar.get_trading_calendar(2031) is failed
+
+    key = (2031, 2031, False)
+    trading_calendar._calendars[key] = (failed, 0)
+    calendar = trading_calendar.get_trading_calendar(2031)
+    assert calendar.missing_years == [] and calendar.is_holiday("2031-01-27")
+    assert trading_calendar.get_trading_calendar(2031) is calendar
+
+def test_anchors_skip_a_week_without_sessions():
+    from datetime import date
+    from options_analysis.utils.trading_calendar import TradingCalendar
+
+    # Every weekday of the week of Monday 2031-03-10 is a holiday
+    closed_week = {date(2031, 3, day) for day in range(10, 15)}
+    calendar = TradingCalendar(2031, 2031, closed_week)
+    anchors = calendar.anchor_dates(np.array(["2031-03-15", "2031-03-22"], dtype="datetime64[D]"))
+    assert [anchor[0].item() for anchor in anchors] == [date(2031, 2, 24), date(2031, 2, 28),
+                                                        date(2031, 3, 3), date(2031, 3, 7)]
+    assert [anchor[1].item() for anchor in anchors] == [date(2031, 3, 3), date(2031, 3, 7),
+                                                        date(2031, 3, 17), date(2031, 3, 21)]
+
+    # The calendar starts on Wednesday 2031-01-01, it has nothing before that week
+    with pytest.raises(ValueError, match="2030-12-23"):
+        calendar.anchor_dates(np.array(["2031-01-08"], dtype="datetime64[D]"))
@@ -3,24 +3,19 @@ from datetime import date, tzinfo
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta, MO
 import re
-import plotly.graph_objects as go
 import pytz
-import requests
 import pandas as pd
-from bs4 import BeautifulSoup
-from nsepython import nse_holidays, nsefetch
 
+# plotly, requests, bs4 and the HTTP client are imported inside the functions that use them
+# so that importing this module stays cheap
 tz = pytz.timezone('Asia/Kolkata')
-current_date = datetime.today().now(tz)
 last_day_of_month = ""
 
 def get_stock_price(symbol : str):
-    # Fetch stock data for RELIANCE
-    url = "https://www.nseindia.com/api/quote-equity?symbol=" + symbol
-    data = nsefetch(url)
+    from options_analysis.data.prices import get_nse_prices
 
-    # Extract the last traded price
-    last_traded_price = data['priceInfo']['lastPrice']
+    # The first call loads every F&O stock's price in one request, later calls are served from memory
+    last_traded_price = get_nse_prices().get([symbol]).get(symbol)
     print(f'{symbol} stock last traded price is : ', last_traded_price)
     return last_traded_price
 
@@ -35,6 +30,10 @@ def get_nse_holidays(year=None):
     Returns:
         pandas.DataFrame: DataFrame containing holiday dates and descriptions
     """
+    import requests
+    from options_analysis.config.settings import NSE_HOLIDAY_TTL
+    from options_analysis.utils.http_client import fetch_json
+
     # If year is not provided, use current year
     if year is None:
         year = datetime.now().year
@@ -42,26 +41,14 @@ def get_nse_holidays(year=None):
     # URL for NSE holidays
     url = f"https://www.nseindia.com/api/holiday-master?type=trading"
 
-    # Headers to mimic a browser request
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-    }
-
     try:
-        # Send a GET request to NSE
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()  # Raise an exception for bad responses
-
-        # Parse JSON response
-        holiday_data = response.json()
+        # Send a GET request to NSE through the shared session (browser headers and cookies included)
+        holiday_data = fetch_json(url, ttl=NSE_HOLIDAY_TTL)
 
         # Filter by year if needed and create DataFrame
         holidays = []
         for item in holiday_data.get('CM', []):  # CM represents Capital Market segment
-            holiday_date = datetime.datetime.strptime(item['tradingDate'], '%d-%b-%Y')
+            holiday_date = datetime.strptime(item['tradingDate'], '%d-%b-%Y')
             if holiday_date.year == year:
                 holidays.append({
                     'Date': holiday_date.strftime('%Y-%m-%d'),
@@ -89,20 +76,17 @@ def get_nse_holidays_scrape(year=None):
     Returns:
         pandas.DataFrame: DataFrame containing holiday dates and descriptions
     """
+    from bs4 import BeautifulSoup
+    from options_analysis.config.settings import NSE_HOLIDAY_TTL
+    from options_analysis.utils.http_client import fetch_text
+
     if year is None:
-        year = datetime.datetime.now().year
+        year = datetime.now().year
 
     url = "https://www.nseindia.com/resources/exchange-communication-holidays"
 
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-    }
-
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = BeautifulSoup(fetch_text(url, ttl=NSE_HOLIDAY_TTL), 'html.parser')
 
         # Find the holiday table
         table = soup.find('table', {'class': 'holiday-table'})
@@ -116,7 +100,7 @@ def get_nse_holidays_scrape(year=None):
                 if len(cols) >= 3:
                     date_str = cols[0].text.strip()
                     try:
-                        date_obj = datetime.datetime.strptime(date_str, '%d-%b-%Y')
+                        date_obj = datetime.strptime(date_str, '%d-%b-%Y')
                         if date_obj.year == year:
                             holidays.append({
                                 'Date': date_obj.strftime('%Y-%m-%d'),
@@ -140,215 +124,30 @@ def get_zerodha_holidays(year=None):
     """
     Fetch trading holidays from Zerodha's Market Intel page
 
+    The page is parsed once per year and the resulting table is cached on disk.
+
     Args:
         year (int, optional): The year for which to fetch holidays. Defaults to current year.
 
     Returns:
         pandas.DataFrame: DataFrame containing holiday dates and descriptions
     """
+    from options_analysis.utils.holidays import get_zerodha_holidays as get_cached_zerodha_holidays
+
     # If year is not provided, use current year
     if year is None:
         year = datetime.now().year
 
-    # URL for Zerodha holiday calendar
-    url = "https://zerodha.com/marketintel/holiday-calendar/"
-
-    # Headers to mimic a browser request
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Referer': 'https://zerodha.com/',
-    }
-
-    try:
-        # Send a GET request to Zerodha
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()  # Raise an exception for bad responses
-
-        # Parse HTML response
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # Find the holiday table - looking for year in the heading
-        year_header = None
-        for header in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
-            if str(year) in header.text:
-                year_header = header
-                break
-
-        if not year_header:
-            print(f"Could not find header for year {year}")
-            return pd.DataFrame(columns=['Date', 'Day', 'Description', 'Exchanges'])
-
-        # Find the closest table after the year header
-        table = None
-        for element in year_header.find_all_next():
-            if element.name == 'table':
-                table = element
-                break
-
-        if not table:
-            # Try another approach - find table with year in header or caption
-            for table_elem in soup.find_all('table'):
-                if str(year) in table_elem.text[:100]:  # Check only first part of table
-                    table = table_elem
-                    break
-
-        if not table:
-            print(f"Could not find holiday table for year {year}")
-            return pd.DataFrame(columns=['Date', 'Day', 'Description', 'Exchanges'])
-
-        # Extract data from table
-        holidays = []
-        headers = []
-
-        # Extract headers
-        header_row = table.find('thead')
-        if header_row:
-            headers = [th.text.strip() for th in header_row.find_all('th')]
-        else:
-            # If no thead, use first row as header
-            first_row = table.find('tr')
-            if first_row:
-                headers = [th.text.strip() for th in first_row.find_all(['th', 'td'])]
-
-        if not headers:
-            headers = ['Date', 'Day', 'Description', 'Exchanges']
-
-        # Process rows
-        rows = table.find_all('tr')
-        # Skip header row if we already processed it
-        start_idx = 1 if header_row or (headers and rows and len(headers) == len(rows[0].find_all(['td', 'th']))) else 0
-
-        for row in rows[start_idx:]:
-            cells = row.find_all(['td', 'th'])
-            if len(cells) >= 3:  # Ensure we have at least date, day, and description
-                row_data = {}
-
-                # Map cells to headers, ensure we have enough headers
-                for i, cell in enumerate(cells):
-                    if i < len(headers):
-                        header = headers[i]
-                    else:
-                        header = f"Column_{i}"
-                    row_data[header] = cell.text.strip()
-
-                # Extract date - should be in the first column
-                date_str = list(row_data.values())[0]
-
-                # Try to parse date in different formats
-                date_obj = None
-                date_formats = ['%d-%b-%Y', '%d %b %Y', '%b %d, %Y', '%d/%m/%Y', '%Y-%m-%d']
-
-                # Clean the date string
-                date_str = re.sub(r'\s+', ' ', date_str.strip())
-                print(f"date str : {date_str}")
-                # Try to extract just the date part if there's additional text
-                date_match = re.search(
-                    r'(\d{1,2}[-\s/][A-Za-z]{3,}[-\s/]\d{2,4}|\d{1,2}[-\s/]\d{1,2}[-\s/]\d{2,4}|\d{4}[-\s/]\d{1,2}[-\s/]\d{1,2})',
-                    date_str)
-                if date_match:
-                    date_str = date_match.group(1)
-
-                # Try each format
-                for date_format in date_formats:
-                    try:
-                        date_obj = datetime.strptime(date_str, date_format)
-                        break
-                    except ValueError:
-                        continue
-
-                if date_obj is None:
-                    # If we couldn't parse the date, skip this row
-                    print(f"Could not parse date: {date_str}")
-                    continue
-
-                # Ensure we have the correct year
-                if date_obj.year != year:
-                    # If year is missing or wrong in the date string, set it to the requested year
-                    if date_obj.year < 100:  # 2-digit year
-                        date_obj = date_obj.replace(year=year)
-                    else:
-                        continue  # Skip this row if it's for a different year
-
-                # Build holiday entry
-                holiday = {
-                    'Date': date_obj.strftime('%Y-%m-%d'),
-                    'Day': date_obj.strftime('%A')
-                }
-
-                # Map remaining data
-                for i, (key, value) in enumerate(row_data.items()):
-                    if i == 0:  # Skip date as we've already processed it
-                        continue
-
-                    # Map to our standardized columns
-                    if re.search(r'day|week', key, re.I):
-                        holiday['Day'] = value
-                    elif re.search(r'desc|occasion|holiday|reason', key, re.I):
-                        holiday['Description'] = value
-                    elif re.search(r'exchange|market', key, re.I):
-                        holiday['Exchanges'] = value
-                    else:
-                        # Use original column name
-                        holiday[key] = value
-
-                # Ensure we have all required columns
-                if 'Description' not in holiday:
-                    # If no specific description column, use the second column as description
-                    second_col = list(row_data.items())[1][1] if len(row_data) > 1 else ""
-                    holiday['Description'] = second_col
-
-                if 'Exchanges' not in holiday:
-                    holiday['Exchanges'] = "All"  # Default
-
-                holidays.append(holiday)
-
-        # Create DataFrame
-        df = pd.DataFrame(holidays)
-
-        # Ensure we have the standard columns in a nice order
-        standard_columns = ['Date', 'Day', 'Description', 'Exchanges']
-        for col in standard_columns:
-            if col not in df.columns:
-                df[col] = ""
-
-        # Rearrange columns with standard ones first, then any extras
-        first_cols = [col for col in standard_columns if col in df.columns]
-        other_cols = [col for col in df.columns if col not in standard_columns]
-        df = df[first_cols + other_cols]
-
-        return df
-
-    except Exception as e:
-        print(f"Error fetching Zerodha holidays: {e}")
-        return pd.DataFrame(columns=['Date', 'Day', 'Description', 'Exchanges'])
+    return get_cached_zerodha_holidays(year)
 
 
 def create_chart(df, bullish_engulfing_days):
-    # 8️⃣ Candlestick Chart Visualization
-    fig = go.Figure(data=[
-        go.Candlestick(
-            x=df['date'],
-            open=df['open'],
-            high=df['high'],
-            low=df['low'],
-            close=df['close'],
-            increasing_line_color='green',
-            decreasing_line_color='red'
-        )
-    ])
-
-    # Highlight Bullish Engulfing Patterns
-    fig.add_trace(go.Scatter(
-        x=bullish_engulfing_days['date'],
-        y=bullish_engulfing_days['close'],
-        mode='markers',
-        marker=dict(size=12, color='blue', symbol='triangle-up'),
-        name='Bullish Engulfing'
-    ))
-
-    fig.update_layout(title='Bullish Engulfing Pattern Detection', xaxis_title='Date', yaxis_title='Price')
+    # Same figure the batch renderer writes for every flagged contract (options_analysis/charts/render.py)
+    from options_analysis.charts.render import candlestick_figure
+
+    # 8️⃣ Candlestick Chart Visualization, Bullish Engulfing Patterns highlighted
+    fig = candlestick_figure(df['date'], df['open'], df['high'], df['low'], df['close'],
+                             bullish_engulfing_days['date'], bullish_engulfing_days['close'])
     fig.show()
 
 def get_expiry_date():
@@ -363,29 +162,10 @@ def get_expiry_date():
 """"""""" Check if given date is trading holiday """""""""""
 """"""""""""""""""""""""""""""""""""""""""""""""""""""""""""""""""
 def holiday_check(date):
-    # Step 1 : Get list of trading holidays with description
-    try:
-        df_holidays = pd.json_normalize(nse_holidays()['FO'])
-    except Exception as e:
-        print("An unexpected error occurred while fetching holidays from NSE:", e)
-        print("Skipping holiday check now", e)
-        return False
-    # print(df_holidays.head(50))
-
-    # Step 2 : Convert into dataframe
-    df_holidays['tradingDate'] = pd.to_datetime(df_holidays['tradingDate'])
-
-    # Step 3: Date to check
-    check_date = pd.to_datetime(date)  # Example: Gandhi Jayanti
-
-    # Step 4: Check if the date is a holiday
-    if check_date in df_holidays['tradingDate'].values:
-        print(
-            f"{check_date.date()} is a holiday: {df_holidays[df_holidays['tradingDate'] == check_date]['description'].values[0]}")
-        return True
-    else:
-        print(f"{check_date.date()} is NOT a holiday.")
-        return False
+    # Same holiday calendar (NSE sheet or Zerodha's page, cached per year) the options_analysis scan uses
+    from options_analysis.utils.date_utils import holiday_check as calendar_holiday_check
+
+    return calendar_holiday_check(date)
 
 
 
@@ -402,21 +182,9 @@ import pytz
 # prev_week_num - number of week to go back
 # offset : 0 - Monday,  1 - Tuesday,  ....., 4 - Friday
 def get_nth_working_day(prev_week_num, offset):
-    # Today's date
-    tz = pytz.timezone('Asia/Kolkata')
-    today = datetime.today().now(tz)
-    # today = datetime.today()
-    # print(today.tzinfo is not None)
-
-    # Weekday: Monday = 0 ... Sunday = 6
-    days_since_offset = (today.weekday() - offset) % 7
+    from options_analysis.utils.date_utils import get_nth_working_day as nth_working_day
 
-    # Go back to last working day, then back by (n-1)*7 days
-    total_days_back = days_since_offset + (prev_week_num - 1) * 7
-
-    # Last Target day
-    target_day = today - timedelta(days=total_days_back)
-    return target_day.date()
+    return nth_working_day(prev_week_num, offset)
 
 """"""""""""""""""""""""""""""""""""""""""""""""""""""""""""""""""
 """"""""" green_bullish_engulf_pattern """""""""""
@@ -515,6 +283,7 @@ def get_last_thursday_of_next_month(year, month):
 ############## Get last day and last Thursday of the Month ################
 ###########################################################################
 def get_last_thursday_and_last_day_of_month():
+    current_date = datetime.today().now(tz)
     year = current_date.year
     month = current_date.month
 
@@ -604,41 +373,11 @@ def get_n_minus_4th_monday(n, reference_date=None):
 
 # working days of week calculation
 def get_working_days():
-    # if today is Monday then give 2 for prev_monday else 3 and so on
-    print(f"Today is : {datetime.today().weekday()}")
-    if datetime.today().weekday() == 0 or datetime.today().weekday() == 6:
-        prev_monday = get_nth_working_day(2, 0)
-        last_monday = get_nth_working_day(1, 0)
-    else:
-        prev_monday = get_nth_working_day(3, 0)
-        last_monday = get_nth_working_day(2, 0)
-
-    if datetime.today().weekday() == 4:
-        prev_friday = get_nth_working_day(3, 4)
-        last_friday = get_nth_working_day(2, 4)
-    else:
-        prev_friday = get_nth_working_day(2, 4)
-        last_friday = get_nth_working_day(1, 4)
-
-    print("Before holiday check --> ",prev_monday, prev_friday, last_monday, last_friday)
-
-    first_week_open_date = prev_monday
-    while (holiday_check(first_week_open_date)):
-        first_week_open_date = first_week_open_date + timedelta(days=1)
-
-    last_week_open_date = last_monday
-    while (holiday_check(last_week_open_date)):
-        last_week_open_date = last_week_open_date + timedelta(days=1)
-
-    first_week_close_date = prev_friday
-    while (holiday_check(first_week_close_date)):
-        first_week_close_date = first_week_close_date - timedelta(days=1)
-
-    last_week_close_date = last_friday
-    while (holiday_check(last_week_close_date)):
-        last_week_close_date = last_week_close_date - timedelta(days=1)
+    # First/last trading sessions of the last two completed weeks, from the shared trading calendar
+    from options_analysis.utils.trading_calendar import get_anchor_dates
 
-    print("After holiday check --> ",first_week_open_date, first_week_close_date, last_week_open_date, last_week_close_date)
+    first_week_open_date, first_week_close_date, last_week_open_date, last_week_close_date = get_anchor_dates()
+    print("Trading week anchors --> ",first_week_open_date, first_week_close_date, last_week_open_date, last_week_close_date)
     return first_week_open_date, first_week_close_date, last_week_open_date, last_week_close_date
 
 